@@ -7,25 +7,67 @@ const CONFIG = {
     WS_URL: "wss://ry6pg133uf.execute-api.us-east-1.amazonaws.com/production",
     RECORDING_FORMAT: "audio/webm",
     MAX_RECORDING_TIME: 30000,
+    SEGMENT_MS: 1000, // upload while recording; 0 = one blob after stop
+    BATCH_STEP_MS: 300, // pause between the steps of a chained command
     SHOW_DEBUG_LOG: true,
     AUTO_RECONNECT: true,
-    RECONNECT_DELAY: 1000
+    RECONNECT_DELAY: 1000,
+    HEARTBEAT_INTERVAL: 300000 // keeps the connection's row (and socket) alive
 };
 
+/***** Selector catalog *****/
+// Registered with the server on connect; the model only sees these targets.
+// First entry describes the target, the rest are extra spoken phrases.
+const SELECTOR_CATALOG = {
+    "#nav-home": ["Home tab", "home", "main page"],
+    "#nav-book": ["Book Appointment tab", "booking", "appointment", "schedule"],
+    "#nav-contact": ["Contact Support tab", "support", "help", "contact us"]
+};
+
+/***** Session *****/
+// Ties uploads to this page's WebSocket so intents come back to us only
+const SESSION_ID = crypto.randomUUID();
+
 /***** WebSocket Management *****/
 let ws;
+let heartbeatTimer;
+let lastTtl = 0; // expiry the server last reported for our connection row
+let sentPage = null;
+let lastActivity = Math.floor(Date.now() / 1000);
+
+/* The server only writes when the row is close to expiry (it knows from the
+   ttl we echo) or the page changed, so most heartbeats cost nothing. */
+function sendHeartbeat() {
+    if (!ws || ws.readyState !== WebSocket.OPEN) return;
+    const page = location.hash || "#home";
+    const msg = { action: "heartbeat", ttl: lastTtl, lastActivity };
+    if (page !== sentPage) msg.page = sentPage = page;
+    ws.send(JSON.stringify(msg));
+}
 
 function ensureWS() {
     if (ws && ws.readyState === WebSocket.OPEN) return;
 
-    ws = new WebSocket(CONFIG.WS_URL);
+    ws = new WebSocket(`${CONFIG.WS_URL}?session=${SESSION_ID}`);
 
-    ws.onopen = () => log("WebSocket connected");
+    ws.onopen = () => {
+        log("WebSocket connected");
+        ws.send(
+            JSON.stringify({ action: "register", selectors: SELECTOR_CATALOG })
+        );
+        lastTtl = 0;
+        sentPage = null;
+        clearInterval(heartbeatTimer);
+        if (CONFIG.HEARTBEAT_INTERVAL > 0) {
+            heartbeatTimer = setInterval(sendHeartbeat, CONFIG.HEARTBEAT_INTERVAL);
+        }
+    };
     ws.onerror = error => {
         console.error("WebSocket error:", error);
         log("WebSocket error occurred");
     };
     ws.onclose = event => {
+        clearInterval(heartbeatTimer);
         log(
             `WebSocket closed (${event.code}) - reconnecting in ${CONFIG.RECONNECT_DELAY}ms`
         );
@@ -37,6 +79,10 @@ function ensureWS() {
         log("← " + event.data);
         try {
             const intent = JSON.parse(event.data);
+            if (intent.ttl !== undefined && intent.action === undefined) {
+                lastTtl = intent.ttl; // heartbeat response
+                return;
+            }
             runIntent(intent);
         } catch (err) {
             console.error("Failed to parse WebSocket message:", err);
@@ -77,22 +123,94 @@ function runIntent(i) {
             break;
         }
 
+        /*--------------------------------------------
+      ④ SERVER COULD NOT USE THE RECORDING      */
+        case "retry": {
+            document.getElementById("status").textContent = " " + i.message;
+            break;
+        }
+
+        /*--------------------------------------------
+      ⑤ CHAINED COMMANDS, RUN IN ORDER          */
+        case "batch": {
+            runBatch(i.intents || []);
+            break;
+        }
+
         default:
             console.warn("Unknown intent:", i);
     }
 }
 
+// Steps of one utterance, in seq order, letting the page settle in between
+async function runBatch(steps) {
+    const ordered = [...steps].sort((a, b) => a.seq - b.seq);
+    for (const [n, step] of ordered.entries()) {
+        if (n) await new Promise(r => setTimeout(r, CONFIG.BATCH_STEP_MS));
+        log(`step ${step.seq + 1}/${ordered.length}`);
+        runIntent(step);
+    }
+}
+
 /***** Mic Recording → S3 (public PUT) *****/
+/* Recording UUID without dashes: the correlationId of the server's
+   latency metrics for this upload. */
+function correlationId(key) {
+    const match = key.slice(PREFIX.length + SESSION_ID.length + 1)
+        .match(/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/i);
+    return match ? match[0].replace(/-/g, "").toLowerCase() : "";
+}
+
 async function uploadBlob(blob, name) {
-    const key = PREFIX + crypto.randomUUID() + "-" + name;
+    const key = `${PREFIX}${SESSION_ID}/${crypto.randomUUID()}-${name}`;
     const url = `https://${BUCKET}.s3.${REGION}.amazonaws.com/${key}`;
     log("→ uploading " + key);
+    const started = performance.now();
     await fetch(url, {
         method: "PUT",
         body: blob,
         headers: { "Content-Type": blob.type }
     });
-    log("✅ upload done – wait ~60 s");
+    // Upload time is only known here; server-side metrics start at the S3 event
+    const ms = Math.round(performance.now() - started);
+    log(`✅ upload done in ${ms} ms (correlation ${correlationId(key)}) – wait ~60 s`);
+}
+
+/* Segmented upload: part-N objects go up while recording, the manifest
+   last. The server stitches them once all parts named there have landed. */
+async function putObject(key, body, type) {
+    const url = `https://${BUCKET}.s3.${REGION}.amazonaws.com/${key}`;
+    const res = await fetch(url, {
+        method: "PUT",
+        body,
+        headers: { "Content-Type": type }
+    });
+    if (!res.ok) throw new Error(`upload ${key} failed (${res.status})`);
+}
+
+function segmentedRecording(rec) {
+    const base = `${PREFIX}${SESSION_ID}/${crypto.randomUUID()}/`;
+    const uploads = [];
+    rec.ondataavailable = e => {
+        const key = `${base}part-${String(uploads.length).padStart(5, "0")}.webm`;
+        uploads.push(putObject(key, e.data, "audio/webm"));
+    };
+    rec.onstop = async () => {
+        try {
+            await Promise.all(uploads);
+            const manifest = { parts: uploads.length, format: "webm" };
+            await putObject(
+                `${base}manifest.json`,
+                JSON.stringify(manifest),
+                "application/json"
+            );
+            log(`✅ ${uploads.length} segment(s) uploaded (correlation ${correlationId(base)})`);
+        } catch (err) {
+            console.error(err);
+            log("Segment upload failed");
+        }
+    };
+    rec.start(CONFIG.SEGMENT_MS);
 }
 
 let mediaRec,
@@ -106,11 +224,15 @@ micBtn.onclick = async () => {
             audio: true
         });
         mediaRec = new MediaRecorder(stream, { mimeType: "audio/webm" });
-        chunks = [];
-        mediaRec.ondataavailable = e => chunks.push(e.data);
-        mediaRec.onstop = () =>
-            uploadBlob(new Blob(chunks, { type: "audio/webm" }), "rec.webm");
-        mediaRec.start();
+        if (CONFIG.SEGMENT_MS > 0) {
+            segmentedRecording(mediaRec);
+        } else {
+            chunks = [];
+            mediaRec.ondataavailable = e => chunks.push(e.data);
+            mediaRec.onstop = () =>
+                uploadBlob(new Blob(chunks, { type: "audio/webm" }), "rec.webm");
+            mediaRec.start();
+        }
         micBtn.textContent = "⏸️ Stop";
         document.getElementById("status").textContent = " recording…";
     } else {
@@ -165,4 +287,9 @@ const log = m => {
 };
 
 window.addEventListener("hashchange", () => render(location.hash));
+["click", "keydown"].forEach(type =>
+    window.addEventListener(type, () => {
+        lastActivity = Math.floor(Date.now() / 1000);
+    })
+);
 render(location.hash || "#home");
@@ -15,7 +15,8 @@ const CONFIG = {
     // UI Settings
     SHOW_DEBUG_LOG: true,
     AUTO_RECONNECT: true,
-    RECONNECT_DELAY: 1000 // 1 second
+    RECONNECT_DELAY: 1000, // 1 second
+    HEARTBEAT_INTERVAL: 300000 // 5 minutes; 0 disables heartbeats
 };
 
 // Export for use in app.js
@@ -1,9 +1,21 @@
 """
 Invoked by S3 → 'transcribe-output/…json'.
-Parses the transcript, asks Bedrock for an intent, pushes that intent
-to every live WebSocket connection stored in DynamoDB.
+Parses the transcript, asks Bedrock for an intent and pushes that intent
+to the WebSocket connection(s) of the session that recorded it.
+
+The transcribe stage's streaming and local ASR backends invoke this handler
+directly with the same S3 event record plus an inline ``transcript``
+(``{"text", "confidences"}``); those records are never read from S3.
+
+DELIVERY_MODE=broadcast restores the old behaviour of pushing every intent
+to every live connection in DynamoDB.
+
+Every transcript emits one ``intent`` metrics line (see ``core.metrics``)
+with its stage timings and, from the S3 event times, the latency from the
+audio upload to the transcript and to the delivered intent.
 """
 
+import functools
 import json
 import logging
 import os
@@ -11,133 +23,594 @@ import time
 import traceback
 import urllib.parse
 
-import boto3
-from typing import Dict, Any
+from boto3.dynamodb.conditions import Attr, Key
+from typing import Dict, Any, Iterable, List, Optional
+
+from core import clients, idempotency, keys, logs, metrics
+from core.batch import process_records
+from core.resilience import CircuitBreaker, Guard, RetryBudget, TokenBucket, Unavailable
+from connections import ConnectionCache
+from fanout import FanOut, FanOutResult
+from gating import DEFAULT_FILLERS, TranscriptGate
+from intent_cache import IntentCache
+from prompts import CatalogContext, PromptBook
+from router import ModelRouter
+from sequence import as_batch, from_answer, split_commands, valid_prefix
+from streaming import first_json_object, iter_text_deltas
+from transcript_stream import TranscriptResult, read_transcript
 
 # ── 1.  ENV ─────────────────────────────────────────────────────────
-REGION = os.environ["REGION"]  # us-east-1
-BUCKET = os.environ["AWS_BUCKET"]  # voicenav-bucket
-PREFIX = os.environ["OUTPUT_PREFIX"]  # transcribe-output/
-MODEL_ID = os.environ["MODEL_ID"]  # anthropic.claude-3-sonnet-…
-CONN_TABLE = os.environ["CONN_TABLE"]  # VoiceNavConnections
-WS_ENDPOINT = os.environ["WS_ENDPOINT"]  # https://…execute-api…/production
-
-# ── 2.  CLIENTS ─────────────────────────────────────────────────────
-s3 = boto3.client("s3", region_name=REGION)
-ddb = boto3.resource("dynamodb", region_name=REGION).Table(CONN_TABLE)
-bed = boto3.client("bedrock-runtime", region_name=REGION)
-apigw = boto3.client(
-    "apigatewaymanagementapi", region_name=REGION, endpoint_url=WS_ENDPOINT
+REGION = clients.region()  # us-east-1
+BUCKET = os.environ.get("AWS_BUCKET", "voicenav-bucket")
+PREFIX = os.environ.get("OUTPUT_PREFIX", "transcribe-output/")
+MODEL_ID = os.environ.get("MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
+CONN_TABLE = os.environ.get("CONN_TABLE", "VoiceNavConnections")
+WS_ENDPOINT = os.environ.get("WS_ENDPOINT", "")  # https://…execute-api…/production
+PRIME_CONNECTIONS = os.environ.get("PRIME_CONNECTIONS", "false").lower() == "true"
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "8"))  # records in parallel
+IDEMPOTENCY_TABLE = os.environ.get("IDEMPOTENCY_TABLE")  # optional dedupe table
+DELIVERY_MODE = os.environ.get("DELIVERY_MODE", "targeted")  # or "broadcast"
+SESSION_INDEX = os.environ.get("SESSION_INDEX", "sessionID-index")
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", "32"))
+FANOUT_TIMEOUT = float(os.environ.get("FANOUT_TIMEOUT", "2"))  # per connection
+FANOUT_DEADLINE = float(os.environ.get("FANOUT_DEADLINE", "20"))  # whole fan-out
+SCAN_SEGMENTS = int(os.environ.get("SCAN_SEGMENTS", "4"))  # parallel scan
+CONN_CACHE_TTL = float(os.environ.get("CONN_CACHE_TTL", "30"))  # 0 = off
+CONN_CACHE_MAX = int(os.environ.get("CONN_CACHE_MAX", "10000"))
+CONN_EPOCH_TABLE = os.environ.get("CONN_EPOCH_TABLE")  # optional, see store_conn
+INTENT_CACHE_TABLE = os.environ.get("INTENT_CACHE_TABLE")  # optional, shared tier
+INTENT_CACHE_SIZE = int(os.environ.get("INTENT_CACHE_SIZE", "256"))
+INTENT_CACHE_TTL = int(os.environ.get("INTENT_CACHE_TTL", "86400"))
+BEDROCK_STREAMING = os.environ.get("BEDROCK_STREAMING", "false").lower() == "true"
+FAST_PATH_THRESHOLD = float(os.environ.get("FAST_PATH_THRESHOLD", "0.8"))  # >1 = off
+PROMPT_CACHE_SIZE = int(os.environ.get("PROMPT_CACHE_SIZE", "64"))  # catalogs
+MAX_INTENTS = int(os.environ.get("MAX_INTENTS", "5"))  # steps per utterance
+# Comma-separated model IDs, smallest first; defaults to MODEL_ID alone
+MODEL_TIERS = [m.strip() for m in os.environ.get("MODEL_TIERS", "").split(",")]
+ROUTER_MAX_WORDS = int(os.environ.get("ROUTER_MAX_WORDS", "8"))
+ROUTER_MAX_SELECTORS = int(os.environ.get("ROUTER_MAX_SELECTORS", "20"))
+ROUTER_HINT_SCORE = float(os.environ.get("ROUTER_HINT_SCORE", "0.5"))
+GATE_MIN_WORDS = int(os.environ.get("GATE_MIN_WORDS", "1"))  # non-filler words
+GATE_MIN_CONFIDENCE = float(os.environ.get("GATE_MIN_CONFIDENCE", "0.5"))  # 0 = off
+GATE_FILLERS = os.environ.get("GATE_FILLERS", ",".join(sorted(DEFAULT_FILLERS)))
+RETRY_MESSAGE = os.environ.get("RETRY_MESSAGE", "Sorry, I didn't catch that.")
+BEDROCK_RATE = float(os.environ.get("BEDROCK_RATE", "0"))  # calls/s, 0 = no limit
+BEDROCK_BURST = float(os.environ.get("BEDROCK_BURST", "10"))
+BEDROCK_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "3"))
+BEDROCK_RETRY_BUDGET = int(os.environ.get("BEDROCK_RETRY_BUDGET", "10"))  # per event
+BEDROCK_BREAKER_FAILURES = int(os.environ.get("BEDROCK_BREAKER_FAILURES", "5"))
+BEDROCK_BREAKER_RESET = float(os.environ.get("BEDROCK_BREAKER_RESET", "30"))  # s
+APIGW_RATE = float(os.environ.get("APIGW_RATE", "0"))  # posts/s, 0 = no limit
+APIGW_BURST = float(os.environ.get("APIGW_BURST", "100"))
+APIGW_RETRY_BUDGET = int(os.environ.get("APIGW_RETRY_BUDGET", "50"))  # per event
+DEGRADED_MATCH_THRESHOLD = float(os.environ.get("DEGRADED_MATCH_THRESHOLD", "0.5"))
+BUSY_MESSAGE = os.environ.get("BUSY_MESSAGE", "I'm busy right now, please try again.")
+
+
+# ── 2.  CLIENTS (created on first use, cached per container) ──────────
+def s3() -> Any:
+    return clients.client("s3")
+
+
+def ddb() -> Any:
+    return clients.table(CONN_TABLE)
+
+
+def bed() -> Any:
+    # One attempt per call: bedrock_guard owns backoff and the retry budget
+    return clients.client(
+        "bedrock-runtime",
+        read_timeout=60,
+        retries={"mode": "standard", "max_attempts": 1},
+    )
+
+
+def apigw() -> Any:
+    return clients.client(
+        "apigatewaymanagementapi",
+        endpoint_url=WS_ENDPOINT,
+        max_pool_connections=FANOUT_WORKERS,
+        connect_timeout=FANOUT_TIMEOUT,
+        read_timeout=FANOUT_TIMEOUT,
+        retries={"mode": "standard", "max_attempts": 1},
+    )
+
+
+# Client-side rate limits, shared retry budgets and circuit breakers; a
+# throttled Bedrock degrades to the local matcher instead of failing the
+# event (and S3 redelivering it onto the same throttled service).
+bedrock_guard = Guard(
+    "bedrock",
+    TokenBucket(BEDROCK_RATE, BEDROCK_BURST),
+    CircuitBreaker(BEDROCK_BREAKER_FAILURES, BEDROCK_BREAKER_RESET),
+    RetryBudget(BEDROCK_RETRY_BUDGET),
+    BEDROCK_MAX_ATTEMPTS,
 )
+apigw_guard = Guard(
+    "apigw",
+    TokenBucket(APIGW_RATE, APIGW_BURST),
+    CircuitBreaker(failures=20, reset_after=5),
+    RetryBudget(APIGW_RETRY_BUDGET),
+    acquire_timeout=FANOUT_TIMEOUT,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def idempotency_store() -> idempotency.IdempotencyStore:
+    """Claims on transcripts so duplicate S3 deliveries are handled once."""
+    return idempotency.IdempotencyStore(
+        clients.table(IDEMPOTENCY_TABLE) if IDEMPOTENCY_TABLE else None
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def conn_cache() -> ConnectionCache:
+    """Warm-container cache of live connections (broadcast mode)."""
+    return ConnectionCache(
+        ddb(),
+        CONN_CACHE_TTL,
+        CONN_CACHE_MAX,
+        SCAN_SEGMENTS,
+        clients.table(CONN_EPOCH_TABLE) if CONN_EPOCH_TABLE else None,
+    )
+
 
 # ── 3.  LOGGING ─────────────────────────────────────────────────────
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)-7s %(asctime)sZ %(message)s",
-    datefmt="%Y-%m-%dT%H:%M:%S",
-)
+logs.configure()
 log = logging.getLogger(__name__)
+detail = logs.detail(__name__)  # sampled per-transcript lines
+
+# ── 4.  PROMPT ──────────────────────────────────────────────────────
+# Built per registered selector catalog (see prompts.py); pages that
+# registered none get the demo page's three selectors.
+prompt_book = PromptBook(FAST_PATH_THRESHOLD, PROMPT_CACHE_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def intent_cache() -> IntentCache:
+    """
+    Transcript → intent cache, per model tier list; lookups are namespaced
+    by the page's rendered prompt prefix (wording and catalog).
+    """
+    return IntentCache(
+        "\0".join(router.tiers),
+        clients.table(INTENT_CACHE_TABLE) if INTENT_CACHE_TABLE else None,
+        INTENT_CACHE_SIZE,
+        INTENT_CACHE_TTL,
+    )
+
 
-# ── 4.  PROMPT ( **ALL** braces that are NOT .format-place-holders are doubled )
-PROMPT = (
-    "You are an accessibility assistant.\n"
-    "Valid UI selectors:\n"
-    "  #nav-home        – Home tab\n"
-    "  #nav-book        – Book Appointment tab\n"
-    "  #nav-contact     – Contact Support tab\n"
-    "Return ONLY JSON like "
-    '{{"action":"click", "selector":"#nav-book"}}.\n\n'
-    'User command: "{cmd}"'
+# Local matcher over the default selectors; confident matches skip Bedrock
+fast_matcher = prompt_book.default.matcher
+bedrock_stats = {"calls": 0, "seconds": 0.0}
+# Short, simple commands start on the smallest model tier
+router = ModelRouter(
+    [m for m in MODEL_TIERS if m] or [MODEL_ID],
+    ROUTER_MAX_WORDS,
+    ROUTER_MAX_SELECTORS,
+    ROUTER_HINT_SCORE,
 )
+# Empty, filler-only or low-confidence transcripts never reach a model
+gate = TranscriptGate(
+    GATE_MIN_WORDS,
+    GATE_MIN_CONFIDENCE,
+    [w.strip() for w in GATE_FILLERS.split(",") if w.strip()],
+)
+
+
+# Optional init-phase warm-up: build clients and open TLS before the
+# first event arrives
+if PRIME_CONNECTIONS:
+    warmers = [
+        lambda: s3().head_bucket(Bucket=BUCKET),
+        lambda: ddb().meta.client.describe_endpoints(),
+        bed,
+    ]
+    if WS_ENDPOINT:
+        warmers.append(lambda: apigw().get_connection(ConnectionId="prime"))
+    clients.prime(warmers)
 
 
 # ── 5.  HELPERS ─────────────────────────────────────────────────────
-def ask_bedrock(cmd: str) -> Dict[str, Any]:
+def ask_bedrock(
+    cmd: str, prompt: Optional[str] = None, model_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Send command to Bedrock and return parsed intent.
 
+    With BEDROCK_STREAMING enabled the response is streamed and the call
+    returns as soon as the first complete JSON object has arrived. Token
+    usage reported by the model is added to the router's tier stats.
+
     Args:
         cmd: Voice command string
+        prompt: Full prompt for the page's catalog (default catalog if None)
+        model_id: Model to call (MODEL_ID if None)
 
     Returns:
-        Dict containing action and selector/other parameters
+        Dict containing action and selector/other parameters, or a
+        ``batch`` of them for chained commands
+
+    Raises:
+        ValueError: If the model's answer holds no JSON object
+        Unavailable: If Bedrock is throttling or its circuit is open
     """
+    model = model_id or MODEL_ID
+    content = prompt or prompt_book.default.render(cmd)
     payload = {
         "anthropic_version": "bedrock-2023-05-31",
-        "messages": [{"role": "user", "content": PROMPT.format(cmd=cmd)}],
+        "messages": [{"role": "user", "content": content}],
         "max_tokens": 128,
     }
-    rsp = bed.invoke_model(
-        modelId=MODEL_ID,
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps(payload),
-    )
-    txt = json.loads(rsp["body"].read())["content"][0]["text"]
+    if BEDROCK_STREAMING:
+        with metrics.span("bedrock_ms"):
+            rsp = bedrock_guard.call(
+                lambda: bed().invoke_model_with_response_stream(
+                    modelId=model,
+                    contentType="application/json",
+                    accept="application/json",
+                    body=json.dumps(payload),
+                )
+            )
+            stream = rsp["body"]
+            usage: Dict[str, int] = {}
+            try:
+                streamed: Dict[str, Any] = from_answer(
+                    first_json_object(iter_text_deltas(stream, usage)), MAX_INTENTS
+                )
+                return streamed
+            finally:
+                # Drop whatever the model is still generating
+                stream.close()
+                router.record_usage(model, usage)
+
+    with metrics.span("bedrock_ms"):
+        rsp = bedrock_guard.call(
+            lambda: bed().invoke_model(
+                modelId=model,
+                contentType="application/json",
+                accept="application/json",
+                body=json.dumps(payload),
+            )
+        )
+        body = json.loads(rsp["body"].read())
+    router.record_usage(model, body.get("usage"))
+    txt = body["content"][0]["text"]
     # Parse the JSON response from Bedrock
-    intent: Dict[str, Any] = json.loads(txt)
+    intent: Dict[str, Any] = from_answer(json.loads(txt), MAX_INTENTS)
+    return intent
+
+
+def resolve_intent(cmd: str, ctx: Optional[CatalogContext] = None) -> Dict[str, Any]:
+    """
+    Return the intent for a command, asking Bedrock only when needed.
+
+    The catalog's fast-path matcher is tried first (on each clause of a
+    chained command, which only skips the model if all of them match), then
+    the intent cache. Model answers naming a selector outside the catalog
+    are returned but not cached; the caller rejects them (or delivers the
+    valid leading steps of a batch). While Bedrock is unavailable the
+    matcher's best guess is accepted down to DEGRADED_MATCH_THRESHOLD, and
+    below it a ``retry`` action asks the user to try again.
+
+    Args:
+        cmd: Voice command string
+        ctx: Selector catalog of the page (default catalog if None)
+
+    Returns:
+        Dict containing action and selector/other parameters, or a
+        ``batch`` of them for chained commands
+    """
+    ctx = ctx or prompt_book.default
+    clauses = split_commands(cmd, MAX_INTENTS)
+    if len(clauses) > 1:
+        # A chain resolves locally only if every clause matches confidently
+        matches = [ctx.matcher.match(c) for c in clauses]
+        if all(matches):
+            detail.info("Fast path chain %s", [m.selector for m in matches if m])
+            metrics.tag(resolvedBy="fast_path")
+            chain: Dict[str, Any] = as_batch(
+                [{"action": "click", "selector": m.selector} for m in matches if m]
+            )
+            return chain
+    match = ctx.matcher.match(cmd) if len(clauses) == 1 else None
+    if match is not None:
+        detail.info(
+            "Fast path %s (%.2f) %s", match.selector, match.score, ctx.matcher.stats
+        )
+        metrics.tag(resolvedBy="fast_path")
+        return {"action": "click", "selector": match.selector}
+
+    intent: Optional[Dict[str, Any]] = intent_cache().get(cmd, ctx.prompt_prefix)
+    metrics.tag(resolvedBy="cache" if intent is not None else "bedrock")
+    if intent is None:
+        prompt = ctx.render(cmd)
+        near = ctx.matcher.score(cmd) if len(router.tiers) > 1 else None
+        started = time.perf_counter()
+        try:
+            intent = router.route(
+                cmd,
+                near.score if near else 0.0,
+                len(ctx.selectors),
+                lambda model: ask_bedrock(cmd, prompt, model),
+                ctx.valid,
+            )
+        except Unavailable as e:
+            log.warning("Degraded mode (%s) %s", e, bedrock_guard.stats)
+            metrics.tag(resolvedBy="degraded")
+            return degraded_intent(cmd, ctx)
+        bedrock_stats["calls"] += 1
+        bedrock_stats["seconds"] += time.perf_counter() - started
+        if ctx.valid(intent):
+            intent_cache().put(cmd, intent, ctx.prompt_prefix)
+    detail.info(
+        "Intent cache %s fast path %s prompts %s bedrock calls=%d avg_ms=%.1f",
+        intent_cache().stats,
+        ctx.matcher.stats,
+        prompt_book.stats,
+        bedrock_stats["calls"],
+        1000 * bedrock_stats["seconds"] / max(bedrock_stats["calls"], 1),
+    )
+    if bedrock_stats["calls"] and len(router.tiers) > 1:
+        detail.info("Model tiers %s", router.stats)
     return intent
 
 
-def broadcast(intent: Dict[str, Any]) -> None:
+def degraded_intent(cmd: str, ctx: CatalogContext) -> Dict[str, Any]:
+    """Best local answer while Bedrock is throttled: a near match or a retry."""
+    best = ctx.matcher.score(cmd)
+    if best is not None and best.score >= DEGRADED_MATCH_THRESHOLD:
+        detail.info("Degraded match %s (%.2f)", best.selector, best.score)
+        return {"action": "click", "selector": best.selector}
+    return {"action": "retry", "message": BUSY_MESSAGE, "reason": "degraded"}
+
+
+def post_to(conn_ids: Iterable[str], intent: Dict[str, Any]) -> FanOutResult:
+    """
+    Push an intent to the given WebSocket connections, dropping stale ones.
+
+    Args:
+        conn_ids: API Gateway connection IDs (may be a lazy iterator)
+        intent: Intent dictionary to send
+
+    Returns:
+        Delivered/gone/failed counts
+    """
+    result = FanOut(apigw(), ddb(), FANOUT_WORKERS, FANOUT_DEADLINE, apigw_guard).send(
+        conn_ids, intent
+    )
+    log.info(
+        "Fan-out delivered=%d gone=%d failed=%d expired=%d in %.3fs",
+        result.delivered,
+        result.gone,
+        result.failed,
+        result.expired,
+        result.elapsed,
+    )
+    if result.errors:
+        log.warning("Fan-out failures by type %s", result.errors)
+    if result.truncated:
+        log.warning("Fan-out deadline passed before every connection was read")
+    if DELIVERY_MODE == "broadcast" and CONN_CACHE_TTL > 0:
+        conn_cache().invalidate(result.gone_ids)
+    return result
+
+
+def broadcast(intent: Dict[str, Any]) -> FanOutResult:
     """
     Broadcast intent to all active WebSocket connections.
 
+    Connection IDs come from the warm-container cache or stream from a
+    paginated, segmented scan straight into the fan-out.
+
     Args:
         intent: Intent dictionary to broadcast
     """
-    now = int(time.time())
-    conns = ddb.scan(
-        ProjectionExpression="#c,#t",
-        ExpressionAttributeNames={"#c": "connID", "#t": "ttl"},
-        FilterExpression="#t > :now",
-        ExpressionAttributeValues={":now": now},
+    result = post_to(conn_cache().connections(), intent)
+    detail.info("Connection cache %s", conn_cache().stats)
+    return result
+
+
+def session_items(session_id: str) -> List[Dict[str, Any]]:
+    """
+    Look up the live connection item(s) of one session with a single Query.
+
+    Args:
+        session_id: Session ID carried in the transcript key
+
+    Returns:
+        Connection items (with any registered catalog) whose TTL has not
+        yet expired
+    """
+    items: List[Dict[str, Any]] = ddb().query(
+        IndexName=SESSION_INDEX,
+        KeyConditionExpression=Key("sessionID").eq(session_id),
+        FilterExpression=Attr("ttl").gt(int(time.time())),
     )["Items"]
+    return items
+
+
+def session_connections(session_id: str) -> list[str]:
+    """Connection IDs of a session's live connections."""
+    return [str(c["connID"]) for c in session_items(session_id)]
 
-    log.info("Live connections → %s", [c["connID"] for c in conns])
-    for c in conns:
-        cid = c["connID"]
-        try:
-            apigw.post_to_connection(ConnectionId=cid, Data=json.dumps(intent).encode())
-        except apigw.exceptions.GoneException:
-            log.warning("Stale %s – removing", cid)
-            ddb.delete_item(Key={"connID": cid})
-        except Exception as e:
-            log.error("Post to %s failed – %s", cid, e)
+
+def deliver(
+    intent: Dict[str, Any],
+    session_id: Optional[str],
+    conn_ids: Optional[List[str]] = None,
+) -> None:
+    """
+    Route an intent according to DELIVERY_MODE.
+
+    Args:
+        intent: Intent dictionary to deliver
+        session_id: Originating session, None for legacy upload keys
+        conn_ids: The session's connections, if already looked up
+    """
+    if DELIVERY_MODE == "broadcast":
+        broadcast(intent)
+        return
+    deliver_to_session(intent, session_id, conn_ids)
+
+
+def deliver_to_session(
+    message: Dict[str, Any],
+    session_id: Optional[str],
+    conn_ids: Optional[List[str]] = None,
+) -> None:
+    """
+    Send a message to the originating session only, whatever DELIVERY_MODE.
+
+    Args:
+        message: Intent or notice to send
+        session_id: Originating session; without one nothing is sent
+        conn_ids: The session's connections, if already looked up
+    """
+    if not session_id:
+        log.warning("No session in transcript key – intent not delivered")
+        return
+    if conn_ids is None:
+        conn_ids = session_connections(session_id)
+    if not conn_ids:
+        log.warning("No live connection for session %s", session_id)
+        return
+    post_to(conn_ids, message)
 
 
 # ── 6.  LAMBDA HANDLER ─────────────────────────────────────────────
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+def process_record(rec: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Lambda handler for processing transcription results and generating intents.
+    Turn one transcript object into an intent and deliver it.
 
     Args:
-        event: S3 event containing transcription file details
-        context: Lambda context (unused)
+        rec: ``s3`` part of one S3 event record
 
     Returns:
-        Dict with statusCode
+        Dict with the transcript key and what happened to it
     """
+    key = urllib.parse.unquote_plus(rec["object"]["key"])
+    if not (key.startswith(PREFIX) and key.endswith(".json")):
+        detail.info("Skip %s", key)
+        return {"key": key, "status": "skipped"}
+
+    idem_key = idempotency.record_key("intent", rec)
+    store = idempotency_store()
+    if not store.claim(idem_key):
+        return {"key": key, "status": "duplicate"}
+
+    correlation, uploaded_ms = keys.trace_from_key(key)
+    written_ms = metrics.epoch_ms(rec.get("eventTime"))
+    timings = metrics.Timings("intent", correlation)
+    timings.since("notify_ms", written_ms)
+    if uploaded_ms is not None and written_ms is not None:
+        timings.add("upload_to_transcript_ms", max(written_ms - uploaded_ms, 0))
+    timings.tag(uploadedAt=uploaded_ms, transcriptAt=written_ms)
+    status = "error"
     try:
-        rec = event["Records"][0]["s3"]
-        key = urllib.parse.unquote_plus(rec["object"]["key"])
-        if not (key.startswith(PREFIX) and key.endswith(".json")):
-            log.info("Skip %s", key)
-            return {"statusCode": 204}
+        with timings.active(), timings.span("total_ms"):
+            status = handle_transcript(
+                rec["bucket"]["name"], key, rec.get("transcript")
+            )
+    except Exception:
+        store.release(idem_key)
+        raise
+    finally:
+        timings.since("upload_to_intent_ms", uploaded_ms)
+        timings.tag(status=status)
+        timings.emit()
+    store.complete(idem_key, status)
+    return {"key": key, "status": status}
 
-        body = s3.get_object(Bucket=rec["bucket"]["name"], Key=key)["Body"].read()
-        text = json.loads(body)["results"]["transcripts"][0]["transcript"]
-        log.info("Transcript = «%s»", text)
 
-        intent = ask_bedrock(text)
-        log.info("Intent     = %s", intent)
+def handle_transcript(
+    bucket: str, key: str, inline: Optional[Dict[str, Any]] = None
+) -> str:
+    """Read a transcript object (unless ``inline``), resolve and deliver its intent."""
+    if inline is not None:
+        transcript = TranscriptResult(
+            str(inline.get("text", "")),
+            [float(c) for c in inline.get("confidences") or ()],
+            0,
+        )
+    else:
+        with metrics.span("transcript_read_ms"):
+            body = s3().get_object(Bucket=bucket, Key=key)["Body"]
+            try:
+                # Without confidence gating, reading stops before the word items
+                transcript = read_transcript(body, confidences=GATE_MIN_CONFIDENCE > 0)
+            finally:
+                body.close()
+    text = transcript.transcript
+    detail.info("Transcript = «%.200s»", text)
 
-        if {"action", "selector"} <= intent.keys():
-            broadcast(intent)
-        else:
+    reason = gate.check(text, transcript.confidences)
+    if reason:
+        detail.info("Gated (%s) %s", reason, gate.stats)
+        session_id = keys.session_from_key(key, PREFIX)
+        if session_id:
+            # The prompt to repeat concerns one speaker, never every client
+            retry = {"action": "retry", "message": RETRY_MESSAGE, "reason": reason}
+            with metrics.span("deliver_ms"):
+                deliver_to_session(retry, session_id)
+        return "gated"
+
+    # One Query finds both the page's catalog and where to deliver
+    session_id = keys.session_from_key(key, PREFIX)
+    conn_ids = None
+    ctx = prompt_book.default
+    if session_id and DELIVERY_MODE != "broadcast":
+        with metrics.span("session_lookup_ms"):
+            items = session_items(session_id)
+        conn_ids = [str(c["connID"]) for c in items]
+        ctx = prompt_book.for_connections(items)
+
+    with metrics.span("resolve_ms"):
+        intent = resolve_intent(text, ctx)
+    detail.info("Intent     = %s", intent)
+
+    if ctx.valid(intent):
+        status, delivered = "delivered", intent
+    elif intent.get("reason") == "degraded":
+        status, delivered = "degraded", intent
+    else:
+        status, delivered = "partial", valid_prefix(intent, ctx.valid)
+        if delivered is None:
             log.error("⚠ Bad intent: %s", intent)
-        return {"statusCode": 200}
+            return "bad_intent"
+        log.warning("Delivering leading valid steps of %s", intent)
+    with metrics.span("deliver_ms"):
+        if status == "degraded":
+            # A busy notice is for the speaker, not every client
+            deliver_to_session(delivered, session_id, conn_ids)
+        else:
+            deliver(delivered, session_id, conn_ids)
+    return status
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for processing transcription results and generating intents.
+
+    Every record of the batch is processed concurrently; a failing record
+    is reported in ``batchItemFailures`` instead of failing the others.
+    The records share one retry budget per service.
 
+    Args:
+        event: S3 event (or SQS batch of S3 events) with transcript files
+        context: Lambda context (unused)
+
+    Returns:
+        Dict with statusCode, per-record results and batchItemFailures
+    """
+    bedrock_guard.budget.reset()
+    apigw_guard.budget.reset()
+    try:
+        batch: Dict[str, Any] = process_records(event, process_record, BATCH_WORKERS)
+        log.info("Guards bedrock %s apigw %s", bedrock_guard.stats, apigw_guard.stats)
+        return batch
     except Exception as exc:
         log.error("FATAL %s\n%s", exc, traceback.format_exc())
         raise
+    finally:
+        logs.flush()
@@ -0,0 +1,200 @@
+"""
+Streaming lookup of live WebSocket connections.
+
+A single ``scan`` returns at most 1 MB of items; anything past
+``LastEvaluatedKey`` used to be dropped silently. ``iter_live_connections``
+follows pagination and splits the table into parallel-scan segments, each
+read by its own thread, yielding connection IDs as pages arrive so the
+fan-out can start before the scan finishes.
+
+``ConnectionCache`` keeps the list in warm containers between invocations.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from core.epoch import bump_epoch, read_epoch
+
+_DONE = object()
+
+
+def _scan_segment(
+    table: Any,
+    segment: int,
+    total: int,
+    now: int,
+    out: "queue.Queue[Any]",
+    stop: threading.Event,
+) -> None:
+    kwargs: Dict[str, Any] = {
+        "ProjectionExpression": "#c",
+        "ExpressionAttributeNames": {"#c": "connID", "#t": "ttl"},
+        "FilterExpression": "#t > :now",
+        "ExpressionAttributeValues": {":now": now},
+    }
+    if total > 1:
+        kwargs.update(Segment=segment, TotalSegments=total)
+    try:
+        while not stop.is_set():
+            page = table.scan(**kwargs)
+            for item in page.get("Items", []):
+                _put(out, str(item["connID"]), stop)
+            if "LastEvaluatedKey" not in page:
+                break
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    except Exception as e:
+        _put(out, e, stop)
+    finally:
+        _put(out, _DONE, stop)
+
+
+def _put(out: "queue.Queue[Any]", value: Any, stop: threading.Event) -> None:
+    # Bounded queue: block while the consumer is behind, but give up once
+    # it has gone away so worker threads never hang.
+    while not stop.is_set():
+        try:
+            out.put(value, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def iter_live_connections(
+    table: Any,
+    segments: int = 1,
+    now: Optional[int] = None,
+    buffer: int = 1000,
+) -> Iterator[str]:
+    """
+    Yield the ID of every connection whose ``ttl`` is still in the future.
+
+    Args:
+        table: DynamoDB connections table resource
+        segments: ``TotalSegments`` for a parallel scan (1 = plain scan)
+        now: Epoch seconds to compare ``ttl`` against (default: now)
+        buffer: Connection IDs held between the scanners and the consumer
+
+    Raises:
+        The first error raised by any segment scan
+    """
+    now = int(time.time()) if now is None else now
+    out: "queue.Queue[Any]" = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+    workers = [
+        threading.Thread(
+            target=_scan_segment,
+            args=(table, seg, segments, now, out, stop),
+            daemon=True,
+        )
+        for seg in range(segments)
+    ]
+    for w in workers:
+        w.start()
+    try:
+        running = len(workers)
+        while running:
+            value = out.get()
+            if value is _DONE:
+                running -= 1
+            elif isinstance(value, Exception):
+                raise value
+            else:
+                yield value
+    finally:
+        stop.set()
+
+
+class ConnectionCache:
+    """
+    Per-container cache of live connection IDs for broadcast mode.
+
+    Entries are reused while they are younger than ``ttl`` seconds and,
+    given an ``epoch_table``, the connection-set epoch is unchanged;
+    ``store_conn`` connects and disconnects and ``GoneException`` cleanups
+    bump it. Without one, a list may miss connections made in the last
+    ``ttl`` seconds. Tables with more than ``max_size`` live connections are
+    streamed, not cached.
+
+    Args:
+        table: DynamoDB connections table resource
+        ttl: Seconds a loaded list may be served (0 disables caching)
+        max_size: Largest connection list kept in memory
+        segments: Parallel scan segments used on a miss
+        epoch_table: Optional DynamoDB table holding the epoch counter
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        ttl: float = 30.0,
+        max_size: int = 10000,
+        segments: int = 1,
+        epoch_table: Any = None,
+    ) -> None:
+        self.table = table
+        self.epoch_table = epoch_table
+        self.ttl = ttl
+        self.max_size = max_size
+        self.segments = segments
+        self.hits = 0
+        self.misses = 0
+        self._ids: Optional[Dict[str, None]] = None  # insertion-ordered set
+        self._epoch = -1
+        self._loaded_at = 0.0
+
+    def connections(self) -> Iterator[str]:
+        """Yield live connection IDs, from memory when the cache is fresh."""
+        if self.ttl <= 0:
+            self.misses += 1
+            yield from iter_live_connections(self.table, self.segments)
+            return
+        epoch = self._read_epoch()
+        fresh = time.monotonic() - self._loaded_at < self.ttl
+        if self._ids is not None and fresh and epoch == self._epoch:
+            self.hits += 1
+            yield from list(self._ids)
+            return
+
+        self.misses += 1
+        self._ids = None
+        loaded: Optional[Dict[str, None]] = {}
+        for cid in iter_live_connections(self.table, self.segments):
+            if loaded is not None:
+                loaded[cid] = None
+                if len(loaded) > self.max_size:
+                    loaded = None
+            yield cid
+        # Only a fully consumed scan is a complete picture of the table
+        if loaded is not None:
+            self._ids, self._epoch = loaded, epoch
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self, conn_ids: Iterable[str]) -> None:
+        """Drop stale connections here and bump the epoch for other containers."""
+        conn_ids = list(conn_ids)
+        if not conn_ids:
+            return
+        epoch = bump_epoch(self.epoch_table) if self.epoch_table is not None else 0
+        if self._ids is not None:
+            for cid in conn_ids:
+                self._ids.pop(cid, None)
+            # Our copy already reflects this bump; only skip ahead if no
+            # other writer bumped in between.
+            if epoch == self._epoch + 1:
+                self._epoch = epoch
+
+    def _read_epoch(self) -> int:
+        epoch: int = 0
+        if self.epoch_table is not None:
+            epoch = read_epoch(self.epoch_table)
+        return epoch
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._ids) if self._ids is not None else 0,
+        }
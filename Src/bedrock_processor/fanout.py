@@ -0,0 +1,172 @@
+"""
+Concurrent delivery of one intent to many WebSocket connections.
+
+The payload is serialised once and posted from a bounded thread pool.
+Connections API Gateway reports as gone are collected and removed from
+DynamoDB with ``batch_write_item`` after the fan-out instead of one
+``delete_item`` per connection.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of one fan-out."""
+
+    delivered: int = 0
+    gone: int = 0
+    failed: int = 0
+    expired: int = 0  # queued but not finished before the overall deadline
+    truncated: bool = False  # connections left unread at the deadline
+    elapsed: float = 0.0
+    gone_ids: List[str] = field(default_factory=list, repr=False)
+    errors: Dict[str, int] = field(default_factory=dict)  # failed, by type
+
+    @property
+    def attempted(self) -> int:
+        return self.delivered + self.gone + self.failed
+
+    @property
+    def per_second(self) -> float:
+        return self.attempted / self.elapsed if self.elapsed else 0.0
+
+
+class FanOut:
+    """
+    Post one payload to many connections through a bounded worker pool.
+
+    Per-connection deadlines come from the management API client's botocore
+    ``connect_timeout``/``read_timeout``; ``deadline`` bounds the whole
+    fan-out so a slow tail cannot run past the Lambda timeout.
+
+    Args:
+        apigw: ``apigatewaymanagementapi`` client (thread-safe)
+        table: DynamoDB connections table, used for stale-connection cleanup
+        max_workers: Concurrent ``post_to_connection`` calls
+        deadline: Seconds after which pending connections are abandoned
+        guard: Optional ``core.resilience.Guard`` that rate-limits posts and
+            retries throttled ones; a post it gives up on counts as failed
+    """
+
+    def __init__(
+        self,
+        apigw: Any,
+        table: Any,
+        max_workers: int = 32,
+        deadline: float = 10.0,
+        guard: Optional[Any] = None,
+    ) -> None:
+        self.apigw = apigw
+        self.table = table
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.guard = guard
+
+    def send(self, conn_ids: Iterable[str], intent: Dict[str, Any]) -> FanOutResult:
+        """
+        Deliver ``intent`` to every connection in ``conn_ids``.
+
+        ``conn_ids`` is consumed lazily; at most ``2 * max_workers`` posts
+        are queued at any time, so it may be a generator over a table scan.
+        Reading stops at the deadline (and a generator is closed); whatever
+        was left unread is not counted, only flagged as ``truncated``.
+
+        Returns:
+            Delivered/gone/failed counts for the fan-out
+        """
+        data = json.dumps(intent).encode()
+        result = FanOutResult()
+        lock = threading.Lock()
+        started = time.monotonic()
+        stop_at = started + self.deadline
+        pending: Set[Future] = set()
+        submitted = finished = 0
+        closed = False
+
+        def post(cid: str) -> None:
+            nonlocal finished
+            error = None
+            if time.monotonic() > stop_at:
+                outcome = "expired"
+            else:
+                outcome, error = self._post(cid, data)
+            with lock:
+                if closed:  # already reported as expired
+                    return
+                finished += 1
+                setattr(result, outcome, getattr(result, outcome) + 1)
+                if outcome == "gone":
+                    result.gone_ids.append(cid)
+                elif error:
+                    result.errors[error] = result.errors.get(error, 0) + 1
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for cid in conn_ids:
+                if len(pending) >= 2 * self.max_workers:
+                    _, pending = wait(
+                        pending,
+                        timeout=max(stop_at - time.monotonic(), 0),
+                        return_when=FIRST_COMPLETED,
+                    )
+                if time.monotonic() > stop_at:
+                    with lock:
+                        result.truncated = True
+                    break
+                pending.add(pool.submit(post, cid))
+                submitted += 1
+            wait(pending, timeout=max(stop_at - time.monotonic(), 0))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            close = getattr(conn_ids, "close", None)
+            if close is not None:
+                close()  # stops a background scan
+
+        # Posts still in flight at the deadline finish in the background
+        # but are reported as expired.
+        with lock:
+            closed = True
+            snapshot = replace(
+                result, gone_ids=list(result.gone_ids), errors=dict(result.errors)
+            )
+            snapshot.expired += submitted - finished
+        snapshot.elapsed = time.monotonic() - started
+        self.remove_stale(snapshot.gone_ids)
+        return snapshot
+
+    def _post(self, cid: str, data: bytes) -> Tuple[str, Optional[str]]:
+        """Outcome of one post and, if it failed, the error type."""
+        try:
+            if self.guard is None:
+                self.apigw.post_to_connection(ConnectionId=cid, Data=data)
+            else:
+                self.guard.call(
+                    lambda: self.apigw.post_to_connection(ConnectionId=cid, Data=data)
+                )
+            return "delivered", None
+        except self.apigw.exceptions.GoneException:
+            return "gone", None
+        except Exception as e:
+            # Summarised per fan-out in ``FanOutResult.errors``
+            log.debug("Post to %s failed – %s", cid, e)
+            return "failed", type(e).__name__
+
+    def remove_stale(self, conn_ids: List[str]) -> None:
+        """Delete stale connections in ``batch_write_item`` chunks of 25."""
+        if not conn_ids:
+            return
+        try:
+            with self.table.batch_writer() as batch:
+                for cid in conn_ids:
+                    batch.delete_item(Key={"connID": cid})
+        except Exception as e:
+            log.error("Removing %d stale connections failed – %s", len(conn_ids), e)
@@ -0,0 +1,85 @@
+"""
+Cheap pre-checks that keep unusable transcripts away from the model.
+
+Silence, a lone "um" or a transcription Transcribe itself is unsure about
+rarely yields a valid intent, yet each would cost a full Bedrock call.
+``TranscriptGate`` rejects them using only the transcript text and the
+per-word confidences already in the Transcribe output; the caller then
+asks the user to repeat instead.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence
+
+DEFAULT_FILLERS: FrozenSet[str] = frozenset(
+    "um umm uh uhh uh-huh er erm ah hmm hm mm mhm huh oh eh".split()
+)
+
+_WORD = re.compile(r"[a-z0-9'-]+")
+
+# Reasons a transcript is gated, in the order they are checked
+EMPTY = "empty"
+FILLER = "filler"
+TOO_SHORT = "too_short"
+LOW_CONFIDENCE = "low_confidence"
+
+
+class TranscriptGate:
+    """
+    Decide whether a transcript is worth resolving into an intent.
+
+    Args:
+        min_words: Fewest non-filler words a usable transcript has
+        min_confidence: Lowest acceptable mean word confidence (0 = off)
+        fillers: Words that carry no command on their own
+    """
+
+    def __init__(
+        self,
+        min_words: int = 1,
+        min_confidence: float = 0.0,
+        fillers: Iterable[str] = DEFAULT_FILLERS,
+    ) -> None:
+        self.min_words = min_words
+        self.min_confidence = min_confidence
+        self.fillers = frozenset(w.lower() for w in fillers)
+        self.passed = 0
+        self.skipped: Counter[str] = Counter()
+
+    def check(
+        self, transcript: str, confidences: Optional[Sequence[float]] = None
+    ) -> Optional[str]:
+        """
+        Return the reason to skip ``transcript``, or None if it may proceed.
+
+        Args:
+            transcript: Transcribe's transcript text
+            confidences: Per-word confidences, if they were read
+        """
+        reason = self._reason(transcript, confidences)
+        if reason:
+            self.skipped[reason] += 1
+        else:
+            self.passed += 1
+        return reason
+
+    def _reason(
+        self, transcript: str, confidences: Optional[Sequence[float]]
+    ) -> Optional[str]:
+        words = _WORD.findall(transcript.lower())
+        if not words:
+            return EMPTY
+        content = [w for w in words if w not in self.fillers]
+        if not content:
+            return FILLER
+        if len(content) < self.min_words:
+            return TOO_SHORT
+        if self.min_confidence > 0 and confidences:
+            if sum(confidences) / len(confidences) < self.min_confidence:
+                return LOW_CONFIDENCE
+        return None
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"passed": self.passed, **self.skipped}
@@ -0,0 +1,129 @@
+"""
+Two-tier cache of transcript → intent results.
+
+Tier 1 is a bounded LRU in the warm Lambda container; tier 2 is an
+optional DynamoDB table (hash key ``cacheKey``, TTL attribute ``ttl``)
+shared by every container. Keys hash the model tiers and the rendered
+prompt prefix together with the normalised transcript, so changing any of
+them invalidates old entries; the prefix (passed as the namespace) also
+keeps pages with different catalogs apart.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+_PUNCT = re.compile(r"[^\w\s#-]+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    return _SPACE.sub(" ", _PUNCT.sub(" ", text.lower())).strip()
+
+
+class IntentCache:
+    """
+    In-memory LRU in front of an optional DynamoDB table.
+
+    Args:
+        scope: Text identifying what produced the intents (model tiers)
+        table: DynamoDB table resource, or None for memory only
+        max_size: Entries kept in the in-memory LRU
+        ttl: Seconds a DynamoDB entry stays valid
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        table: Any = None,
+        max_size: int = 256,
+        ttl: int = 86400,
+    ) -> None:
+        self.scope = hashlib.sha256(scope.encode()).hexdigest()
+        self.table = table
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()  # batch records resolve concurrently
+
+    def key(self, text: str, namespace: str = "") -> str:
+        """Cache key for a transcript under this cache's scope."""
+        raw = f"{self.scope}\0{namespace}\0{normalize(text)}".encode()
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, text: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """Return the cached intent for ``text`` or None."""
+        key = self.key(text, namespace)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return dict(self._lru[key])
+        intent = self._get_shared(key)
+        if intent is None:
+            self.misses += 1
+            return None
+        self.shared_hits += 1
+        self._remember(key, intent)
+        return dict(intent)
+
+    def put(self, text: str, intent: Dict[str, Any], namespace: str = "") -> None:
+        """Store a validated intent in both tiers."""
+        key = self.key(text, namespace)
+        self._remember(key, intent)
+        if self.table is None:
+            return
+        try:
+            self.table.put_item(
+                Item={
+                    "cacheKey": key,
+                    "intent": json.dumps(intent),
+                    "ttl": int(time.time()) + self.ttl,
+                }
+            )
+        except Exception as e:
+            log.warning("Intent cache write failed – %s", e)
+
+    def _get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.table is None:
+            return None
+        try:
+            item = self.table.get_item(Key={"cacheKey": key}).get("Item")
+        except Exception as e:
+            log.warning("Intent cache read failed – %s", e)
+            return None
+        # DynamoDB deletes expired items lazily, so check the TTL ourselves
+        if not item or int(item.get("ttl", 0)) <= time.time():
+            return None
+        intent: Dict[str, Any] = json.loads(item["intent"])
+        return intent
+
+    def _remember(self, key: str, intent: Dict[str, Any]) -> None:
+        with self._lock:
+            self._lru[key] = dict(intent)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._lru),
+        }
@@ -0,0 +1,157 @@
+"""
+Deterministic fast-path matcher for navigation commands.
+
+The valid selectors are a small closed set, so most commands ("go to
+booking", "contact support") can be resolved locally. Synonym phrases are
+indexed once per catalog; transcript tokens are matched against them with
+trigram similarity to tolerate transcription slips. Only matches scoring
+at or above the threshold skip Bedrock.
+"""
+
+import re
+import time
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+DEFAULT_CATALOG: Dict[str, Sequence[str]] = {
+    "#nav-home": ("home", "home page", "homepage", "main page", "start page"),
+    "#nav-book": (
+        "book",
+        "booking",
+        "book appointment",
+        "appointment",
+        "appointments",
+        "schedule",
+        "reservation",
+    ),
+    "#nav-contact": (
+        "contact",
+        "contact support",
+        "support",
+        "help",
+        "customer service",
+        "contact us",
+    ),
+}
+
+# Words that carry no navigation target
+STOPWORDS: FrozenSet[str] = frozenset(
+    "a an the to go goto open take me my i want would like please can you "
+    "show navigate click on page tab let's lets us get now".split()
+)
+
+_WORD = re.compile(r"[a-z0-9']+")
+MIN_TOKEN_SIMILARITY = 0.5
+AMBIGUITY_MARGIN = 0.15
+
+
+class Match(NamedTuple):
+    selector: str
+    score: float
+    phrase: str
+
+
+def _trigrams(token: str) -> FrozenSet[str]:
+    padded = f"${token}$"
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _WORD.findall(text.lower()) if t not in STOPWORDS]
+
+
+class FastMatcher:
+    """
+    Score a transcript against a selector catalog without calling a model.
+
+    Args:
+        catalog: Selector → synonym phrases
+        threshold: Minimum confidence (0–1) for a match to be returned
+    """
+
+    def __init__(
+        self,
+        catalog: Optional[Dict[str, Sequence[str]]] = None,
+        threshold: float = 0.8,
+    ) -> None:
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.seconds = 0.0
+        # (selector, phrase, phrase tokens) plus trigram → vocabulary index
+        self._phrases: List[Tuple[str, str, Tuple[str, ...]]] = []
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._by_gram: Dict[str, Set[str]] = {}
+        for selector, phrases in (catalog or DEFAULT_CATALOG).items():
+            for phrase in phrases:
+                tokens = tuple(_tokens(phrase))
+                if not tokens:
+                    continue
+                self._phrases.append((selector, phrase, tokens))
+                for token in tokens:
+                    if token not in self._grams:
+                        self._grams[token] = _trigrams(token)
+                        for g in self._grams[token]:
+                            self._by_gram.setdefault(g, set()).add(token)
+
+    def _similar(self, token: str) -> Dict[str, float]:
+        """Vocabulary tokens similar to ``token`` with their similarity."""
+        if token in self._grams:
+            return {token: 1.0}
+        grams = _trigrams(token)
+        candidates = set().union(*(self._by_gram.get(g, ()) for g in grams))
+        out = {}
+        for cand in candidates:
+            other = self._grams[cand]
+            sim = len(grams & other) / len(grams | other)
+            if sim >= MIN_TOKEN_SIMILARITY:
+                out[cand] = sim
+        return out
+
+    def score(self, text: str) -> Optional[Match]:
+        """Best match for ``text`` regardless of threshold."""
+        tokens = _tokens(text)
+        if not tokens:
+            return None
+        sims = [self._similar(t) for t in tokens]
+        best: Dict[str, Match] = {}
+        for selector, phrase, ptokens in self._phrases:
+            # How well the phrase is found in the transcript …
+            found = [max((s.get(p, 0.0) for s in sims), default=0.0) for p in ptokens]
+            recall = sum(found) / len(ptokens)
+            if recall == 0:
+                continue
+            # … and how much of the transcript the phrase explains
+            used = sum(1 for s in sims if any(p in s for p in ptokens))
+            coverage = used / len(tokens)
+            score = recall * (0.5 + 0.5 * coverage)
+            if selector not in best or score > best[selector].score:
+                best[selector] = Match(selector, score, phrase)
+        if not best:
+            return None
+        ranked = sorted(best.values(), key=lambda m: m.score, reverse=True)
+        top = ranked[0]
+        if len(ranked) > 1 and ranked[1].score > top.score - AMBIGUITY_MARGIN:
+            # Two targets fit about equally well: leave it to the model
+            top = top._replace(score=top.score / 2)
+        return top
+
+    def match(self, text: str) -> Optional[Match]:
+        """Return a confident match or None, updating hit/miss counters."""
+        started = time.perf_counter()
+        found = self.score(text)
+        self.seconds += time.perf_counter() - started
+        if found is not None and found.score >= self.threshold:
+            self.hits += 1
+            return found
+        self.misses += 1
+        return None
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "avg_ms": round(1000 * self.seconds / total, 3) if total else 0.0,
+        }
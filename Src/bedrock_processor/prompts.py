@@ -0,0 +1,131 @@
+"""
+Prompts and fast-path matchers built from selector catalogs.
+
+Each page registers only its own selectors (see ``core.catalog``), so the
+prompt lists just those instead of every selector of the app. Building a
+prompt and indexing a matcher is done once per catalog version and kept in
+a small LRU; a warm container answering the same page reuses both.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple
+
+from core.catalog import Catalog, catalog_version, from_item
+from matcher import DEFAULT_CATALOG as DEFAULT_PHRASES
+from matcher import FastMatcher
+from sequence import BATCH, steps
+
+# The selectors of the bundled demo page, used when a client registered none
+DEFAULT_SELECTORS: Dict[str, List[str]] = {
+    "#nav-home": ["Home tab", *DEFAULT_PHRASES["#nav-home"]],
+    "#nav-book": ["Book Appointment tab", *DEFAULT_PHRASES["#nav-book"]],
+    "#nav-contact": ["Contact Support tab", *DEFAULT_PHRASES["#nav-contact"]],
+}
+DEFAULT = Catalog(catalog_version(DEFAULT_SELECTORS), DEFAULT_SELECTORS)
+
+PROMPT_HEADER = "You are an accessibility assistant.\nValid UI selectors:\n"
+PROMPT_MULTI = (
+    "If the user chains several commands, return them in order as "
+    '{"intents": [<one JSON object per command>]}.\n\n'
+)
+
+
+class CatalogContext(NamedTuple):
+    version: str
+    prompt_prefix: str
+    selectors: FrozenSet[str]
+    matcher: FastMatcher
+
+    def render(self, cmd: str) -> str:
+        """The full prompt for one command."""
+        return f'{self.prompt_prefix}User command: "{cmd}"'
+
+    def valid(self, intent: Dict[str, Any]) -> bool:
+        """
+        True if the intent targets one of this catalog's selectors (every
+        step of a batch does).
+        """
+        if isinstance(intent, dict) and intent.get("action") == BATCH:
+            batch = steps(intent)
+            return bool(batch) and all(
+                s.get("action") != BATCH and self.valid(s) for s in batch
+            )
+        return (
+            isinstance(intent, dict)
+            and "action" in intent
+            and intent.get("selector") in self.selectors
+        )
+
+
+def build_prompt(selectors: Dict[str, List[str]]) -> str:
+    """Prompt text up to the user command, listing each selector once."""
+    width = max(len(s) for s in selectors)
+    lines = "".join(
+        f"  {sel.ljust(width)}  – {phrases[0]}\n" for sel, phrases in selectors.items()
+    )
+    example = json.dumps({"action": "click", "selector": next(iter(selectors))})
+    return f"{PROMPT_HEADER}{lines}Return ONLY JSON like {example}.\n{PROMPT_MULTI}"
+
+
+class PromptBook:
+    """
+    Catalog version → prompt, selector set and matcher, bounded LRU.
+
+    Args:
+        threshold: Fast-path threshold of the matchers built
+        max_size: Catalog versions kept
+    """
+
+    def __init__(self, threshold: float = 0.8, max_size: int = 64) -> None:
+        self.threshold = threshold
+        self.max_size = max_size
+        self.builds = 0
+        self.hits = 0
+        self._lru: "OrderedDict[str, CatalogContext]" = OrderedDict()
+        self._lock = threading.Lock()  # batch records resolve concurrently
+        self.default = self.get(DEFAULT)
+
+    def get(self, catalog: Catalog) -> CatalogContext:
+        """Context for ``catalog``, built on first sight of its version."""
+        with self._lock:
+            ctx = self._lru.get(catalog.version)
+            if ctx is not None:
+                self._lru.move_to_end(catalog.version)
+                self.hits += 1
+                return ctx
+        ctx = CatalogContext(
+            catalog.version,
+            build_prompt(catalog.selectors),
+            frozenset(catalog.selectors),
+            FastMatcher(catalog.selectors, self.threshold),
+        )
+        with self._lock:
+            self.builds += 1
+            self._lru[catalog.version] = ctx
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+        return ctx
+
+    def for_connections(self, items: Iterable[Dict[str, Any]]) -> CatalogContext:
+        """
+        Context of the newest registered catalog among a session's connections.
+
+        Falls back to the default catalog when none registered one (or a
+        stored catalog cannot be read).
+        """
+        newest = None
+        for item in items:
+            try:
+                catalog = from_item(item)
+            except ValueError:
+                continue
+            stamp = int(item.get("connected_at", 0))
+            if catalog is not None and (newest is None or stamp > newest[0]):
+                newest = (stamp, catalog)
+        return self.get(newest[1]) if newest else self.default
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"builds": self.builds, "hits": self.hits, "size": len(self._lru)}
@@ -0,0 +1,155 @@
+"""
+Model tiering for intent resolution.
+
+Most commands are short and name one of a handful of selectors; a small
+model answers those as well as a large one, in a fraction of the time.
+``ModelRouter`` picks the starting tier from cheap features of the command
+(word count, the fast-path matcher's best score, catalog size) and only
+moves up a tier when the answer is unusable: not JSON, or a selector
+outside the catalog. Per-tier latency, escalations and token usage are
+kept so the thresholds can be tuned from the logs.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+
+class TierStats:
+    """Calls, failures, latency window and token counts of one model."""
+
+    def __init__(self, window: int = 512) -> None:
+        self.calls = 0
+        self.invalid = 0
+        self.not_json = 0
+        self.seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0
+        return {
+            "calls": self.calls,
+            "invalid": self.invalid,
+            "not_json": self.not_json,
+            "avg_ms": round(1000 * self.seconds / self.calls, 1) if self.calls else 0,
+            "p95_ms": round(1000 * p95, 1),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class ModelRouter:
+    """
+    Choose a model tier per command and escalate on unusable answers.
+
+    Args:
+        tiers: Model IDs from smallest to largest
+        max_words: Longest command still considered simple
+        max_selectors: Largest catalog still considered simple
+        hint_score: Fast-path score at which a command counts as simple
+            whatever its length (it nearly matched locally)
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[str],
+        max_words: int = 8,
+        max_selectors: int = 20,
+        hint_score: float = 0.5,
+    ) -> None:
+        if not tiers:
+            raise ValueError("At least one model tier is required")
+        self.tiers = list(tiers)
+        self.max_words = max_words
+        self.max_selectors = max_selectors
+        self.hint_score = hint_score
+        self.escalations = 0
+        self._stats = {model: TierStats() for model in self.tiers}
+        self._lock = threading.Lock()  # batch records resolve concurrently
+
+    def plan(self, cmd: str, fast_score: float, selectors: int) -> List[str]:
+        """Models to try for ``cmd``, in order."""
+        if len(self.tiers) == 1:
+            return self.tiers
+        simple = fast_score >= self.hint_score or (
+            len(cmd.split()) <= self.max_words and selectors <= self.max_selectors
+        )
+        return self.tiers if simple else self.tiers[-1:]
+
+    def route(
+        self,
+        cmd: str,
+        fast_score: float,
+        selectors: int,
+        ask: Callable[[str], Dict[str, Any]],
+        valid: Callable[[Dict[str, Any]], bool],
+    ) -> Dict[str, Any]:
+        """
+        Resolve ``cmd`` with the cheapest tier that gives a valid answer.
+
+        Args:
+            cmd: Voice command
+            fast_score: Best fast-path score for the command (0 if none)
+            selectors: Number of selectors in the page's catalog
+            ask: Calls one model, raising ValueError on non-JSON output
+            valid: Whether an answer is usable
+
+        Returns:
+            The first valid intent, else the last tier's answer
+
+        Raises:
+            ValueError: If the last tier tried returned no JSON either
+        """
+        intent: Optional[Dict[str, Any]] = None
+        error: Optional[ValueError] = None
+        for i, model in enumerate(self.plan(cmd, fast_score, selectors)):
+            if i:
+                with self._lock:
+                    self.escalations += 1
+            started = time.perf_counter()
+            try:
+                intent, error = ask(model), None
+            except ValueError as e:
+                intent, error = None, e
+            self._record(model, time.perf_counter() - started, intent, valid)
+            if intent is not None and valid(intent):
+                return intent
+        if error is not None:
+            raise error
+        return intent or {}
+
+    def _record(
+        self,
+        model: str,
+        seconds: float,
+        intent: Optional[Dict[str, Any]],
+        valid: Callable[[Dict[str, Any]], bool],
+    ) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(model, TierStats())
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.recent.append(seconds)
+            if intent is None:
+                stats.not_json += 1
+            elif not valid(intent):
+                stats.invalid += 1
+
+    def record_usage(self, model: str, usage: Optional[Dict[str, Any]]) -> None:
+        """Add the token counts a model reported for one call."""
+        if not usage:
+            return
+        with self._lock:
+            stats = self._stats.setdefault(model, TierStats())
+            stats.input_tokens += int(usage.get("input_tokens", 0))
+            stats.output_tokens += int(usage.get("output_tokens", 0))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tiers = {model: s.snapshot() for model, s in self._stats.items()}
+        return {"escalations": self.escalations, "tiers": tiers}
@@ -0,0 +1,91 @@
+"""
+Multi-command utterances compiled into one ordered batch of intents.
+
+"Open booking then go to contact" used to come back as a single intent (or
+a bad one) and the user had to record again for the second step. The
+prompt now lets the model answer ``{"intents": [...]}`` for chained
+commands; ``from_answer`` turns that into one ``batch`` message whose steps
+carry their position (``seq``), so the client runs them in order from a
+single WebSocket message. Clauses joined by "then", "after that" and the
+like are also split locally so that a chain of confident fast-path matches
+never reaches the model at all.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+BATCH = "batch"
+
+# Words that chain commands; a plain "and" is left alone ("salt and pepper")
+_CHAIN = re.compile(
+    r"[,.]?\s*\b(?:and then|and after that|after that|afterwards|then)\b|;",
+    re.IGNORECASE,
+)
+
+
+def split_commands(text: str, max_parts: int = 5) -> List[str]:
+    """
+    Split an utterance into clauses at chaining words.
+
+    Returns the whole text as a single clause when it does not chain, or
+    chains more than ``max_parts`` clauses.
+    """
+    parts = [p.strip(" ,.") for p in _CHAIN.split(text)]
+    parts = [p for p in parts if p]
+    if not 1 < len(parts) <= max_parts:
+        return [text]
+    return parts
+
+
+def as_batch(intents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A single intent unchanged, several as one ordered ``batch``."""
+    if len(intents) == 1:
+        return intents[0]
+    steps = [{**intent, "seq": i} for i, intent in enumerate(intents)]
+    return {"action": BATCH, "count": len(steps), "intents": steps}
+
+
+def from_answer(answer: Any, max_intents: int = 5) -> Dict[str, Any]:
+    """
+    Normalise a model answer: ``{"intents": [...]}`` becomes a batch.
+
+    Steps beyond ``max_intents`` are dropped; an answer that is already a
+    single intent is returned as is.
+
+    Raises:
+        ValueError: If the answer is JSON but not an object
+    """
+    if not isinstance(answer, dict):
+        raise ValueError(f"Expected a JSON object, got {type(answer).__name__}")
+    intents = answer.get("intents")
+    if "action" in answer or not isinstance(intents, list) or not intents:
+        return answer
+    steps = [i for i in intents[:max_intents] if isinstance(i, dict)]
+    return as_batch(steps) if steps else answer
+
+
+def steps(intent: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The intents a message carries, in order."""
+    if intent.get("action") == BATCH and isinstance(intent.get("intents"), list):
+        batch: List[Dict[str, Any]] = intent["intents"]
+        return batch
+    return [intent]
+
+
+def valid_prefix(
+    intent: Dict[str, Any], valid: Callable[[Dict[str, Any]], bool]
+) -> Optional[Dict[str, Any]]:
+    """
+    The leading steps of a batch that are valid, as a message.
+
+    Later steps depend on earlier ones having run, so everything after the
+    first invalid step is dropped. Returns None if the first is invalid.
+    """
+    if intent.get("action") != BATCH:
+        return None
+    good: List[Dict[str, Any]] = []
+    for step in steps(intent):
+        if not valid(step):
+            break
+        good.append({k: v for k, v in step.items() if k != "seq"})
+    return as_batch(good) if good else None
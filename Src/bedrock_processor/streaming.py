@@ -0,0 +1,110 @@
+"""
+Early-terminating reader for ``invoke_model_with_response_stream``.
+
+The model is asked for a single JSON object. ``IncrementalJSONParser``
+tracks brace depth and string state across text deltas and returns as soon
+as the first top-level object closes; the rest of the stream (closing
+chatter, trailing tokens) is never waited for.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+class IncrementalJSONParser:
+    """Find the first complete top-level JSON object in streamed text."""
+
+    def __init__(self) -> None:
+        self._buf: list[str] = []
+        self._pos = 0  # characters of the buffer already scanned
+        self._start = -1  # index of the opening brace, -1 before it
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Add a fragment; return the object once it is complete.
+
+        Braces inside strings are ignored. Text before the first ``{`` is
+        skipped, and a brace-balanced span that is not valid JSON is dropped
+        so scanning can continue with the next candidate.
+        """
+        self._buf.append(text)
+        data = "".join(self._buf)
+        self._buf = [data]
+        i = self._pos
+        while i < len(data):
+            ch = data[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._start >= 0:
+                self._in_string = True
+            elif ch == "{":
+                if self._start < 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._start >= 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = data[self._start : i + 1]
+                    self._start = -1
+                    try:
+                        obj = json.loads(candidate)
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        self._pos = i + 1
+                        return obj
+            i += 1
+        self._pos = i
+        return None
+
+
+def iter_text_deltas(
+    events: Iterable[Dict[str, Any]], usage: Optional[Dict[str, int]] = None
+) -> Iterator[str]:
+    """
+    Yield the text deltas of an Anthropic messages response stream.
+
+    If ``usage`` is given, token counts reported by the stream are copied
+    into it as they arrive (output tokens only reach it if the stream is
+    read to the end).
+    """
+    for event in events:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        payload = json.loads(chunk["bytes"])
+        if usage is not None:
+            reported = payload.get("usage") or payload.get("message", {}).get("usage")
+            if reported:
+                usage.update(reported)
+        if payload.get("type") == "content_block_delta":
+            delta = payload.get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
+        elif payload.get("type") == "message_stop":
+            return
+
+
+def first_json_object(deltas: Iterable[str]) -> Dict[str, Any]:
+    """
+    Consume text deltas until the first JSON object is complete.
+
+    Raises:
+        ValueError: If the stream ends before an object is complete
+    """
+    parser = IncrementalJSONParser()
+    seen = []
+    for text in deltas:
+        seen.append(text)
+        obj = parser.feed(text)
+        if obj is not None:
+            return obj
+    raise ValueError(f"No JSON object in model output: {''.join(seen)!r}")
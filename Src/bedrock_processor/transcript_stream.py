@@ -0,0 +1,247 @@
+"""
+Memory-bounded reader for Amazon Transcribe output documents.
+
+A Transcribe result carries the transcript string we need plus one
+``items`` entry (with alternatives) per word, which for long utterances is
+many times larger than the transcript. ``read_transcript`` walks the S3
+body stream instead of loading it: subtrees that cannot hold a wanted value
+are skipped with a bracket-counting scan, the transcript string is decoded
+on its own, and items are decoded one at a time when confidences are
+requested. Transcribe writes ``results.transcripts`` before
+``results.items``, so a transcript-only read stops after the first few
+kilobytes.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+TRANSCRIPT_PATH = ("results", "transcripts", 0, "transcript")
+ITEMS_PATH = ("results", "items", "*")
+
+_NON_WS = re.compile(r"[^ \t\n\r]")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_SCALAR = re.compile(r"[^,\]}\s]+")
+_STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+_DECODER = json.JSONDecoder()
+
+Path = Tuple[Any, ...]
+
+
+class TranscriptResult(NamedTuple):
+    transcript: str
+    confidences: Optional[List[float]]  # pronunciation items only
+    bytes_read: int
+
+
+class _Scanner:
+    """Sliding text window over a byte stream; consumed text is dropped."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def more(self) -> bool:
+        """Append the next chunk to the window; False at end of stream."""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self._decoder.decode(b"", final=True)
+        else:
+            self.bytes_read += len(chunk)
+            text = self._decoder.decode(chunk)
+        self.buf = self.buf[self.pos :] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at the end)."""
+        while True:
+            m = _NON_WS.search(self.buf, self.pos)
+            if m:
+                self.pos = m.start()
+                return m.group()
+            self.pos = len(self.buf)
+            if not self.more():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        if self.peek() != ch:
+            raise ValueError(f"Expected {ch!r} at offset {self.bytes_read}")
+        self.pos += 1
+
+    def token(self, pattern: "re.Pattern[str]") -> str:
+        """Consume one string or scalar token, reading more until it is whole."""
+        self.peek()
+        while True:
+            m = pattern.match(self.buf, self.pos)
+            # A scalar running into the end of the window may continue
+            if m and (m.end() < len(self.buf) or self.eof):
+                self.pos = m.end()
+                return m.group()
+            if not self.more():
+                raise ValueError("Truncated JSON document")
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.more():
+                    continue
+                raise
+            if end < len(self.buf) or self.eof or self.buf[end - 1] in '"}]':
+                self.pos = end
+                return obj
+            self.more()
+
+    def skip(self) -> None:
+        """Step over the next value without decoding it."""
+        ch = self.peek()
+        if ch == '"':
+            self.token(_STRING)
+            return
+        if ch not in "{[":
+            self.token(_SCALAR)
+            return
+        depth = 0
+        while True:
+            for m in _STRUCTURE.finditer(self.buf, self.pos):
+                if self.buf.find('"', self.pos, m.start()) != -1:
+                    break  # string cut off by the end of the window
+                tok = m.group()
+                if tok in "{[":
+                    depth += 1
+                elif tok in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = m.end()
+                        return
+                # Everything scanned so far can be dropped from the window
+                self.pos = m.end()
+            if not self.more():
+                raise ValueError("Truncated JSON document")
+
+
+def iter_values(
+    chunks: Iterable[bytes], wanted: Iterable[Path]
+) -> Iterator[Tuple[Path, Any]]:
+    """
+    Yield ``(path, value)`` for values of a JSON stream at the wanted paths.
+
+    Paths are keys and array indexes from the document root; ``"*"`` matches
+    any array index, e.g. ``("results", "items", "*")`` yields each item.
+    Only what the caller consumes is read: stop iterating to stop reading.
+
+    Args:
+        chunks: Byte chunks of one JSON document
+        wanted: Paths of the values to decode
+
+    Yields:
+        Path and decoded value, in document order
+    """
+    yield from _walk(_Scanner(chunks), (), [tuple(p) for p in wanted])
+
+
+def _matches(path: Path, target: Path) -> bool:
+    return len(path) == len(target) and all(
+        t == p or (t == "*" and isinstance(p, int)) for p, t in zip(path, target)
+    )
+
+
+def _walk(
+    scanner: _Scanner, path: Path, targets: List[Path]
+) -> Iterator[Tuple[Path, Any]]:
+    if any(_matches(path, t) for t in targets):
+        yield path, scanner.value()
+        return
+    if not any(_matches(path, t[: len(path)]) for t in targets):
+        scanner.skip()
+        return
+    ch = scanner.peek()
+    if ch == "{":
+        scanner.pos += 1
+        if scanner.peek() == "}":
+            scanner.pos += 1
+            return
+        while True:
+            key = json.loads(scanner.token(_STRING))
+            scanner.expect(":")
+            yield from _walk(scanner, path + (key,), targets)
+            if scanner.peek() == "}":
+                scanner.pos += 1
+                return
+            scanner.expect(",")
+    elif ch == "[":
+        scanner.pos += 1
+        if scanner.peek() == "]":
+            scanner.pos += 1
+            return
+        index = 0
+        while True:
+            yield from _walk(scanner, path + (index,), targets)
+            index += 1
+            if scanner.peek() == "]":
+                scanner.pos += 1
+                return
+            scanner.expect(",")
+    else:
+        scanner.skip()
+
+
+def body_chunks(body: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Chunks of an S3 ``StreamingBody`` (or any binary file object)."""
+    if hasattr(body, "iter_chunks"):
+        yield from body.iter_chunks(chunk_size)
+        return
+    while True:
+        chunk = body.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_transcript(body: Any, confidences: bool = False) -> TranscriptResult:
+    """
+    Pull the transcript (and optionally word confidences) from a result body.
+
+    Args:
+        body: Streaming body of a Transcribe output object
+        confidences: Also collect ``alternatives[0].confidence`` of every
+            pronunciation item; otherwise reading stops at the transcript
+
+    Returns:
+        TranscriptResult with the transcript, confidences (or None) and the
+        number of bytes read from the body
+
+    Raises:
+        ValueError: If the document has no transcript or is malformed
+    """
+    wanted = [TRANSCRIPT_PATH, ITEMS_PATH] if confidences else [TRANSCRIPT_PATH]
+    transcript: Optional[str] = None
+    scores: Optional[List[float]] = [] if confidences else None
+    scanner = _Scanner(body_chunks(body))
+    for path, value in _walk(scanner, (), wanted):
+        if path == TRANSCRIPT_PATH:
+            transcript = value
+            if scores is None:
+                break  # items come after the transcript; leave them unread
+        elif scores is not None and isinstance(value, dict):
+            if value.get("type", "pronunciation") != "pronunciation":
+                continue
+            alternatives = value.get("alternatives") or [{}]
+            scores.append(float(alternatives[0].get("confidence", 0.0)))
+    if not isinstance(transcript, str):
+        raise ValueError("Transcribe output has no results.transcripts[0]")
+    return TranscriptResult(transcript, scores, scanner.bytes_read)
@@ -0,0 +1 @@
+# Shared VoiceNav-AI Lambda core
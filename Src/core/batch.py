@@ -0,0 +1,91 @@
+"""
+Per-record processing of S3 notification batches.
+
+Handlers receive either S3 events directly or S3 events wrapped in SQS
+messages. Every S3 record is processed on a bounded thread pool; a failing
+record is logged and reported instead of failing the whole batch, and SQS
+message IDs of failed records are returned as ``batchItemFailures``
+(partial batch response).
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def s3_records(event: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield ``(item_id, s3_record)`` pairs from a direct or SQS-wrapped event.
+
+    ``item_id`` is the SQS message ID when there is one, else the object key.
+    The notification's ``eventTime`` is copied into the ``s3`` record, as is
+    the ``transcript`` of records the transcribe stage hands over directly.
+    """
+    for rec in event.get("Records", []):
+        if "s3" in rec:
+            yield rec["s3"]["object"]["key"], _flatten(rec)
+        elif "body" in rec:
+            body = json.loads(rec["body"])
+            # s3:TestEvent messages carry no Records
+            for inner in body.get("Records", []):
+                if "s3" in inner:
+                    yield rec["messageId"], _flatten(inner)
+
+
+def _flatten(rec: Dict[str, Any]) -> Dict[str, Any]:
+    s3: Dict[str, Any] = rec["s3"]
+    extra: Dict[str, Any] = {k: rec[k] for k in ("eventTime", "transcript") if k in rec}
+    return {**s3, **extra} if extra else s3
+
+
+def process_records(
+    event: Dict[str, Any],
+    handle: Callable[[Dict[str, Any]], Dict[str, Any]],
+    max_workers: int = 8,
+) -> Dict[str, Any]:
+    """
+    Run ``handle`` on every S3 record of ``event``.
+
+    Args:
+        event: Lambda event (S3 notification or SQS batch)
+        handle: Called with one ``s3`` record, returns a JSON-able result
+        max_workers: Records processed concurrently
+
+    Returns:
+        Dict with ``statusCode`` (200 all ok, 207 partial, 500 all failed),
+        per-record ``results`` and ``batchItemFailures``
+    """
+    records = list(s3_records(event))
+
+    def run(item: Tuple[str, Dict[str, Any]]) -> Dict[str, Any]:
+        item_id, record = item
+        try:
+            return {"itemIdentifier": item_id, "ok": True, **handle(record)}
+        except Exception as e:
+            log.exception("Record %s failed", item_id)
+            return {"itemIdentifier": item_id, "ok": False, "error": str(e)}
+
+    if len(records) <= 1 or max_workers <= 1:
+        results = [run(r) for r in records]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(records))) as pool:
+            results = list(pool.map(run, records))
+
+    failed: List[str] = []
+    for r in results:
+        if not r["ok"] and r["itemIdentifier"] not in failed:
+            failed.append(r["itemIdentifier"])
+    if not failed:
+        status = 200
+    elif len(failed) == len({r["itemIdentifier"] for r in results}):
+        status = 500
+    else:
+        status = 207
+    return {
+        "statusCode": status,
+        "results": results,
+        "batchItemFailures": [{"itemIdentifier": i} for i in failed],
+    }
@@ -0,0 +1,73 @@
+"""
+Per-page selector catalogs registered by WebSocket clients.
+
+A client sends ``{"action": "register", "selectors": {...}}`` after it
+connects; ``store_conn`` validates the catalog and stores it on the
+connection item together with ``catalogVersion``, a digest of its
+canonical form. The Bedrock processor builds its prompt and fast-path
+matcher from the catalog of the session it answers, keyed by that version,
+so an unchanged page never rebuilds them.
+
+Each selector maps to a description, or to a list whose first entry is the
+description shown to the model and whose further entries are extra
+phrases for the local matcher::
+
+    {"#nav-book": ["Book Appointment tab", "booking", "schedule"]}
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+MAX_SELECTORS = 100
+MAX_SELECTOR_LEN = 200
+MAX_PHRASES = 10
+MAX_PHRASE_LEN = 100
+
+
+class Catalog(NamedTuple):
+    version: str
+    selectors: Dict[str, List[str]]  # selector → [description, *phrases]
+
+
+def normalize_catalog(raw: Any) -> Dict[str, List[str]]:
+    """
+    Validate a client-supplied catalog into ``selector → [description, ...]``.
+
+    Raises:
+        ValueError: If the catalog is empty, too large or malformed
+    """
+    if not isinstance(raw, dict) or not raw:
+        raise ValueError("selectors must be a non-empty object")
+    if len(raw) > MAX_SELECTORS:
+        raise ValueError(f"at most {MAX_SELECTORS} selectors")
+    out: Dict[str, List[str]] = {}
+    for selector, value in raw.items():
+        if not isinstance(selector, str) or not 0 < len(selector) <= MAX_SELECTOR_LEN:
+            raise ValueError(f"bad selector {selector!r}")
+        phrases = [value] if isinstance(value, str) else value
+        if (
+            not isinstance(phrases, list)
+            or not 0 < len(phrases) <= MAX_PHRASES
+            or not all(
+                isinstance(p, str) and 0 < len(p.strip()) <= MAX_PHRASE_LEN
+                for p in phrases
+            )
+        ):
+            raise ValueError(f"bad description for {selector!r}")
+        out[selector] = [" ".join(p.split()) for p in phrases]
+    return out
+
+
+def catalog_version(selectors: Dict[str, List[str]]) -> str:
+    """Digest of a normalised catalog; equal catalogs share a version."""
+    canonical = json.dumps(selectors, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def from_item(item: Dict[str, Any]) -> Optional[Catalog]:
+    """The catalog stored on a connection item, if the client registered one."""
+    version, raw = item.get("catalogVersion"), item.get("selectors")
+    if not version or not raw:
+        return None
+    return Catalog(str(version), json.loads(raw))
@@ -0,0 +1,155 @@
+"""
+Lazily created, per-container AWS clients.
+
+Clients are built on first use and cached for the life of the container,
+so module import stays cheap and every invocation reuses the same
+connection pool. All clients share a tuned botocore ``Config``; the
+defaults can be changed through environment variables:
+
+- ``AWS_MAX_POOL_CONNECTIONS`` (default 50)
+- ``AWS_CONNECT_TIMEOUT`` / ``AWS_READ_TIMEOUT`` in seconds (2 / 10)
+- ``AWS_MAX_ATTEMPTS`` for adaptive-mode retries (3)
+
+``override`` swaps in a stand-in for a service (tests, local worker) and
+``prime`` warms clients and TLS connections during the Lambda init phase.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_clients: Dict[Tuple[str, ...], Any] = {}
+_overrides: Dict[str, Any] = {}
+
+
+def region() -> str:
+    """Region from ``REGION`` or the standard AWS variables."""
+    return (
+        os.environ.get("REGION")
+        or os.environ.get("AWS_REGION")
+        or os.environ.get("AWS_DEFAULT_REGION")
+        or "us-east-1"
+    )
+
+
+def default_config(**overrides: Any) -> Config:
+    """The shared botocore ``Config``, merged with per-client overrides."""
+    base = Config(
+        max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "50")),
+        connect_timeout=float(os.environ.get("AWS_CONNECT_TIMEOUT", "2")),
+        read_timeout=float(os.environ.get("AWS_READ_TIMEOUT", "10")),
+        tcp_keepalive=True,
+        retries={
+            "mode": "adaptive",
+            "max_attempts": int(os.environ.get("AWS_MAX_ATTEMPTS", "3")),
+        },
+    )
+    return base.merge(Config(**overrides)) if overrides else base
+
+
+def _get_session() -> boto3.session.Session:
+    # boto3's default session is not safe to create clients from
+    # concurrently; callers hold _lock.
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def client(service: str, endpoint_url: Optional[str] = None, **config: Any) -> Any:
+    """
+    Return the cached client for ``service``, creating it on first use.
+
+    Args:
+        service: boto3 service name
+        endpoint_url: Custom endpoint (e.g. the WebSocket management URL)
+        **config: botocore ``Config`` fields overriding the shared defaults
+    """
+    if service in _overrides:
+        return _overrides[service]
+    key = (service, endpoint_url or "", repr(sorted(config.items())))
+    found = _clients.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _get_session().client(
+                service,
+                region_name=region(),
+                endpoint_url=endpoint_url or None,
+                config=default_config(**config),
+            )
+        return _clients[key]
+
+
+def table(name: str) -> Any:
+    """Return a cached DynamoDB ``Table`` resource."""
+    if f"dynamodb:{name}" in _overrides:
+        return _overrides[f"dynamodb:{name}"]
+    key = ("dynamodb-table", name)
+    found = _clients.get(key)
+    if found is not None:
+        return found
+    with _lock:
+        if key not in _clients:
+            resource = _get_session().resource(
+                "dynamodb", region_name=region(), config=default_config()
+            )
+            _clients[key] = resource.Table(name)
+        return _clients[key]
+
+
+def override(service: str, obj: Any) -> None:
+    """
+    Serve ``obj`` instead of a real client.
+
+    ``service`` is a boto3 service name, or ``dynamodb:<table>`` for tables.
+    """
+    _overrides[service] = obj
+
+
+def reset() -> None:
+    """Forget cached clients and overrides."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _overrides.clear()
+        _session = None
+
+
+def prime(warmers: Iterable[Callable[[], Any]], timeout: float = 2.0) -> None:
+    """
+    Run cheap calls in parallel so clients exist and TLS is open.
+
+    Meant for the Lambda init phase. Each warmer typically creates a client
+    and sends one lightweight request; any error (including access denied)
+    is ignored because the connection is pooled either way.
+    """
+
+    def run(warm: Callable[[], Any]) -> None:
+        try:
+            warm()
+        except Exception as e:
+            log.debug("Priming call failed – %s", e)
+
+    warmers = list(warmers)
+    if not warmers:
+        return
+    pool = ThreadPoolExecutor(max_workers=len(warmers))
+    try:
+        futures = [pool.submit(run, w) for w in warmers]
+        for f in futures:
+            f.result(timeout=timeout)
+    except Exception as e:
+        log.debug("Priming timed out – %s", e)
+    finally:
+        pool.shutdown(wait=False)
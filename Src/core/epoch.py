@@ -0,0 +1,36 @@
+"""
+Version counter for the set of live WebSocket connections.
+
+Broadcast mode with ``CONN_CACHE_TTL`` keeps connection lists in warm
+Bedrock containers. ``store_conn`` bumps a counter in the optional
+``CONN_EPOCH_TABLE`` (hash key ``epochKey``) on every connect and
+disconnect, as do ``GoneException`` cleanups; containers compare it with
+the epoch their list was loaded at, which costs one ``get_item`` instead of
+a full scan. The counter lives outside the connections table so scans and
+session queries never see it, and deployments without the table write
+nothing.
+"""
+
+from typing import Any
+
+EPOCH_KEY = "connections"
+
+
+def read_epoch(table: Any) -> int:
+    """Return the current connection-set epoch (0 if never bumped)."""
+    item = table.get_item(
+        Key={"epochKey": EPOCH_KEY},
+        ProjectionExpression="epoch",
+    ).get("Item")
+    return int(item["epoch"]) if item else 0
+
+
+def bump_epoch(table: Any) -> int:
+    """Atomically increment the epoch and return the new value."""
+    rsp = table.update_item(
+        Key={"epochKey": EPOCH_KEY},
+        UpdateExpression="ADD epoch :one",
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="UPDATED_NEW",
+    )
+    return int(rsp["Attributes"]["epoch"])
@@ -0,0 +1,106 @@
+"""
+Exactly-once guard for S3-triggered pipeline stages.
+
+S3 notifications are delivered at least once. Before doing billable work
+a stage claims ``<stage>#<bucket>/<key>#<etag>`` with a conditional
+``put_item``; a duplicate delivery finds the claim and skips. Claims carry
+a lease so a crashed invocation does not block retries forever, and a
+failed stage releases its claim so the retry can run.
+
+Table layout: hash key ``idemKey`` (S), TTL attribute ``ttl``.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+
+
+def record_key(stage: str, record: Dict[str, Any]) -> str:
+    """
+    Idempotency key for one S3 event record.
+
+    Uses the object's ETag (or the event sequencer when there is no ETag)
+    so an overwritten object with new content is processed again.
+    """
+    obj = record["object"]
+    version = obj.get("eTag") or obj.get("sequencer") or ""
+    return f"{stage}#{record['bucket']['name']}/{obj['key']}#{version}"
+
+
+def job_name(idem_key: str, prefix: str = "voicenav-job-") -> str:
+    """Deterministic Transcribe job name for an idempotency key."""
+    return prefix + hashlib.sha256(idem_key.encode()).hexdigest()[:32]
+
+
+class IdempotencyStore:
+    """
+    Conditional-write claims in a DynamoDB table.
+
+    Args:
+        table: DynamoDB table resource, or None to disable (always claims)
+        ttl: Seconds a completed claim is remembered
+        lease: Seconds an in-progress claim blocks other deliveries
+    """
+
+    def __init__(self, table: Any = None, ttl: int = 86400, lease: int = 900):
+        self.table = table
+        self.ttl = ttl
+        self.lease = lease
+
+    def claim(self, key: str) -> bool:
+        """Return True if this caller should process ``key``."""
+        if self.table is None:
+            return True
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={
+                    "idemKey": key,
+                    "status": IN_PROGRESS,
+                    "lease": now + self.lease,
+                    "ttl": now + self.ttl,
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(idemKey) OR "
+                    "(#s = :in_progress AND #l < :now)"
+                ),
+                ExpressionAttributeNames={"#s": "status", "#l": "lease"},
+                ExpressionAttributeValues={":in_progress": IN_PROGRESS, ":now": now},
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            log.info("Duplicate delivery skipped: %s", key)
+            return False
+
+    def complete(self, key: str, result: Optional[str] = None) -> None:
+        """Mark ``key`` done; later deliveries are skipped until the TTL."""
+        if self.table is None:
+            return
+        update = "SET #s = :done"
+        names = {"#s": "status"}
+        values = {":done": COMPLETED}
+        if result is not None:
+            update += ", #r = :result"
+            names["#r"] = "result"
+            values[":result"] = result
+        self.table.update_item(
+            Key={"idemKey": key},
+            UpdateExpression=update,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    def release(self, key: str) -> None:
+        """Drop a claim after a failure so a retry can process ``key``."""
+        if self.table is None:
+            return
+        try:
+            self.table.delete_item(Key={"idemKey": key})
+        except Exception as e:
+            log.error("Releasing %s failed – %s", key, e)
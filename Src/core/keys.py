@@ -0,0 +1,110 @@
+"""
+S3 key conventions shared by the VoiceNav-AI Lambdas.
+
+The browser uploads recordings as ``audio-store/<sessionID>/<uuid>-rec.webm``.
+The session segment is carried through to the Transcribe output key
+(``transcribe-output/<sessionID>/<job>.json``) so the Bedrock processor can
+deliver the intent to the originating WebSocket only.
+
+The recording's UUID is its correlation ID: it is embedded in the
+Transcribe job name (``voicenav-<correlation>-<hash>``), and the upload's
+S3 event time in the output key (``<job>.t<epoch ms>.json``), so the
+Bedrock processor can attribute its timings to the upload that caused them.
+"""
+
+import hashlib
+import re
+from typing import Optional, Tuple
+
+# Same alphabet Transcribe accepts in job names, so a session ID is safe
+# anywhere we need to embed it.
+SESSION_RE = re.compile(r"^[0-9A-Za-z._-]{1,128}$")
+_UUID_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+_TRACED_JOB_RE = re.compile(r"^voicenav-([0-9a-f]{32})-[0-9a-f]{32}$")
+
+
+def valid_session(session_id: Optional[str]) -> bool:
+    """Return True if ``session_id`` can be embedded in keys and job names."""
+    return bool(session_id) and SESSION_RE.match(session_id or "") is not None
+
+
+def session_from_key(key: str, prefix: str) -> Optional[str]:
+    """
+    Extract the session segment from ``<prefix><sessionID>/<name>``.
+
+    Args:
+        key: S3 object key (already URL-decoded)
+        prefix: Key prefix, e.g. ``audio-store/``
+
+    Returns:
+        The session ID, or None for legacy keys without a session segment
+    """
+    if not key.startswith(prefix):
+        return None
+    head, sep, _ = key[len(prefix) :].partition("/")
+    if not sep or not valid_session(head):
+        return None
+    return head
+
+
+def correlation_id(key: str, prefix: str) -> str:
+    """
+    Correlation ID of the recording uploaded as ``key``.
+
+    The client's per-recording UUID (after the session segment, which is a
+    UUID too) without dashes; keys without one get a hash of the key.
+
+    Args:
+        key: Upload key, or the prefix of a segmented recording
+        prefix: Upload prefix, e.g. ``audio-store/``
+
+    Returns:
+        32 lowercase hex characters
+    """
+    name = key[len(prefix) :] if key.startswith(prefix) else key
+    session = session_from_key(key, prefix)
+    if session:
+        name = name[len(session) + 1 :]
+    match = _UUID_RE.search(name)
+    if match:
+        return match.group(0).replace("-", "").lower()
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def job_prefix(correlation: str) -> str:
+    """Transcribe job name prefix carrying a correlation ID."""
+    return f"voicenav-{correlation}-"
+
+
+def output_key(
+    prefix: str,
+    job_name: str,
+    session_id: Optional[str] = None,
+    uploaded_ms: Optional[int] = None,
+) -> str:
+    """Build the Transcribe ``OutputKey`` for a job, keeping the session."""
+    name = f"{job_name}.t{uploaded_ms}" if uploaded_ms is not None else job_name
+    if session_id:
+        return f"{prefix}{session_id}/{name}.json"
+    return f"{prefix}{name}.json"
+
+
+def trace_from_key(key: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Read the correlation ID and upload time back from a transcript key.
+
+    Returns:
+        ``(correlation ID, upload epoch ms)``, either None if the key does
+        not carry it (older job names, manual uploads)
+    """
+    stem = key.rsplit("/", 1)[-1]
+    if stem.endswith(".json"):
+        stem = stem[: -len(".json")]
+    uploaded_ms = None
+    job, sep, stamp = stem.rpartition(".t")
+    if sep and stamp.isdigit():
+        stem, uploaded_ms = job, int(stamp)
+    match = _TRACED_JOB_RE.match(stem)
+    return (match.group(1) if match else None), uploaded_ms
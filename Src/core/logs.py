@@ -0,0 +1,214 @@
+"""
+Shared logging setup for the Lambdas: JSON lines through a queue.
+
+``configure()`` replaces the runtime's root handler with a
+``QueueHandler``; a ``QueueListener`` thread formats and writes the
+records, so request threads only build a ``LogRecord`` and enqueue it.
+Messages keep their ``%``-style arguments until the listener formats them,
+so pass snapshots (``stats`` dicts, counts), never live containers or
+whole ID lists. Handlers call ``flush()`` before returning so records are
+written before the container is frozen.
+
+Per-request detail goes to a ``detail()`` logger and is sampled at
+``LOG_SAMPLE_RATE``. The decision hashes the record's correlation ID (see
+``core.metrics``), so a sampled recording keeps its detail lines in every
+stage and an unsampled one has none. Warnings and errors are never sampled.
+
+Each line is one JSON object: ``ts``, ``level``, ``logger``, ``msg``, the
+``correlationId`` of the record being processed, any ``extra`` fields and
+``exc`` for exceptions. ``LOG_FORMAT=text`` prints plain lines instead.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from core import metrics
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")  # or "text"
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "1"))  # detail logs kept
+
+DETAIL = "detail"  # logger name suffix of sampled per-request logs
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_STANDARD = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "correlationId",
+}
+
+_lock = threading.Lock()
+_queue: "Optional[queue.SimpleQueue[Any]]" = None
+_listener: Optional["_Listener"] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        doc: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        correlation = getattr(record, "correlationId", None)
+        if correlation:
+            doc["correlationId"] = correlation
+        for key, value in vars(record).items():
+            if key not in _STANDARD:
+                doc[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            doc["exc"] = record.exc_text
+        return json.dumps(doc, default=str, ensure_ascii=False)
+
+
+def sampled(correlation_id: Optional[str], rate: float) -> bool:
+    """Keep detail logs of this recording? Same answer in every stage."""
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    if correlation_id:
+        return zlib.crc32(correlation_id.encode()) % 10000 < rate * 10000
+    return random.random() < rate
+
+
+class _RequestFilter(logging.Filter):
+    """Stamp the correlation ID and drop unsampled detail records."""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        timings = metrics.current()
+        correlation = timings.correlation_id if timings else None
+        record.correlationId = correlation
+        if record.levelno >= logging.WARNING or not record.name.endswith(DETAIL):
+            return True
+        return sampled(correlation, self.rate)
+
+
+class _StdoutHandler(logging.StreamHandler):  # type: ignore[type-arg]
+    """Writes to whatever ``sys.stdout`` is when the record is written."""
+
+    @property  # type: ignore[override]
+    def stream(self) -> Any:
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value: Any) -> None:
+        pass
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the stdlib handler, leave ``msg % args`` to the listener.
+        # Tracebacks are rendered now: their frames do not outlive the call.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _Listener(logging.handlers.QueueListener):
+    def handle(self, record: Any) -> None:
+        if isinstance(record, threading.Event):  # flush() marker
+            record.set()
+            return
+        super().handle(record)
+
+
+def configure(
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    fmt: Optional[str] = None,
+    stream: Any = None,
+) -> None:
+    """
+    Route the root logger through the queue (once per process).
+
+    Later calls only update the level and sample rate. The Lambda runtime's
+    own root handler and plain ``StreamHandler``s are replaced; other
+    handlers (e.g. test capture) are left alone.
+    """
+    global _queue, _listener
+    root = logging.getLogger()
+    root.setLevel(level or LOG_LEVEL)
+    rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    with _lock:
+        if _listener is not None:
+            for handler in root.handlers:
+                for f in handler.filters:
+                    if isinstance(f, _RequestFilter):
+                        f.rate = rate
+            return
+        for handler in list(root.handlers):
+            if type(handler) is logging.StreamHandler or (
+                type(handler).__name__ == "LambdaLoggerHandler"
+            ):
+                root.removeHandler(handler)
+        out: logging.Handler = (
+            logging.StreamHandler(stream) if stream else _StdoutHandler()
+        )
+        if (fmt or LOG_FORMAT) == "json":
+            out.setFormatter(JsonFormatter())
+        else:
+            out.setFormatter(
+                logging.Formatter("%(levelname)-7s %(asctime)s %(name)s %(message)s")
+            )
+        _queue = queue.SimpleQueue()
+        handler = _QueueHandler(_queue)
+        handler.addFilter(_RequestFilter(rate))
+        root.addHandler(handler)
+        _listener = _Listener(_queue, out, respect_handler_level=True)
+        _listener.start()
+    atexit.register(shutdown)
+
+
+def flush(timeout: float = 2.0) -> bool:
+    """
+    Wait until the records queued so far have been written.
+
+    Records other threads queue meanwhile are not waited for. Returns False
+    if the listener did not catch up within ``timeout`` seconds.
+    """
+    if _queue is None:
+        return True
+    marker = threading.Event()
+    _queue.put(marker)
+    return marker.wait(timeout)
+
+
+def shutdown() -> None:
+    """Write what is queued and stop the listener thread."""
+    global _queue, _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _QueueHandler):
+                root.removeHandler(handler)
+        _queue = _listener = None
+
+
+def detail(name: str) -> logging.Logger:
+    """The sampled per-request logger that goes with logger ``name``."""
+    return logging.getLogger(f"{name}.{DETAIL}")
@@ -0,0 +1,153 @@
+"""
+Per-stage timings as CloudWatch Embedded Metric Format (EMF) log lines.
+
+Each handler opens a ``Timings`` for every record it processes, tagged with
+the recording's correlation ID (see ``core.keys.correlation_id``), adds
+spans around its steps and emits one JSON line when the record is done.
+CloudWatch turns the line into ``<Namespace>/<metric>`` metrics with a
+``Stage`` dimension; the raw lines keep the correlation ID so
+``scripts/latency_report.py`` can join the stages of one command.
+
+Code below a handler (e.g. ``ask_bedrock``) adds spans and properties to
+the record's ``Timings`` through ``span()`` and ``tag()`` without it being
+passed down.
+"""
+
+import contextvars
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, Optional
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "VoiceNav")
+ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+_current: "contextvars.ContextVar[Optional[Timings]]" = contextvars.ContextVar(
+    "voicenav_timings", default=None
+)
+
+
+def now_ms() -> int:
+    """Wall-clock time in epoch milliseconds."""
+    return int(time.time() * 1000)
+
+
+def epoch_ms(event_time: Optional[str]) -> Optional[int]:
+    """Epoch milliseconds of an S3 ``eventTime`` (``2024-05-01T12:00:00.123Z``)."""
+    if not event_time:
+        return None
+    try:
+        parsed = datetime.fromisoformat(event_time.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return int(parsed.timestamp() * 1000)
+
+
+class Timings:
+    """
+    Millisecond metrics and properties of one record in one stage.
+
+    Args:
+        stage: ``Stage`` dimension value (``transcribe``, ``intent``, …)
+        correlation_id: Recording the record belongs to, if known
+    """
+
+    def __init__(self, stage: str, correlation_id: Optional[str] = None) -> None:
+        self.stage = stage
+        self.correlation_id = correlation_id
+        self.values: Dict[str, float] = {}
+        self.properties: Dict[str, Any] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to metric ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, 1000 * (time.perf_counter() - started))
+
+    def add(self, name: str, ms: float) -> None:
+        self.values[name] = self.values.get(name, 0.0) + ms
+
+    def since(self, name: str, start_ms: Optional[int]) -> None:
+        """Record wall-clock milliseconds from ``start_ms`` (epoch) until now."""
+        if start_ms is not None:
+            self.values[name] = float(max(now_ms() - start_ms, 0))
+
+    def tag(self, **properties: Any) -> None:
+        """Attach searchable, non-metric fields (IDs, timestamps, outcome)."""
+        self.properties.update(properties)
+
+    @contextmanager
+    def active(self) -> Iterator["Timings"]:
+        """Make this the target of ``span()`` for the current thread."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def document(self) -> Dict[str, Any]:
+        """The EMF document for the values collected so far."""
+        doc: Dict[str, Any] = {
+            "_aws": {
+                "Timestamp": now_ms(),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": NAMESPACE,
+                        "Dimensions": [["Stage"]],
+                        "Metrics": [
+                            {"Name": name, "Unit": "Milliseconds"}
+                            for name in self.values
+                        ],
+                    }
+                ],
+            },
+            "Stage": self.stage,
+            "correlationId": self.correlation_id,
+            **self.properties,
+        }
+        doc.update({k: round(v, 2) for k, v in self.values.items()})
+        return doc
+
+    def emit(self, stream: Optional[IO[str]] = None) -> None:
+        """Write the EMF line to stdout, where Lambda ships it to CloudWatch."""
+        if not ENABLED:
+            return
+        out = stream or sys.stdout
+        out.write(json.dumps(self.document(), default=str) + "\n")
+        out.flush()
+
+
+def current() -> Optional[Timings]:
+    """The ``Timings`` of the record this thread is processing, if any."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """``current().span(name)``, or nothing outside an active record."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.span(name):
+        yield
+
+
+def since(name: str, start_ms: Optional[int]) -> None:
+    """``current().since(...)``, or nothing outside an active record."""
+    timings = _current.get()
+    if timings is not None:
+        timings.since(name, start_ms)
+
+
+def tag(**properties: Any) -> None:
+    """``current().tag(...)``, or nothing outside an active record."""
+    timings = _current.get()
+    if timings is not None:
+        timings.tag(**properties)
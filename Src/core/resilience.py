@@ -0,0 +1,331 @@
+"""
+Client-side load shedding for calls to throttling AWS APIs.
+
+Under burst load Bedrock and the API Gateway management API answer with
+throttling errors. Letting the error escape makes S3/SQS redeliver the
+whole event, which adds load exactly when the service is short of
+capacity. ``Guard`` wraps a call with
+
+- a ``TokenBucket`` that paces calls to the rate the service sustains,
+- jittered exponential backoff on throttling and connection failures,
+  drawn from a ``RetryBudget`` shared by everything one invocation does,
+  so a burst of failures cannot multiply into a burst of retries, and
+- a ``CircuitBreaker`` that fails fast (``Unavailable``) while the service
+  keeps failing, letting the caller switch to a degraded answer.
+
+The time a call spends waiting for a token or backing off is recorded, so
+``Guard.stats`` reports the latency the guard itself adds (p50/p99).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, TypeVar
+
+from botocore.exceptions import ConnectionError, HTTPClientError
+
+T = TypeVar("T")
+
+THROTTLE_CODES = frozenset(
+    {
+        "ThrottlingException",
+        "Throttling",
+        "TooManyRequestsException",
+        "LimitExceededException",
+        "ServiceUnavailableException",
+        "ServiceQuotaExceededException",
+        "ModelNotReadyException",
+        "RequestLimitExceeded",
+    }
+)
+
+
+class Unavailable(Exception):
+    """The guarded service is throttling or failing; use a degraded path."""
+
+
+def is_throttle(exc: BaseException) -> bool:
+    """True for botocore errors that mean "slow down" (429/503 and friends)."""
+    response = getattr(exc, "response", None) or {}
+    code = response.get("Error", {}).get("Code", "")
+    status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in THROTTLE_CODES or status in (429, 503)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Throttling, or the connection failed or timed out: worth a retry."""
+    return is_throttle(exc) or isinstance(exc, (ConnectionError, HTTPClientError))
+
+
+def backoff(
+    attempt: int,
+    base: float = 0.05,
+    cap: float = 2.0,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Full-jitter delay before retry ``attempt`` (1-based)."""
+    return rng() * min(cap, base * 2.0 ** (attempt - 1))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second (<= 0 disables the limit)
+        burst: Bucket capacity
+        clock: Monotonic time source
+        sleep: Sleep function used while waiting for a token
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take a token, waiting up to ``timeout`` seconds; False if none."""
+        if self.rate <= 0:
+            return True
+        deadline = self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            self._sleep(wait)
+
+
+class RetryBudget:
+    """A number of retries shared by all calls of one invocation."""
+
+    def __init__(self, retries: int) -> None:
+        self.retries = retries
+        self._left = retries
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self._left <= 0:
+                return False
+            self._left -= 1
+            return True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._left = self.retries
+
+
+class CircuitBreaker:
+    """
+    Closed → open after ``failures`` consecutive failures; half-open after
+    ``reset_after`` seconds, when one trial call decides whether it closes.
+
+    Args:
+        failures: Consecutive failures that open the circuit
+        reset_after: Seconds the circuit stays open
+        clock: Monotonic time source
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failures: int = 5,
+        reset_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failures = failures
+        self.reset_after = reset_after
+        self._clock = clock
+        self._state = self.CLOSED
+        self._count = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current()
+
+    def _current(self) -> str:
+        if (
+            self._state == self.OPEN
+            and self._clock() - self._opened_at >= self.reset_after
+        ):
+            self._state = self.HALF_OPEN
+            self._trial = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now."""
+        with self._lock:
+            state = self._current()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a half-open trial whose call never reached the service."""
+        with self._lock:
+            self._trial = False
+
+    def success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._count = 0
+            self._trial = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self._count += 1
+            if self._state == self.HALF_OPEN or self._count >= self.failures:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial = False
+
+
+class Guard:
+    """
+    Rate limit, retry and circuit-break calls to one service.
+
+    Args:
+        name: Service name used in logs and stats
+        bucket: Client-side rate limit
+        breaker: Circuit breaker for the service
+        budget: Retries shared by one invocation (reset per invocation)
+        max_attempts: Attempts per call, including the first
+        acquire_timeout: Longest wait for a rate-limit token
+        retryable: Which exceptions are retried and count against the
+            circuit (default: throttling and connection failures)
+        sleep: Sleep function, replaceable in tests
+        rng: Random source for jitter
+        window: Calls kept for the added-latency percentiles
+    """
+
+    def __init__(
+        self,
+        name: str,
+        bucket: TokenBucket,
+        breaker: CircuitBreaker,
+        budget: RetryBudget,
+        max_attempts: int = 3,
+        acquire_timeout: float = 1.0,
+        retryable: Callable[[BaseException], bool] = is_transient,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+        window: int = 1024,
+    ) -> None:
+        self.name = name
+        self.bucket = bucket
+        self.breaker = breaker
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.acquire_timeout = acquire_timeout
+        self.retryable = retryable
+        self._sleep = sleep
+        self._rng = rng
+        self.counts = {
+            "calls": 0,
+            "retries": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "short_circuited": 0,
+            "budget_exhausted": 0,
+        }
+        self._added: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """
+        Run ``fn`` under the guard.
+
+        Raises:
+            Unavailable: If the circuit is open, no token could be had, or
+                throttling outlasted the attempts or the retry budget
+            Exception: Whatever non-retryable error ``fn`` raises
+        """
+        self._count("calls")
+        added = 0.0
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                if not self.breaker.allow():
+                    self._count("short_circuited")
+                    raise Unavailable(f"{self.name} circuit open")
+                waited = time.perf_counter()
+                ok = self.bucket.acquire(self.acquire_timeout)
+                added += time.perf_counter() - waited
+                if not ok:
+                    self._count("rate_limited")
+                    self.breaker.release()
+                    raise Unavailable(f"{self.name} rate limit")
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not self.retryable(e):
+                        # The service answered; the request itself was bad
+                        self.breaker.success()
+                        raise
+                    self._count("throttled")
+                    self.breaker.failure()
+                    if attempt == self.max_attempts:
+                        raise Unavailable(f"{self.name} throttled: {e}") from e
+                    if not self.budget.take():
+                        self._count("budget_exhausted")
+                        raise Unavailable(f"{self.name} retry budget spent") from e
+                    self._count("retries")
+                    delay = backoff(attempt, rng=self._rng)
+                    self._sleep(delay)
+                    added += delay
+                    continue
+                self.breaker.success()
+                return result
+            raise AssertionError("unreachable")  # pragma: no cover
+        finally:
+            with self._lock:
+                self._added.append(added)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            added = sorted(self._added)
+            counts = dict(self.counts)
+
+        def pct(p: float) -> float:
+            if not added:
+                return 0.0
+            return round(1000 * added[min(len(added) - 1, int(len(added) * p))], 2)
+
+        return {
+            **counts,
+            "state": self.breaker.state,
+            "added_p50_ms": pct(0.50),
+            "added_p99_ms": pct(0.99),
+        }
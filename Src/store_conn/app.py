@@ -7,25 +7,163 @@ the browser client and AWS Lambda backend.
 Handles:
 - Connection establishment ($connect)
 - Connection cleanup ($disconnect)
-- Connection TTL management in DynamoDB
+- Selector catalog registration (``register`` route)
+- Connection TTL management in DynamoDB (``heartbeat`` route)
+
+Clients connect with ``?session=<sessionID>``; the session is stored on the
+connection item (and indexed) so intents can be routed back to it.
 """
 
-import boto3
+import json
 import os
 import time
 import logging
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from core import clients, logs
+from core.catalog import catalog_version, normalize_catalog
+from core.epoch import bump_epoch
+from core.keys import valid_session
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logs.configure()
 logger = logging.getLogger(__name__)
+detail = logs.detail(__name__)  # sampled per-connection lines
+
+CONN_TTL = int(os.environ.get("CONN_TTL", "3600"))  # seconds without a heartbeat
+# Heartbeats only write once the row expires within this many seconds
+TTL_REFRESH_WITHIN = int(os.environ.get("TTL_REFRESH_WITHIN", "1800"))
+EXPIRY_CACHE_MAX = 10000  # connections whose ttl this container remembers
+PAGE_MAX_CHARS = 256
+# Optional; set only with broadcast delivery and CONN_CACHE_TTL on the Bedrock side
+CONN_EPOCH_TABLE = os.environ.get("CONN_EPOCH_TABLE")
+
+# connID → ttl this container last wrote (warm-container only)
+_expiry: "OrderedDict[str, int]" = OrderedDict()
+
+
+def remember_expiry(connection_id: str, ttl: Optional[int]) -> None:
+    """Record (or with ``None`` forget) the ttl written for a connection."""
+    _expiry.pop(connection_id, None)
+    if ttl is None:
+        return
+    _expiry[connection_id] = ttl
+    if len(_expiry) > EXPIRY_CACHE_MAX:
+        _expiry.popitem(last=False)
+
 
+def get_dynamodb_table() -> Any:
+    """Get DynamoDB table instance (cached for the container's lifetime)."""
+    return clients.table(os.getenv("CONN_TABLE", "VoiceNavConnections"))
+
+
+def connections_changed() -> None:
+    """Let warm Bedrock containers reload their cached connection list."""
+    if CONN_EPOCH_TABLE:
+        bump_epoch(clients.table(CONN_EPOCH_TABLE))
+
+
+def register_catalog(table: Any, connection_id: str, body: Any) -> Dict[str, Any]:
+    """
+    Store the page's selector catalog on its connection item.
+
+    Args:
+        table: Connections table
+        connection_id: Registering connection
+        body: Raw WebSocket message body
 
-def get_dynamodb_table():
-    """Get DynamoDB table instance."""
-    region = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
-    dynamodb = boto3.resource("dynamodb", region_name=region)
-    return dynamodb.Table(os.getenv("CONN_TABLE", "VoiceNavConnections"))
+    Returns:
+        API Gateway response; 400 for an invalid catalog
+    """
+    try:
+        selectors = normalize_catalog(json.loads(body or "{}").get("selectors"))
+    except (ValueError, AttributeError) as e:
+        logger.warning("Rejected catalog from %s: %s", connection_id, e)
+        return {"statusCode": 400, "body": json.dumps({"error": str(e)})}
+    version = catalog_version(selectors)
+    try:
+        table.update_item(
+            Key={"connID": connection_id},
+            UpdateExpression="SET selectors = :s, catalogVersion = :v",
+            ConditionExpression="attribute_exists(connID)",
+            ExpressionAttributeValues={
+                ":s": json.dumps(selectors, separators=(",", ":")),
+                ":v": version,
+            },
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        # Connection already gone; do not resurrect it without a TTL
+        return {"statusCode": 410}
+    detail.info("Registered %d selectors (%s)", len(selectors), version)
+    return {"statusCode": 200, "body": json.dumps({"catalogVersion": version})}
+
+
+def heartbeat(table: Any, connection_id: str, body: Any) -> Dict[str, Any]:
+    """
+    Keep a connection's item alive while its socket is open.
+
+    The ``ttl`` is pushed to ``CONN_TTL`` seconds from now with one
+    conditional ``update_item``, but only once the known expiry is within
+    ``TTL_REFRESH_WITHIN``; earlier heartbeats write nothing. The expiry is
+    known from this container's own writes or from the ``ttl`` the client
+    echoes from its last heartbeat response. A ``page`` in the message is
+    always written; ``lastActivity`` (epoch seconds) rides along with writes.
+
+    Args:
+        table: Connections table
+        connection_id: Connection sending the heartbeat
+        body: Raw WebSocket message body
+
+    Returns:
+        API Gateway response with the current ``ttl``; 400 for a malformed
+        message, 410 if the connection is gone
+    """
+    try:
+        message = json.loads(body or "{}")
+        hint = int(message.get("ttl") or 0)
+        page = message.get("page") or None
+        if page is not None and not isinstance(page, str):
+            raise ValueError("page must be a string")
+        activity = message.get("lastActivity")
+        last_activity = int(activity) if activity is not None else None
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning("Rejected heartbeat from %s: %s", connection_id, e)
+        return {"statusCode": 400, "body": json.dumps({"error": str(e)})}
+
+    now = int(time.time())
+    # A client can only postpone its own refresh, never past a full TTL
+    known = max(_expiry.get(connection_id, 0), min(hint, now + CONN_TTL))
+    if page is None and known - now > TTL_REFRESH_WITHIN:
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"ttl": known, "refreshed": False}),
+        }
+
+    ttl = now + CONN_TTL
+    updates = ["#ttl = :ttl"]
+    values: Dict[str, Any] = {":ttl": ttl}
+    if last_activity is not None:
+        updates.append("lastActivity = :a")
+        values[":a"] = min(last_activity, now)
+    if page is not None:
+        updates.append("page = :p")
+        values[":p"] = page[:PAGE_MAX_CHARS]
+    try:
+        table.update_item(
+            Key={"connID": connection_id},
+            UpdateExpression="SET " + ", ".join(updates),
+            ConditionExpression="attribute_exists(connID)",
+            ExpressionAttributeNames={"#ttl": "ttl"},  # reserved word
+            ExpressionAttributeValues=values,
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        # Disconnected or expired: the client has to reconnect
+        remember_expiry(connection_id, None)
+        return {"statusCode": 410}
+    remember_expiry(connection_id, ttl)
+    detail.info("Extended %s to %d", connection_id, ttl)
+    return {"statusCode": 200, "body": json.dumps({"ttl": ttl, "refreshed": True})}
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -42,30 +180,46 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
         connection_id = event["requestContext"]["connectionId"]
         event_type = event["requestContext"]["eventType"]
+        route = event["requestContext"].get("routeKey")
 
-        logger.info(f"Processing {event_type} for connection {connection_id}")
+        detail.info("Processing %s for connection %s", event_type, connection_id)
 
         # Get table instance
         table = get_dynamodb_table()
 
         if event_type == "CONNECT":
-            # Store connection with 1-hour TTL
-            table.put_item(
-                Item={
-                    "connID": connection_id,
-                    "ttl": int(time.time()) + 3600,  # 1 hour from now
-                    "connected_at": int(time.time()),
-                }
-            )
-            logger.info(f"Stored connection: {connection_id}")
+            # Store connection with a TTL that heartbeats extend
+            item: Dict[str, Any] = {
+                "connID": connection_id,
+                "ttl": int(time.time()) + CONN_TTL,
+                "connected_at": int(time.time()),
+            }
+            params = event.get("queryStringParameters") or {}
+            session_id = params.get("session")
+            if valid_session(session_id):
+                item["sessionID"] = session_id
+            table.put_item(Item=item)
+            remember_expiry(connection_id, item["ttl"])
+            connections_changed()
+            detail.info("Stored connection: %s", connection_id)
+
+        elif event_type == "MESSAGE" and route == "register":
+            return register_catalog(table, connection_id, event.get("body"))
+
+        elif event_type == "MESSAGE" and route == "heartbeat":
+            return heartbeat(table, connection_id, event.get("body"))
 
         elif event_type == "DISCONNECT":
             # Clean up connection
             table.delete_item(Key={"connID": connection_id})
-            logger.info(f"Removed connection: {connection_id}")
+            remember_expiry(connection_id, None)
+            connections_changed()
+            detail.info("Removed connection: %s", connection_id)
 
         return {"statusCode": 200}
 
     except Exception as e:
-        logger.error(f"Error handling connection event: {str(e)}")
+        logger.error("Error handling connection event: %s", e)
         return {"statusCode": 500}
+    finally:
+        logs.flush()
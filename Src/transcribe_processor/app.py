@@ -2,94 +2,400 @@
 Transcribe Processor for VoiceNav-AI
 
 Triggered by S3 ObjectCreated events from audio uploads.
-Starts Amazon Transcribe jobs for voice-to-text conversion.
+Transcribes them with the ASR backend chosen by ``ASR_BACKEND`` (see
+``asr``): an Amazon Transcribe job by default.
 
 Flow:
 S3:audio-store/* → Lambda → Transcribe → S3:transcribe-output/*
+S3:audio-store/* → Lambda (streaming/local ASR) → intent Lambda
+
+Backends that return the transcript in-process hand it to the intent
+stage directly: an asynchronous invoke of ``INTENT_FUNCTION`` with an S3
+event for the output key that carries the transcript inline, or, without
+that function, the transcript written to the output key as a job would.
+
+Recordings uploaded in segments (``audio-store/<sessionID>/<rec>/part-N``
+plus ``manifest.json``) are stitched into ``stitched-audio/`` first.
+
+Uploads under ``audio-store/<sessionID>/`` keep their session segment in
+the output key so the intent is delivered to that client only. Audio whose
+content was transcribed before is served from the transcript cache.
+
+Every upload emits one ``transcribe`` metrics line (see ``core.metrics``)
+tagged with the recording's correlation ID, which also goes into the job
+name and, with the upload time, into the output key.
 """
 
 import os
 import json
-import uuid
-import boto3
 import logging
-from typing import Dict, Any
+import functools
+import urllib.parse
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+
+from core import clients, idempotency, keys, logs, metrics
+from core.batch import process_records
+import asr
+import preprocess
+import segments
+from transcript_cache import TranscriptCache, content_hash
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logs.configure()
 logger = logging.getLogger(__name__)
+detail = logs.detail(__name__)  # sampled per-recording lines
+
+
+# AWS clients (created on first use, cached per container)
+def transcribe_client() -> Any:
+    return clients.client("transcribe")
+
+
+def s3_client() -> Any:
+    return clients.client("s3")
+
+
+def lambda_client() -> Any:
+    return clients.client("lambda")
+
+
+@functools.lru_cache(maxsize=None)
+def asr_backend() -> Any:
+    """The ``ASR_BACKEND`` speech-to-text backend."""
+    return asr.backend(
+        ASR_BACKEND,
+        transcribe_client,
+        s3_client,
+        clients.region(),
+        PCM_SAMPLE_RATE,
+        ASR_LOCAL_TEXT,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def idempotency_store() -> idempotency.IdempotencyStore:
+    """Claims on uploads so duplicate S3 deliveries start no second job."""
+    return idempotency.IdempotencyStore(
+        clients.table(IDEMPOTENCY_TABLE) if IDEMPOTENCY_TABLE else None
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def transcript_cache() -> TranscriptCache:
+    """Audio content hash → transcript, so repeated audio skips Transcribe."""
+    return TranscriptCache(
+        clients.table(TRANSCRIPT_CACHE_TABLE) if TRANSCRIPT_CACHE_TABLE else None,
+        s3_client(),
+    )
 
-# Initialize AWS clients
-transcribe_client = boto3.client("transcribe")
-s3_client = boto3.client("s3")
 
 # Environment variables with defaults
 OUTPUT_BUCKET = os.environ.get(
     "OUTPUT_BUCKET", os.environ.get("AWS_BUCKET", "voicenav-bucket")
 )
 OUTPUT_PREFIX = os.environ.get("OUTPUT_PREFIX", "transcribe-output/")
+AUDIO_PREFIX = os.environ.get("AUDIO_PREFIX", "audio-store/")
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "8"))  # records in parallel
+IDEMPOTENCY_TABLE = os.environ.get("IDEMPOTENCY_TABLE")  # optional dedupe table
+TRANSCRIPT_CACHE_TABLE = os.environ.get("TRANSCRIPT_CACHE_TABLE")  # optional
+PREPROCESS_AUDIO = os.environ.get("PREPROCESS_AUDIO", "false").lower() == "true"
+PROCESSED_PREFIX = os.environ.get("PROCESSED_PREFIX", "processed-audio/")
+PREPROCESS_MAX_BYTES = int(os.environ.get("PREPROCESS_MAX_BYTES", str(50 << 20)))
+PCM_SAMPLE_RATE = int(os.environ.get("PCM_SAMPLE_RATE", "16000"))  # raw .pcm input
+STITCHED_PREFIX = os.environ.get("STITCHED_PREFIX", "stitched-audio/")
+SEGMENT_PART_SIZE = int(os.environ.get("SEGMENT_PART_SIZE", str(8 << 20)))  # >=5MiB
 LANGUAGE_CODE = os.environ.get("LANGUAGE_CODE", "en-US")
 MEDIA_FORMAT = os.environ.get("MEDIA_FORMAT", "webm")
+ASR_BACKEND = os.environ.get("ASR_BACKEND", "batch")  # or "streaming", "local"
+ASR_LOCAL_TEXT = os.environ.get("ASR_LOCAL_TEXT", "go home")  # "local" transcript
+INTENT_FUNCTION = os.environ.get("INTENT_FUNCTION", "")  # direct hand-off target
+INLINE_MAX_BYTES = 200 * 1024  # asynchronous invoke payloads are capped at 256 KiB
 
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+def prepare_media(bucket: str, key: str) -> Tuple[str, str]:
+    """
+    Return the media URI and format to hand to Transcribe.
+
+    With PREPROCESS_AUDIO enabled, WAV/FLAC/PCM uploads are trimmed,
+    downmixed and resampled into a compact object under PROCESSED_PREFIX
+    (outside the upload prefix, so it does not trigger this Lambda again).
+    Anything else, or any failure, falls back to the original upload.
     """
-    Process S3 ObjectCreated event to start transcription.
+    original = (f"s3://{bucket}/{key}", MEDIA_FORMAT)
+    fmt = preprocess.media_format(key)
+    if not (PREPROCESS_AUDIO and fmt and preprocess.available()):
+        return original
+    try:
+        obj = s3_client().get_object(Bucket=bucket, Key=key)
+        if obj["ContentLength"] > PREPROCESS_MAX_BYTES:
+            return original
+        result = preprocess.preprocess(obj["Body"].read(), fmt, PCM_SAMPLE_RATE)
+        name = key[len(AUDIO_PREFIX) :] if key.startswith(AUDIO_PREFIX) else key
+        out_key = f"{PROCESSED_PREFIX}{name}.{result.media_format}"
+        s3_client().put_object(Bucket=bucket, Key=out_key, Body=result.data)
+    except Exception as e:
+        logger.warning("Pre-processing %s failed, using original: %s", key, e)
+        return original
+    detail.info("Pre-processed %s: %s", key, result.stats)
+    return f"s3://{bucket}/{out_key}", result.media_format
+
+
+def hand_off(job_name: str, output_key: str, transcript: asr.Transcript) -> str:
+    """
+    Pass a finished transcript to the intent stage.
+
+    With INTENT_FUNCTION set, the intent Lambda is invoked asynchronously
+    with an S3 event record for ``output_key`` carrying the transcript
+    inline, so nothing is written to or read from S3. Otherwise, or when
+    the payload is too large, the transcript is written to ``output_key``
+    as an Amazon Transcribe document and its S3 event does the rest.
+
+    Returns:
+        ``"invoke"`` or ``"s3"``
+    """
+    if INTENT_FUNCTION:
+        written = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        record = {
+            "eventTime": written.replace("+00:00", "Z"),
+            "s3": {
+                "bucket": {"name": OUTPUT_BUCKET},
+                "object": {
+                    "key": urllib.parse.quote_plus(output_key, safe="/"),
+                    "eTag": job_name,
+                },
+            },
+            "transcript": {
+                "text": transcript.text,
+                "confidences": transcript.confidences,
+            },
+        }
+        payload = json.dumps({"Records": [record]}).encode()
+        if len(payload) <= INLINE_MAX_BYTES:
+            lambda_client().invoke(
+                FunctionName=INTENT_FUNCTION, InvocationType="Event", Payload=payload
+            )
+            return "invoke"
+    s3_client().put_object(
+        Bucket=OUTPUT_BUCKET,
+        Key=output_key,
+        Body=json.dumps(asr.to_document(job_name, transcript)).encode(),
+        ContentType="application/json",
+    )
+    return "s3"
+
+
+def start_job(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Start a transcription job for one uploaded audio object.
+
+    Segment and manifest uploads of a segmented recording start the job
+    for the stitched recording once every segment is there.
 
     Args:
-        event: S3 event from audio file upload
-        context: Lambda context (unused)
+        record: ``s3`` part of one S3 event record
 
     Returns:
-        Dict with statusCode and job details
+        Dict with job details
     """
+    input_key = urllib.parse.unquote_plus(record["object"]["key"])
+    prefix = segments.recording_prefix(input_key)
+    uploaded_ms = metrics.epoch_ms(record.get("eventTime"))
+    timings = metrics.Timings(
+        "transcribe", keys.correlation_id(prefix or input_key, AUDIO_PREFIX)
+    )
+    timings.since("notify_ms", uploaded_ms)
+    timings.tag(uploadedAt=uploaded_ms)
+    result: Dict[str, Any] = {"status": "ERROR"}
     try:
-        # Extract S3 event details
-        record = event["Records"][0]["s3"]
-        input_bucket = record["bucket"]["name"]
-        input_key = record["object"]["key"]
-
-        logger.info(f"Processing audio file: s3://{input_bucket}/{input_key}")
-
-        # Generate unique job name
-        job_id = f"voicenav-job-{uuid.uuid4()}"
-        media_uri = f"s3://{input_bucket}/{input_key}"
-
-        # Start transcription job
-        transcribe_client.start_transcription_job(
-            TranscriptionJobName=job_id,
-            LanguageCode=LANGUAGE_CODE,
-            MediaFormat=MEDIA_FORMAT,
-            Media={"MediaFileUri": media_uri},
-            OutputBucketName=OUTPUT_BUCKET,
-            OutputKey=f"{OUTPUT_PREFIX}{job_id}.json",
-            Settings={
-                "ShowSpeakerLabels": False,
-                "MaxSpeakerLabels": 1,
-            },
+        with timings.active():
+            if prefix is not None:
+                result = assemble_recording(
+                    record["bucket"]["name"], prefix, uploaded_ms
+                )
+            else:
+                result = transcribe(
+                    record,
+                    keys.session_from_key(input_key, AUDIO_PREFIX),
+                    timings.correlation_id,
+                    uploaded_ms,
+                )
+        return result
+    finally:
+        timings.tag(status=result.get("status"), jobName=result.get("jobId"))
+        timings.emit()
+
+
+def assemble_recording(
+    bucket: str, prefix: str, uploaded_ms: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Stitch a segmented recording and transcribe it, once it is complete.
+
+    Args:
+        bucket: Bucket the segments were uploaded to
+        prefix: ``audio-store/<sessionID>/<recording>/``
+        uploaded_ms: Event time of the upload that completed the recording
+
+    Returns:
+        Dict with job details, or status WAITING while segments are missing
+    """
+    details: Dict[str, Any] = {"recording": f"s3://{bucket}/{prefix}"}
+    name = prefix[len(AUDIO_PREFIX) :] if prefix.startswith(AUDIO_PREFIX) else prefix
+    try:
+        with metrics.span("stitch_ms"):
+            stitched = segments.stitch(
+                s3_client(),
+                bucket,
+                prefix,
+                STITCHED_PREFIX + name.rstrip("/"),
+                SEGMENT_PART_SIZE,
+            )
+    except segments.Incomplete as e:
+        detail.info("Waiting for %d segment(s) of %s", len(e.missing), prefix)
+        return {**details, "status": "WAITING", "missing": e.missing[:50]}
+    if stitched is None:
+        return {**details, "status": "WAITING"}
+
+    record = {
+        "bucket": {"name": bucket},
+        "object": {
+            "key": urllib.parse.quote_plus(stitched.key, safe="/"),
+            "eTag": stitched.etag,
+            "size": stitched.size,
+        },
+    }
+    result: Dict[str, Any] = transcribe(
+        record,
+        keys.session_from_key(prefix, AUDIO_PREFIX),
+        keys.correlation_id(prefix, AUDIO_PREFIX),
+        uploaded_ms,
+    )
+    return {**details, **result}
+
+
+def transcribe(
+    record: Dict[str, Any],
+    session_id: Optional[str],
+    correlation_id: Optional[str] = None,
+    uploaded_ms: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Start (or reuse) the transcription of one audio object.
+
+    A transcript the backend returns in-process is handed to the intent
+    stage (status TRANSCRIBED); batch jobs deliver theirs through S3.
+
+    Args:
+        record: ``s3`` part of an S3 event record for the audio object
+        session_id: Client session the intent is delivered to, if any
+        correlation_id: Recording's correlation ID, carried in the job name
+        uploaded_ms: Upload event time, carried in the output key
+
+    Returns:
+        Dict with job details
+    """
+    input_bucket = record["bucket"]["name"]
+    input_key = urllib.parse.unquote_plus(record["object"]["key"])
+
+    detail.info("Processing audio file: s3://%s/%s", input_bucket, input_key)
+
+    # Deterministic job name: a redelivered event finds the job it started
+    idem_key = idempotency.record_key("transcribe", record)
+    if correlation_id:
+        job_id = idempotency.job_name(idem_key, keys.job_prefix(correlation_id))
+    else:
+        job_id = idempotency.job_name(idem_key)
+    media_uri = f"s3://{input_bucket}/{input_key}"
+    output_key = keys.output_key(OUTPUT_PREFIX, job_id, session_id, uploaded_ms)
+    details = {
+        "jobId": job_id,
+        "mediaUri": media_uri,
+        "outputLocation": f"s3://{OUTPUT_BUCKET}/{output_key}",
+    }
+
+    store = idempotency_store()
+    if not store.claim(idem_key):
+        return {**details, "status": "DUPLICATE"}
+
+    digest = content_hash(record, LANGUAGE_CODE)
+    cache = transcript_cache()
+    try:
+        if digest and cache.copy_cached(digest, OUTPUT_BUCKET, output_key):
+            detail.info("Reused cached transcript for %s", digest)
+            store.complete(idem_key, output_key)
+            return {**details, "status": "CACHED"}
+    except Exception as e:
+        logger.warning("Transcript cache lookup failed: %s", e)
+
+    # Start transcription job, or transcribe right here
+    try:
+        with metrics.span("prepare_media_ms"):
+            media_uri, media_format = prepare_media(input_bucket, input_key)
+        details["mediaUri"] = media_uri
+        audio = asr.Audio(
+            media_uri, media_format, job_id, OUTPUT_BUCKET, output_key, LANGUAGE_CODE
         )
+        started = metrics.now_ms()
+        transcript = asr_backend().transcribe(audio)
+        if transcript is None:
+            metrics.since("start_job_ms", started)
+            metrics.tag(jobStartedAt=metrics.now_ms())
+            status = "STARTED"
+        else:
+            metrics.since("asr_ms", started)
+            metrics.tag(jobStartedAt=started, partials=transcript.partials)
+            with metrics.span("handoff_ms"):
+                details["handoff"] = hand_off(job_id, output_key, transcript)
+            status = "TRANSCRIBED"
+    except asr.AlreadyStarted:
+        detail.info("Transcription job already exists: %s", job_id)
+        status = "EXISTS"
+    except Exception:
+        store.release(idem_key)
+        raise
+    store.complete(idem_key, job_id)
+    # Only a transcript object in S3 can be served from the cache later
+    if digest and (status == "STARTED" or details.get("handoff") == "s3"):
+        try:
+            cache.remember(digest, OUTPUT_BUCKET, output_key)
+        except Exception as e:
+            logger.warning("Transcript cache write failed: %s", e)
 
-        logger.info(f"Started transcription job: {job_id}")
+    detail.info("Transcription %s: %s", status.lower(), job_id)
+
+    return {**details, "status": status}
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Process S3 ObjectCreated events to start transcriptions.
 
+    Every record of the batch is processed concurrently; failed records
+    are listed in ``batchItemFailures`` and do not affect the others.
+
+    Args:
+        event: S3 event (or SQS batch of S3 events) from audio uploads
+        context: Lambda context (unused)
+
+    Returns:
+        Dict with statusCode, per-record job details and batchItemFailures
+    """
+    try:
+        batch = process_records(event, start_job, BATCH_WORKERS)
         return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "jobId": job_id,
-                    "mediaUri": media_uri,
-                    "outputLocation": (
-                        f"s3://{OUTPUT_BUCKET}/{OUTPUT_PREFIX}{job_id}.json"
-                    ),
-                    "status": "STARTED",
-                }
-            ),
+            "statusCode": batch["statusCode"],
+            "body": json.dumps({"results": batch["results"]}),
+            "batchItemFailures": batch["batchItemFailures"],
         }
 
     except Exception as e:
-        logger.error(f"Error processing transcription request: {str(e)}")
+        logger.error("Error processing transcription request: %s", e)
         return {
             "statusCode": 500,
             "body": json.dumps(
                 {"error": "Failed to start transcription job", "details": str(e)}
             ),
         }
+    finally:
+        logs.flush()
@@ -0,0 +1,315 @@
+"""
+Speech-to-text backends behind the transcribe stage.
+
+``BatchBackend`` starts an Amazon Transcribe job that writes its result to
+``transcribe-output/``; the intent stage picks it up from the S3 event,
+seconds later. ``StreamingBackend`` sends the recording as audio frames to
+Amazon Transcribe streaming and returns the final transcript in-process,
+which for a two-second command skips the job queue altogether.
+``LocalBackend`` answers with a fixed transcript and no AWS call, for
+tests, benchmarks and the offline worker.
+
+A backend returns a ``Transcript`` (handed straight to the intent stage)
+or None when the result arrives later through S3.
+
+Streaming needs the optional ``amazon-transcribe`` package and audio
+Transcribe streaming can decode: mono 16-bit WAV, raw PCM or FLAC. Other
+formats (the browser's WebM) fall back to a batch job.
+"""
+
+import asyncio
+import io
+import logging
+import wave
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    from amazon_transcribe.client import TranscribeStreamingClient
+    from amazon_transcribe.handlers import TranscriptResultStreamHandler
+except ImportError:  # pragma: no cover - optional dependency
+    TranscribeStreamingClient = None
+    TranscriptResultStreamHandler = object
+
+log = logging.getLogger(__name__)
+
+FRAME_MS = 100  # audio per streamed PCM event
+FRAME_BYTES = 8 * 1024  # per streamed FLAC event
+STREAMABLE = ("wav", "pcm", "flac")
+
+
+class Audio(NamedTuple):
+    """One recording to transcribe."""
+
+    media_uri: str  # s3://bucket/key
+    media_format: str
+    job_name: str
+    output_bucket: str
+    output_key: str
+    language_code: str = "en-US"
+
+
+class Transcript(NamedTuple):
+    text: str
+    confidences: List[float]  # one per word
+    partials: int = 0  # partial results seen before the final one
+
+
+class AlreadyStarted(Exception):
+    """A job with this name exists: the event was delivered before."""
+
+
+class Unsupported(Exception):
+    """The backend cannot transcribe this audio."""
+
+
+def split_uri(uri: str) -> Tuple[str, str]:
+    """``s3://bucket/key`` → ``(bucket, key)``."""
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    return bucket, key
+
+
+def to_document(job_name: str, transcript: Transcript) -> Dict[str, Any]:
+    """The transcript as an Amazon Transcribe output document."""
+    scores = transcript.confidences
+    items = [
+        {
+            "alternatives": [
+                {
+                    "confidence": f"{scores[i] if i < len(scores) else 1.0:.3f}",
+                    "content": word,
+                }
+            ],
+            "type": "pronunciation",
+        }
+        for i, word in enumerate(transcript.text.split())
+    ]
+    return {
+        "jobName": job_name,
+        "results": {"transcripts": [{"transcript": transcript.text}], "items": items},
+        "status": "COMPLETED",
+    }
+
+
+class BatchBackend:
+    """
+    ``start_transcription_job``; the result is written to the output key.
+
+    Args:
+        client: ``transcribe`` client, or a callable returning it
+    """
+
+    name = "batch"
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        return self._client() if callable(self._client) else self._client
+
+    def transcribe(self, audio: Audio) -> Optional[Transcript]:
+        client = self.client
+        try:
+            client.start_transcription_job(
+                TranscriptionJobName=audio.job_name,
+                LanguageCode=audio.language_code,
+                MediaFormat=audio.media_format,
+                Media={"MediaFileUri": audio.media_uri},
+                OutputBucketName=audio.output_bucket,
+                OutputKey=audio.output_key,
+                Settings={"ShowSpeakerLabels": False},
+            )
+        except client.exceptions.ConflictException as e:
+            raise AlreadyStarted(audio.job_name) from e
+        return None
+
+
+def available() -> bool:
+    """True when the ``amazon-transcribe`` package is importable."""
+    return TranscribeStreamingClient is not None
+
+
+def flac_rate(data: bytes) -> int:
+    """Sample rate from a FLAC STREAMINFO block."""
+    if data[:4] != b"fLaC" or len(data) < 21:
+        raise Unsupported("not a FLAC stream")
+    return (data[18] << 12) | (data[19] << 4) | (data[20] >> 4)
+
+
+def frames(data: bytes, fmt: str, pcm_rate: int) -> Tuple[str, int, List[bytes]]:
+    """
+    Split a recording into streaming events.
+
+    Returns:
+        Streaming ``media_encoding``, sample rate and the audio chunks
+    """
+    if fmt == "wav":
+        with wave.open(io.BytesIO(data)) as w:
+            if w.getnchannels() != 1 or w.getsampwidth() != 2:
+                raise Unsupported("WAV must be mono 16-bit")
+            rate, data = w.getframerate(), w.readframes(w.getnframes())
+    elif fmt == "pcm":
+        rate = pcm_rate
+    elif fmt == "flac":
+        rate = flac_rate(data)
+        return (
+            "flac",
+            rate,
+            [data[i : i + FRAME_BYTES] for i in range(0, len(data), FRAME_BYTES)],
+        )
+    else:
+        raise Unsupported(f"cannot stream {fmt}")
+    step = rate * 2 * FRAME_MS // 1000
+    return "pcm", rate, [data[i : i + step] for i in range(0, len(data), step)]
+
+
+def word_confidences(alternative: Any) -> List[float]:
+    """Per-word confidences of a streamed result; 1.0 where none is given."""
+    scores = []
+    for item in alternative.items or ():
+        if getattr(item, "item_type", "pronunciation") != "pronunciation":
+            continue
+        score = getattr(item, "confidence", None)
+        scores.append(float(score) if score is not None else 1.0)
+    return scores
+
+
+class _Collector(TranscriptResultStreamHandler):  # type: ignore[misc]
+    """Keeps the final results; counts partial ones."""
+
+    def __init__(self, stream: Any) -> None:
+        super().__init__(stream)
+        self.texts: List[str] = []
+        self.confidences: List[float] = []
+        self.partials = 0
+
+    async def handle_transcript_event(self, event: Any) -> None:
+        for result in event.transcript.results:
+            if result.is_partial:
+                self.partials += 1
+                continue
+            if not result.alternatives:
+                continue
+            best = result.alternatives[0]
+            self.texts.append(best.transcript)
+            self.confidences.extend(word_confidences(best))
+
+
+class StreamingBackend:
+    """
+    Amazon Transcribe streaming, with a batch job for other formats.
+
+    Args:
+        s3: S3 client the recording is read from
+        region: Region of the streaming endpoint
+        fallback: Backend for audio that cannot be streamed
+        pcm_rate: Sample rate of raw ``.pcm`` uploads
+        max_bytes: Larger recordings go to ``fallback``
+    """
+
+    name = "streaming"
+
+    def __init__(
+        self,
+        s3: Any,
+        region: str,
+        fallback: BatchBackend,
+        pcm_rate: int = 16000,
+        max_bytes: int = 10 << 20,
+    ) -> None:
+        self._s3 = s3
+        self.region = region
+        self.fallback = fallback
+        self.pcm_rate = pcm_rate
+        self.max_bytes = max_bytes
+
+    @property
+    def s3(self) -> Any:
+        return self._s3() if callable(self._s3) else self._s3
+
+    def transcribe(self, audio: Audio) -> Optional[Transcript]:
+        bucket, key = split_uri(audio.media_uri)
+        # Uploads that were not pre-processed carry MEDIA_FORMAT; trust the key
+        ext = key.rsplit(".", 1)[-1].lower()
+        fmt = audio.media_format if audio.media_format in STREAMABLE else ext
+        try:
+            if fmt not in STREAMABLE:
+                raise Unsupported(f"cannot stream {audio.media_format}")
+            obj = self.s3.get_object(Bucket=bucket, Key=key)
+            if obj["ContentLength"] > self.max_bytes:
+                raise Unsupported(f"{obj['ContentLength']} bytes")
+            encoding, rate, chunks = frames(obj["Body"].read(), fmt, self.pcm_rate)
+        except (Unsupported, wave.Error, EOFError) as e:
+            log.debug("Batch job for %s: %s", key, e)
+            return self.fallback.transcribe(audio)
+        return asyncio.run(self._stream(audio, encoding, rate, chunks))
+
+    async def _stream(
+        self, audio: Audio, encoding: str, rate: int, chunks: List[bytes]
+    ) -> Transcript:
+        client = TranscribeStreamingClient(region=self.region)
+        stream = await client.start_stream_transcription(
+            language_code=audio.language_code,
+            media_sample_rate_hz=rate,
+            media_encoding=encoding,
+        )
+
+        async def send() -> None:
+            for chunk in chunks:
+                await stream.input_stream.send_audio_event(audio_chunk=chunk)
+            await stream.input_stream.end_stream()
+
+        collector = _Collector(stream.output_stream)
+        await asyncio.gather(send(), collector.handle_events())
+        return Transcript(
+            " ".join(collector.texts), collector.confidences, collector.partials
+        )
+
+
+class LocalBackend:
+    """
+    Deterministic stand-in: the same transcript for the same key.
+
+    Args:
+        text: Transcript of every recording not in ``phrases``
+        phrases: Key suffix (e.g. ``"-rec.webm"``) → transcript
+    """
+
+    name = "local"
+
+    def __init__(self, text: str, phrases: Optional[Dict[str, str]] = None) -> None:
+        self.text = text
+        self.phrases = phrases or {}
+
+    def transcribe(self, audio: Audio) -> Optional[Transcript]:
+        _, key = split_uri(audio.media_uri)
+        text = next(
+            (t for suffix, t in self.phrases.items() if key.endswith(suffix)),
+            self.text,
+        )
+        return Transcript(text, [1.0] * len(text.split()))
+
+
+def backend(
+    name: str,
+    transcribe_client: Callable[[], Any],
+    s3_client: Callable[[], Any],
+    region: str,
+    pcm_rate: int = 16000,
+    local_text: str = "",
+) -> Any:
+    """
+    The backend called ``name`` (``batch``, ``streaming`` or ``local``).
+
+    ``streaming`` without the ``amazon-transcribe`` package is ``batch``.
+    """
+    batch = BatchBackend(transcribe_client)
+    if name == "local":
+        return LocalBackend(local_text)
+    if name == "streaming":
+        if available():
+            return StreamingBackend(s3_client, region, batch, pcm_rate)
+        log.warning("amazon-transcribe is not installed; using batch jobs")
+    elif name != "batch":
+        raise ValueError(f"Unknown ASR backend {name!r}")
+    return batch
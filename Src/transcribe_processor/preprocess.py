@@ -0,0 +1,182 @@
+"""
+Optional audio clean-up before Transcribe.
+
+Transcribe bills and queues by duration, and browser recordings often
+carry seconds of silence at both ends. For WAV, FLAC and raw PCM inputs
+this module trims leading/trailing silence with a vectorised energy VAD,
+downmixes to mono, resamples to 16 kHz and re-encodes compactly (FLAC
+when ``soundfile`` is installed, 16-bit WAV otherwise).
+
+Needs ``numpy``; ``soundfile`` adds FLAC input/output. Without numpy the
+stage reports itself unavailable and uploads are transcribed unchanged.
+"""
+
+import io
+import time
+import wave
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None  # type: ignore[assignment]
+
+try:
+    import soundfile
+except (ImportError, OSError):  # pragma: no cover - optional dependency
+    soundfile = None
+
+TARGET_RATE = 16000
+SUPPORTED = ("wav", "flac", "pcm")
+MIN_SECONDS = 0.1  # less audio than this after trimming is not worth submitting
+
+
+class Processed(NamedTuple):
+    data: bytes
+    media_format: str
+    stats: Dict[str, float]
+
+
+def available() -> bool:
+    """True when numpy is importable."""
+    return np is not None
+
+
+def media_format(key: str) -> Optional[str]:
+    """Supported input format from the key's extension, else None."""
+    ext = key.rsplit(".", 1)[-1].lower() if "." in key else ""
+    if ext == "flac" and soundfile is None:
+        return None
+    return ext if ext in SUPPORTED else None
+
+
+def decode(data: bytes, fmt: str, pcm_rate: int = TARGET_RATE) -> Tuple[Any, int]:
+    """
+    Decode to float32 samples shaped ``(frames, channels)`` in [-1, 1].
+
+    Raw PCM is taken to be mono signed 16-bit little-endian at ``pcm_rate``.
+    """
+    if fmt == "pcm":
+        pcm = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        return pcm.reshape(-1, 1), pcm_rate
+    if fmt == "flac":
+        samples, rate = soundfile.read(
+            io.BytesIO(data), dtype="float32", always_2d=True
+        )
+        return samples, rate
+    with wave.open(io.BytesIO(data)) as w:
+        width, channels, rate = w.getsampwidth(), w.getnchannels(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+    if width == 1:
+        pcm = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8
+        pcm = ints.astype(np.float32) / float(1 << 23)
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[width]
+        pcm = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+        pcm /= float(1 << (8 * width - 1))
+    return pcm.reshape(-1, channels), rate
+
+
+def downmix(samples: Any) -> Any:
+    """Average all channels into one."""
+    return samples.mean(axis=1, dtype=np.float32)
+
+
+def resample(mono: Any, rate: int, target: int = TARGET_RATE) -> Any:
+    """
+    Resample with linear interpolation.
+
+    When downsampling, a moving average of about one output period is
+    applied first as a cheap anti-aliasing filter.
+    """
+    if rate == target or mono.size == 0:
+        return mono
+    if rate > target:
+        width = int(round(rate / target))
+        if width > 1:
+            csum = np.cumsum(np.concatenate(([0.0], mono)), dtype=np.float64)
+            smoothed = (csum[width:] - csum[:-width]) / width
+            mono = np.concatenate((mono[: width - 1], smoothed.astype(np.float32)))
+    n_out = int(round(mono.size * target / rate))
+    positions = np.arange(n_out, dtype=np.float64) * (rate / target)
+    return np.interp(positions, np.arange(mono.size), mono).astype(np.float32)
+
+
+def trim_silence(
+    mono: Any,
+    rate: int,
+    frame_ms: int = 20,
+    threshold_db: float = -35.0,
+    pad_ms: int = 250,
+) -> Any:
+    """
+    Drop leading and trailing frames quieter than ``threshold_db``.
+
+    The threshold is relative to the loudest frame, so it adapts to the
+    recording level; ``pad_ms`` of audio is kept around the speech.
+    """
+    frame = max(int(rate * frame_ms / 1000), 1)
+    n = mono.size // frame
+    if n == 0:
+        return mono
+    energy = np.sqrt(np.mean(mono[: n * frame].reshape(n, frame) ** 2, axis=1))
+    peak = float(energy.max())
+    if peak <= 0:
+        return mono[:0]
+    loud = np.flatnonzero(
+        20 * np.log10(np.maximum(energy / peak, 1e-10)) > threshold_db
+    )
+    pad = int(rate * pad_ms / 1000)
+    start = max(int(loud[0]) * frame - pad, 0)
+    end = min((int(loud[-1]) + 1) * frame + pad, mono.size)
+    return mono[start:end]
+
+
+def encode(mono: Any, rate: int = TARGET_RATE) -> Tuple[bytes, str]:
+    """Encode mono float samples as FLAC if possible, else 16-bit WAV."""
+    pcm16 = (np.clip(mono, -1.0, 1.0) * 32767).astype("<i2")
+    out = io.BytesIO()
+    if soundfile is not None:
+        soundfile.write(out, pcm16, rate, format="FLAC", subtype="PCM_16")
+        return out.getvalue(), "flac"
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm16.tobytes())
+    return out.getvalue(), "wav"
+
+
+def preprocess(data: bytes, fmt: str, pcm_rate: int = TARGET_RATE) -> Processed:
+    """
+    Trim, downmix, resample and re-encode one recording.
+
+    Returns:
+        Encoded audio, its Transcribe ``MediaFormat`` and size/duration stats
+
+    Raises:
+        ValueError: Less than ``MIN_SECONDS`` of audio is left after trimming
+            (e.g. a muted microphone), so the original should be used
+    """
+    started = time.perf_counter()
+    samples, rate = decode(data, fmt, pcm_rate)
+    in_seconds = samples.shape[0] / rate if rate else 0.0
+    mono = resample(downmix(samples), rate)
+    mono = trim_silence(mono, TARGET_RATE)
+    if mono.size < MIN_SECONDS * TARGET_RATE:
+        raise ValueError(f"{mono.size / TARGET_RATE:.3f}s of audio after trimming")
+    encoded, out_format = encode(mono)
+    return Processed(
+        encoded,
+        out_format,
+        {
+            "bytes_in": len(data),
+            "bytes_out": len(encoded),
+            "seconds_in": round(in_seconds, 3),
+            "seconds_out": round(mono.size / TARGET_RATE, 3),
+            "ms": round((time.perf_counter() - started) * 1000, 2),
+        },
+    )
@@ -0,0 +1,176 @@
+"""
+Assembly of recordings uploaded in numbered segments.
+
+The client can upload a recording while it is still being captured::
+
+    audio-store/<sessionID>/<recording>/part-00000.webm
+    audio-store/<sessionID>/<recording>/part-00001.webm
+    ...
+    audio-store/<sessionID>/<recording>/manifest.json  {"parts": N, "format": "webm"}
+
+Segments may arrive in any order and the manifest may arrive before the
+last segment, so every event for a recording checks whether the set is
+complete; whichever event completes it stitches the segments, in index
+order, into one object. Segment bodies are streamed through a buffer of
+one part into a multipart upload, so memory stays bounded however long
+the recording is. Recordings smaller than one part are written with a
+single PUT.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+log = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+PART_RE = re.compile(r"^part-(\d{1,5})\.([0-9A-Za-z]{1,8})$")
+MAX_PARTS = 10000  # S3 multipart limit; also bounds a bogus manifest
+MIN_PART_SIZE = 5 << 20  # S3 minimum for all but the last part
+READ_CHUNK = 1 << 20
+
+
+class Incomplete(Exception):
+    """The manifest names segments that have not been uploaded (yet)."""
+
+    def __init__(self, missing: List[int]) -> None:
+        super().__init__(f"{len(missing)} segment(s) missing")
+        self.missing = missing
+
+
+class Stitched(NamedTuple):
+    key: str
+    etag: str
+    size: int
+    parts: int
+
+
+def recording_prefix(key: str) -> Optional[str]:
+    """Return ``<...>/<recording>/`` for a segment or manifest key, else None."""
+    head, sep, name = key.rpartition("/")
+    if not sep or not (name == MANIFEST or PART_RE.match(name)):
+        return None
+    return head + "/"
+
+
+def read_manifest(s3: Any, bucket: str, prefix: str) -> Optional[Dict[str, Any]]:
+    """
+    Load and validate the recording's manifest.
+
+    Returns:
+        ``{"parts": int, "format": str}``, or None if it is not there yet
+
+    Raises:
+        ValueError: If the manifest is malformed
+    """
+    try:
+        body = s3.get_object(Bucket=bucket, Key=prefix + MANIFEST)["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        return None
+    manifest = json.loads(body)
+    parts, fmt = manifest.get("parts"), manifest.get("format", "webm")
+    if not isinstance(parts, int) or not 0 < parts <= MAX_PARTS:
+        raise ValueError(f"Bad segment count in {prefix}{MANIFEST}: {parts!r}")
+    if not isinstance(fmt, str) or not re.fullmatch(r"[0-9A-Za-z]{1,8}", fmt):
+        raise ValueError(f"Bad format in {prefix}{MANIFEST}: {fmt!r}")
+    return {"parts": parts, "format": fmt}
+
+
+def list_parts(s3: Any, bucket: str, prefix: str) -> Dict[int, str]:
+    """Map segment index → key for every segment uploaded under ``prefix``."""
+    found: Dict[int, str] = {}
+    pages = s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix)
+    for page in pages:
+        for obj in page.get("Contents", []):
+            match = PART_RE.match(obj["Key"][len(prefix) :])
+            if match:
+                found[int(match.group(1))] = obj["Key"]
+    return found
+
+
+def stitch(
+    s3: Any, bucket: str, prefix: str, dest_stem: str, part_size: int = MIN_PART_SIZE
+) -> Optional[Stitched]:
+    """
+    Concatenate a recording's segments into one object once all are there.
+
+    Args:
+        s3: S3 client
+        bucket: Bucket holding the segments (and receiving the result)
+        prefix: Recording prefix, as returned by :func:`recording_prefix`
+        dest_stem: Key of the stitched object minus the extension, which is
+            taken from the manifest's ``format``
+        part_size: Multipart part size (at least 5 MiB)
+
+    Returns:
+        The stitched object, or None while the manifest has not arrived
+
+    Raises:
+        Incomplete: If the manifest names segments not uploaded yet
+    """
+    manifest = read_manifest(s3, bucket, prefix)
+    if manifest is None:
+        return None
+    found = list_parts(s3, bucket, prefix)
+    missing = [i for i in range(manifest["parts"]) if i not in found]
+    if missing:
+        raise Incomplete(missing)
+
+    dest_key = f"{dest_stem}.{manifest['format']}"
+    part_size = max(part_size, MIN_PART_SIZE)
+    upload_id: Optional[str] = None
+    etags: List[Dict[str, Any]] = []
+    buf = bytearray()
+    size = 0
+
+    def flush(data: bytes) -> None:
+        nonlocal upload_id
+        if upload_id is None:
+            upload_id = s3.create_multipart_upload(Bucket=bucket, Key=dest_key)[
+                "UploadId"
+            ]
+        number = len(etags) + 1
+        resp = s3.upload_part(
+            Bucket=bucket,
+            Key=dest_key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        etags.append({"PartNumber": number, "ETag": resp["ETag"]})
+
+    try:
+        for index in range(manifest["parts"]):
+            body = s3.get_object(Bucket=bucket, Key=found[index])["Body"]
+            for chunk in body.iter_chunks(READ_CHUNK):
+                buf += chunk
+                size += len(chunk)
+                while len(buf) >= part_size:
+                    flush(bytes(buf[:part_size]))
+                    del buf[:part_size]
+        if upload_id is None:
+            # Short recording: one PUT, no multipart bookkeeping
+            etag = s3.put_object(Bucket=bucket, Key=dest_key, Body=bytes(buf))["ETag"]
+        else:
+            if buf:
+                flush(bytes(buf))
+            etag = s3.complete_multipart_upload(
+                Bucket=bucket,
+                Key=dest_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": etags},
+            )["ETag"]
+    except Exception:
+        if upload_id is not None:
+            s3.abort_multipart_upload(Bucket=bucket, Key=dest_key, UploadId=upload_id)
+        raise
+
+    log.info(
+        "Stitched %d segment(s) of %s into %s (%d bytes)",
+        manifest["parts"],
+        prefix,
+        dest_key,
+        size,
+    )
+    return Stitched(dest_key, etag.strip('"'), size, manifest["parts"])
@@ -0,0 +1,110 @@
+"""
+Content-addressed cache of finished transcripts.
+
+Identical audio (canned kiosk prompts, client retries, synthetic monitors)
+yields an identical S3 ETag. The first upload records where its Transcribe
+output will land; later uploads with the same content copy that transcript
+straight to their own ``transcribe-output/`` key, which triggers the intent
+stage without a new Transcribe job.
+
+An entry is written when the first job starts, so a duplicate that
+arrives while that job is still running finds no transcript yet. It runs
+its own job but leaves the entry alone; only entries whose job should have
+finished long ago, or whose copy fails for another reason, are dropped.
+
+Table layout: hash key ``contentHash`` (S), TTL attribute ``ttl``.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+def content_hash(record: Dict[str, Any], language: str) -> Optional[str]:
+    """Cache key for an S3 record's object content, or None without an ETag."""
+    obj = record["object"]
+    digest = obj.get("eTag") or obj.get("checksumSHA256")
+    return f"{language}#{digest.strip(chr(34))}" if digest else None
+
+
+class TranscriptCache:
+    """
+    Map audio content hashes to the S3 key of their transcript.
+
+    Args:
+        table: DynamoDB table resource, or None to disable the cache
+        s3: S3 client used to copy cached transcripts
+        ttl: Seconds an entry is kept
+        job_timeout: Seconds after which a job's transcript must exist
+    """
+
+    def __init__(
+        self, table: Any, s3: Any, ttl: int = 7 * 86400, job_timeout: int = 900
+    ) -> None:
+        self.table = table
+        self.s3 = s3
+        self.ttl = ttl
+        self.job_timeout = job_timeout
+        self.hits = 0
+        self.misses = 0
+
+    def copy_cached(self, digest: str, bucket: str, key: str) -> bool:
+        """
+        Copy the cached transcript for ``digest`` to ``bucket``/``key``.
+
+        Returns:
+            True on a hit; False if there is no entry or no transcript yet.
+            The entry is dropped when the transcript is missing although its
+            job started more than ``job_timeout`` seconds ago (job failed or
+            object expired), or when the copy fails for any other reason
+        """
+        if self.table is None:
+            return False
+        item = self.table.get_item(Key={"contentHash": digest}).get("Item")
+        now = time.time()
+        if not item or int(item.get("ttl", 0)) <= now:
+            self.misses += 1
+            return False
+        source = {"Bucket": item["bucket"], "Key": item["transcriptKey"]}
+        try:
+            self.s3.copy_object(CopySource=source, Bucket=bucket, Key=key)
+        except self.s3.exceptions.ClientError as e:
+            self.misses += 1
+            code = e.response.get("Error", {}).get("Code")
+            started = int(item.get("startedAt", 0))
+            if code in ("NoSuchKey", "404") and now - started < self.job_timeout:
+                log.debug("No transcript at %s yet; job still running", source["Key"])
+                return False
+            log.info("Cached transcript %s unusable – %s", source["Key"], e)
+            self.table.delete_item(Key={"contentHash": digest})
+            return False
+        self.hits += 1
+        return True
+
+    def remember(self, digest: str, bucket: str, key: str) -> None:
+        """
+        Record that the transcript for ``digest`` will be at ``key``.
+
+        A live entry is kept: duplicates started while the first job runs
+        must not keep replacing each other's entries.
+        """
+        if self.table is None:
+            return
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={
+                    "contentHash": digest,
+                    "bucket": bucket,
+                    "transcriptKey": key,
+                    "startedAt": now,
+                    "ttl": now + self.ttl,
+                },
+                ConditionExpression="attribute_not_exists(contentHash) OR #t <= :now",
+                ExpressionAttributeNames={"#t": "ttl"},
+                ExpressionAttributeValues={":now": now},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            log.debug("Transcript for %s already expected elsewhere", digest)
@@ -0,0 +1,10 @@
+"""
+Long-running worker that runs the VoiceNav pipeline outside Lambda.
+
+    PYTHONPATH=Src python -m worker --queue-url https://sqs…/voicenav-events
+    PYTHONPATH=Src python -m worker --spool /var/spool/voicenav --processes 4
+
+The unchanged Lambda handlers are loaded once per process and fed S3
+events pulled from a queue; intents are pushed to browsers over a local
+WebSocket server instead of the API Gateway management API.
+"""
@@ -0,0 +1,255 @@
+"""
+A small local WebSocket server standing in for API Gateway.
+
+Browsers connect exactly as they would to the API Gateway endpoint
+(``ws://host:port/?session=<id>``). Connect, disconnect, ``register`` and
+``heartbeat`` messages are handed to callbacks (the worker runs the ``store_conn``
+handler with the matching API Gateway event), and intents posted through
+``LocalManagementApi`` are written back to the socket.
+
+Only what the VoiceNav client needs from RFC 6455 is implemented: the
+opening handshake, text and close frames, ping/pong and fragmented client
+messages. Server frames are never masked or fragmented.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import queue
+import struct
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+log = logging.getLogger(__name__)
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE = 128 * 1024  # API Gateway's WebSocket message limit
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0, 1, 2, 8, 9, 10
+
+
+class LocalManagementApi:
+    """
+    ``apigatewaymanagementapi`` stand-in that queues posts for the server.
+
+    Posts become ``(connection_id, data)`` tuples on ``outbox``, which may
+    be a ``multiprocessing`` queue so handlers in worker processes can post
+    too. With ``is_open`` a post to a closed connection raises
+    ``GoneException``, as API Gateway does, and the stale item is removed.
+    """
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def __init__(
+        self, outbox: Any, is_open: Optional[Callable[[str], bool]] = None
+    ) -> None:
+        self.outbox = outbox
+        self.is_open = is_open
+
+    def post_to_connection(self, ConnectionId: str, Data: bytes) -> Dict[str, Any]:
+        if self.is_open is not None and not self.is_open(ConnectionId):
+            raise self.exceptions.GoneException(ConnectionId)
+        self.outbox.put((ConnectionId, bytes(Data)))
+        return {}
+
+    def get_connection(self, ConnectionId: str) -> Dict[str, Any]:
+        if self.is_open is not None and not self.is_open(ConnectionId):
+            raise self.exceptions.GoneException(ConnectionId)
+        return {}
+
+
+def accept_key(key: str) -> str:
+    """``Sec-WebSocket-Accept`` for a client's ``Sec-WebSocket-Key``."""
+    digest = hashlib.sha1((key + _GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(payload: bytes, opcode: int = OP_TEXT) -> bytes:
+    """One unmasked, final server frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """
+    Read one frame.
+
+    Returns:
+        ``(fin, opcode, unmasked payload)``
+
+    Raises:
+        ValueError: If the frame is larger than MAX_MESSAGE
+        asyncio.IncompleteReadError: If the peer went away mid-frame
+    """
+    b1, b2 = await reader.readexactly(2)
+    n = b2 & 0x7F
+    if n == 126:
+        (n,) = struct.unpack("!H", await reader.readexactly(2))
+    elif n == 127:
+        (n,) = struct.unpack("!Q", await reader.readexactly(8))
+    if n > MAX_MESSAGE:
+        raise ValueError(f"frame of {n} bytes")
+    mask = await reader.readexactly(4) if b2 & 0x80 else b""
+    data = await reader.readexactly(n)
+    if mask and n:
+        key = (mask * (n // 4 + 1))[:n]
+        data = (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(
+            n, "big"
+        )
+    return bool(b1 & 0x80), b1 & 0x0F, data
+
+
+Callback = Callable[..., Awaitable[int]]
+
+
+class LocalSocketServer:
+    """
+    Accept WebSocket clients and deliver posts to them.
+
+    Args:
+        on_connect: ``(connection_id, query params)`` → HTTP-style status;
+            anything but 200 refuses the connection
+        on_message: ``(connection_id, route, body)`` → status, where route
+            is the message's ``action`` (API Gateway's route selection)
+        on_disconnect: ``(connection_id)`` → status
+    """
+
+    def __init__(
+        self, on_connect: Callback, on_message: Callback, on_disconnect: Callback
+    ) -> None:
+        self.on_connect = on_connect
+        self.on_message = on_message
+        self.on_disconnect = on_disconnect
+        self._writers: Dict[str, asyncio.StreamWriter] = {}
+        self.sent = 0
+        self.dropped = 0
+
+    def is_open(self, connection_id: str) -> bool:
+        return connection_id in self._writers
+
+    @property
+    def connections(self) -> int:
+        return len(self._writers)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> Any:
+        """Listen on ``host:port``; returns the ``asyncio`` server."""
+        return await asyncio.start_server(self._serve, host, port)
+
+    async def send(self, connection_id: str, data: bytes) -> bool:
+        """Write one text message; False if the connection is gone."""
+        writer = self._writers.get(connection_id)
+        if writer is None:
+            self.dropped += 1
+            return False
+        try:
+            writer.write(encode_frame(data))
+            await writer.drain()
+        except ConnectionError:
+            self.dropped += 1
+            return False
+        self.sent += 1
+        return True
+
+    async def drain_outbox(self, outbox: Any, poll: float = 0.2) -> None:
+        """Forward ``LocalManagementApi`` posts until cancelled."""
+        while True:
+            try:
+                cid, data = await asyncio.to_thread(outbox.get, True, poll)
+            except queue.Empty:
+                continue
+            await self.send(cid, data)
+
+    async def _handshake(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, Dict[str, str]]]:
+        """The client's key and query parameters, None if not an upgrade."""
+        request = await reader.readuntil(b"\r\n\r\n")
+        lines = request.decode("latin-1").split("\r\n")
+        parts = lines[0].split()
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if len(parts) < 2 or parts[0] != "GET" or not key:
+            return None
+        return key, dict(parse_qsl(urlsplit(parts[1]).query))
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        cid = base64.urlsafe_b64encode(uuid.uuid4().bytes[:9]).decode()
+        try:
+            upgrade = await self._handshake(reader)
+            if upgrade is None:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                return
+            key, params = upgrade
+            # Like API Gateway, $connect decides before the upgrade
+            if await self.on_connect(cid, params) != 200:
+                writer.write(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n\r\n")
+                return
+            writer.write(
+                (
+                    "HTTP/1.1 101 Switching Protocols\r\n"
+                    "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+                ).encode()
+            )
+            self._writers[cid] = writer
+            await self._receive(cid, reader, writer)
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ConnectionError,
+            ValueError,
+        ) as e:
+            log.info("Connection %s dropped – %s", cid, e)
+        finally:
+            if self._writers.pop(cid, None) is not None:
+                await self.on_disconnect(cid)
+            writer.close()
+
+    async def _receive(
+        self,
+        cid: str,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        parts = []
+        while True:
+            fin, opcode, data = await read_frame(reader)
+            if opcode == OP_CLOSE:
+                writer.write(encode_frame(data[:2], OP_CLOSE))
+                await writer.drain()
+                return
+            if opcode == OP_PING:
+                writer.write(encode_frame(data, OP_PONG))
+                continue
+            if opcode in (OP_TEXT, OP_BINARY, OP_CONT):
+                parts.append(data)
+                if sum(map(len, parts)) > MAX_MESSAGE:
+                    raise ValueError("message too large")
+                if fin:
+                    await self._message(cid, b"".join(parts).decode())
+                    parts = []
+
+    async def _message(self, cid: str, body: str) -> None:
+        try:
+            route = json.loads(body).get("action", "$default")
+        except (ValueError, AttributeError):
+            route = "$default"
+        status = await self.on_message(cid, route, body)
+        if status != 200:
+            log.info("Message from %s on %s answered %s", cid, route, status)
@@ -0,0 +1,212 @@
+"""
+Event sources for the worker.
+
+Each source hands out S3 notification events (``{"Records": [...]}``) as
+``Message``s that are acknowledged once every record was handled, or
+released for another attempt if any record failed:
+
+- ``SqsQueue``: the queue S3 already notifies in production; long polling,
+  delete on ack, visibility reset on nack.
+- ``FileQueue``: a spool directory, one JSON event per file, claimed by an
+  atomic rename so several workers can share it; survives restarts.
+- ``MemoryQueue``: in-process, for embedding and tests.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from core import clients
+
+log = logging.getLogger(__name__)
+
+
+class Message(NamedTuple):
+    id: str
+    event: Dict[str, Any]
+    receipt: Any  # source-specific handle used by ack/nack
+    attempt: int = 1
+
+
+class MemoryQueue:
+    """Unbounded in-process queue; nacked events go to the back."""
+
+    def __init__(self, max_attempts: int = 3) -> None:
+        self.max_attempts = max_attempts
+        self.dead: List[Dict[str, Any]] = []
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue()
+
+    def put(self, event: Dict[str, Any]) -> None:
+        self._queue.put_nowait(Message(uuid.uuid4().hex, event, None))
+
+    async def receive(self, max_messages: int = 10, wait: float = 1.0) -> List[Message]:
+        if self._queue.empty():
+            try:
+                first = await asyncio.wait_for(self._queue.get(), wait)
+            except asyncio.TimeoutError:
+                return []
+        else:
+            first = self._queue.get_nowait()
+        batch = [first]
+        while len(batch) < max_messages and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def ack(self, message: Message) -> None:
+        return None
+
+    async def nack(self, message: Message) -> None:
+        if message.attempt >= self.max_attempts:
+            self.dead.append(message.event)
+            return
+        self._queue.put_nowait(message._replace(attempt=message.attempt + 1))
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+
+class FileQueue:
+    """
+    Spool directory with ``incoming/``, ``processing/`` and ``failed/``.
+
+    Producers write an event to ``incoming/`` (``put`` writes to a temp
+    name and renames, so readers never see partial files). A worker claims
+    a file by renaming it into ``processing/``; ack deletes it, nack moves
+    it back with its attempt count bumped, or into ``failed/`` after
+    ``max_attempts``. Files left in ``processing/`` by a crashed worker are
+    returned to ``incoming/`` by ``recover``.
+
+    Args:
+        root: Spool directory (created if missing)
+        max_attempts: Attempts before an event is moved to ``failed/``
+        poll: Seconds between directory scans while idle
+    """
+
+    def __init__(self, root: str, max_attempts: int = 3, poll: float = 0.2) -> None:
+        self.root = root
+        self.max_attempts = max_attempts
+        self.poll = poll
+        for sub in ("incoming", "processing", "failed"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def _path(self, sub: str, name: str = "") -> str:
+        return os.path.join(self.root, sub, name)
+
+    def put(self, event: Dict[str, Any]) -> str:
+        """Spool one event; returns its file name."""
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.1.json"
+        tmp = self._path("incoming", f".{name}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(event, f)
+        os.replace(tmp, self._path("incoming", name))
+        return name
+
+    def recover(self) -> int:
+        """Return abandoned ``processing/`` files to ``incoming/``."""
+        names = os.listdir(self._path("processing"))
+        for name in names:
+            os.replace(self._path("processing", name), self._path("incoming", name))
+        return len(names)
+
+    def _claim(self, max_messages: int) -> List[Message]:
+        batch: List[Message] = []
+        for name in sorted(os.listdir(self._path("incoming"))):
+            if len(batch) >= max_messages:
+                break
+            if name.startswith("."):
+                continue
+            claimed = self._path("processing", name)
+            try:
+                os.rename(self._path("incoming", name), claimed)
+            except FileNotFoundError:
+                continue  # another worker got it
+            try:
+                with open(claimed) as f:
+                    event = json.load(f)
+            except ValueError:
+                log.error("Unreadable spool file %s", name)
+                os.replace(claimed, self._path("failed", name))
+                continue
+            attempt = int(name.rsplit(".", 2)[-2])
+            batch.append(Message(name, event, name, attempt))
+        return batch
+
+    async def receive(self, max_messages: int = 10, wait: float = 1.0) -> List[Message]:
+        deadline = time.monotonic() + wait
+        while True:
+            batch = await asyncio.to_thread(self._claim, max_messages)
+            if batch or time.monotonic() >= deadline:
+                return batch
+            await asyncio.sleep(self.poll)
+
+    async def ack(self, message: Message) -> None:
+        try:
+            os.remove(self._path("processing", message.receipt))
+        except FileNotFoundError:
+            pass
+
+    async def nack(self, message: Message) -> None:
+        name = message.receipt
+        if message.attempt >= self.max_attempts:
+            os.replace(self._path("processing", name), self._path("failed", name))
+            return
+        stem = name.rsplit(".", 2)[0]
+        retry = f"{stem}.{message.attempt + 1}.json"
+        os.replace(self._path("processing", name), self._path("incoming", retry))
+
+    def __len__(self) -> int:
+        return sum(not n.startswith(".") for n in os.listdir(self._path("incoming")))
+
+
+class SqsQueue:
+    """
+    SQS queue receiving S3 notifications (or the same JSON sent by hand).
+
+    Redelivery and dead-lettering are left to the queue's visibility
+    timeout and redrive policy, as for the Lambda event source mapping.
+
+    Args:
+        url: Queue URL
+        client: SQS client (default: the shared pooled client)
+    """
+
+    def __init__(self, url: str, client: Optional[Any] = None) -> None:
+        self.url = url
+        self.sqs = client or clients.client("sqs")
+
+    async def receive(self, max_messages: int = 10, wait: float = 1.0) -> List[Message]:
+        rsp = await asyncio.to_thread(
+            self.sqs.receive_message,
+            QueueUrl=self.url,
+            MaxNumberOfMessages=max(1, min(max_messages, 10)),
+            WaitTimeSeconds=max(0, min(int(wait), 20)),
+            AttributeNames=["ApproximateReceiveCount"],
+        )
+        batch = []
+        for m in rsp.get("Messages", []):
+            attempt = int(m.get("Attributes", {}).get("ApproximateReceiveCount", 1))
+            try:
+                event = json.loads(m["Body"])
+            except ValueError:
+                log.error("Dropping non-JSON message %s", m["MessageId"])
+                await self.ack(Message(m["MessageId"], {}, m["ReceiptHandle"]))
+                continue
+            batch.append(Message(m["MessageId"], event, m["ReceiptHandle"], attempt))
+        return batch
+
+    async def ack(self, message: Message) -> None:
+        await asyncio.to_thread(
+            self.sqs.delete_message, QueueUrl=self.url, ReceiptHandle=message.receipt
+        )
+
+    async def nack(self, message: Message) -> None:
+        await asyncio.to_thread(
+            self.sqs.change_message_visibility,
+            QueueUrl=self.url,
+            ReceiptHandle=message.receipt,
+            VisibilityTimeout=0,
+        )
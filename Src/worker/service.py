@@ -0,0 +1,280 @@
+"""
+asyncio worker: queue → pipeline stages → local WebSocket clients.
+
+Messages are pulled from the source in batches and each is split by key
+prefix into one sub-event per stage; the sub-events run the Lambda
+handlers on a thread pool (clients and warm caches shared in-process) or,
+with ``processes`` > 0, on a process pool whose workers each load the
+stages once. At most ``concurrency`` messages are in flight. A message is
+acknowledged when no record of it failed, else released for redelivery,
+mirroring ``batchItemFailures`` under an SQS event source mapping.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set
+
+from core import logs
+from worker.local_ws import LocalSocketServer
+from worker.queues import FileQueue, Message, SqsQueue
+from worker.stages import (
+    STAGES,
+    init_process,
+    load_app,
+    load_stages,
+    run_stage,
+    split_event,
+)
+
+log = logging.getLogger(__name__)
+
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "16"))
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", "0"))  # 0 = threads
+WORKER_STAGES = os.environ.get("WORKER_STAGES", ",".join(STAGES))
+WORKER_QUEUE_URL = os.environ.get("WORKER_QUEUE_URL", "")
+WORKER_SPOOL_DIR = os.environ.get("WORKER_SPOOL_DIR", "")
+WORKER_WS_HOST = os.environ.get("WORKER_WS_HOST", "127.0.0.1")
+WORKER_WS_PORT = int(os.environ.get("WORKER_WS_PORT", "8765"))
+
+
+class Worker:
+    """
+    Run queued S3 events through the pipeline stages.
+
+    Args:
+        source: ``SqsQueue``, ``FileQueue`` or ``MemoryQueue``
+        stages: Stage names, in pipeline order
+        concurrency: Messages in flight at once
+        processes: Worker processes (0 runs the stages on threads here)
+        outbox: Queue that receives WebSocket posts (created if None)
+        is_open: Connection liveness check for thread mode
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        stages: Sequence[str] = tuple(STAGES),
+        concurrency: int = 16,
+        processes: int = 0,
+        outbox: Optional[Any] = None,
+        is_open: Optional[Any] = None,
+    ) -> None:
+        self.source = source
+        self.names = list(stages)
+        self.concurrency = concurrency
+        self.processes = processes
+        self._manager: Optional[Any] = None
+        if outbox is None and processes:
+            self._manager = multiprocessing.Manager()
+            outbox = self._manager.Queue()
+        self.outbox = outbox if outbox is not None else queue.Queue()
+        init_process(self.names, self.outbox, is_open)
+        self.stages = load_stages(self.names)  # prefixes for routing
+        self.executor: Executor
+        if processes:
+            self.executor = ProcessPoolExecutor(
+                processes,
+                initializer=init_process,
+                initargs=(self.names, self.outbox),
+            )
+        else:
+            self.executor = ThreadPoolExecutor(concurrency)
+        self.counts = {
+            "received": 0,
+            "acked": 0,
+            "nacked": 0,
+            "records": 0,
+            "failed_records": 0,
+            "unrouted": 0,
+        }
+        self._latency: Deque[float] = deque(maxlen=1024)
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    async def handle(self, message: Message) -> bool:
+        """Run one message through its stages; ack or nack it. True if acked."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        parts, unrouted = split_event(self.stages, message.event)
+        self.counts["unrouted"] += unrouted
+        ok = True
+        for stage, event in parts:
+            try:
+                result = await loop.run_in_executor(
+                    self.executor, run_stage, stage.name, event
+                )
+            except Exception:
+                log.exception("Stage %s failed on message %s", stage.name, message.id)
+                ok = False
+                continue
+            failed = result.get("batchItemFailures") or []
+            self.counts["records"] += len(result.get("results", []))
+            self.counts["failed_records"] += len(failed)
+            ok = ok and not failed
+        if ok:
+            await self.source.ack(message)
+            self.counts["acked"] += 1
+        else:
+            await self.source.nack(message)
+            self.counts["nacked"] += 1
+        self._latency.append(time.perf_counter() - started)
+        return ok
+
+    async def _run_one(self, message: Message) -> None:
+        try:
+            await self.handle(message)
+        except Exception:
+            log.exception("Message %s could not be settled", message.id)
+
+    async def run(self, stop: asyncio.Event, wait: float = 1.0) -> None:
+        """Pull and process messages until ``stop`` is set, then drain."""
+        log.info(
+            "Worker running %s with concurrency %d on %s",
+            ", ".join(self.names),
+            self.concurrency,
+            f"{self.processes} processes" if self.processes else "threads",
+        )
+        while not stop.is_set():
+            free = self.concurrency - len(self._tasks)
+            if free <= 0:
+                await asyncio.wait(self._tasks, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            batch = await self.source.receive(min(free, 10), wait)
+            self.counts["received"] += len(batch)
+            for message in batch:
+                task = asyncio.create_task(self._run_one(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        await self.drain()
+
+    async def drain(self) -> None:
+        """Wait for in-flight messages."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        recent = sorted(self._latency)
+
+        def pct(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(1000 * recent[min(len(recent) - 1, int(len(recent) * p))], 1)
+
+        return {
+            **self.counts,
+            "in_flight": len(self._tasks),
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+        }
+
+
+# ── WebSocket glue: the store_conn handler behind the local server ──────
+def ws_event(
+    event_type: str,
+    connection_id: str,
+    route: str,
+    body: Optional[str] = None,
+    params: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """The API Gateway WebSocket event the ``store_conn`` Lambda expects."""
+    return {
+        "requestContext": {
+            "connectionId": connection_id,
+            "eventType": event_type,
+            "routeKey": route,
+        },
+        "queryStringParameters": params or None,
+        "body": body,
+    }
+
+
+def connection_server() -> LocalSocketServer:
+    """A local WebSocket server whose lifecycle runs ``store_conn``."""
+    store = load_app("store_conn")
+
+    async def call(event: Dict[str, Any]) -> int:
+        result = await asyncio.to_thread(store.lambda_handler, event, None)
+        return int(result.get("statusCode", 500))
+
+    async def on_connect(cid: str, params: Dict[str, str]) -> int:
+        return await call(ws_event("CONNECT", cid, "$connect", params=params))
+
+    async def on_message(cid: str, route: str, body: str) -> int:
+        return await call(ws_event("MESSAGE", cid, route, body))
+
+    async def on_disconnect(cid: str) -> int:
+        return await call(ws_event("DISCONNECT", cid, "$disconnect"))
+
+    return LocalSocketServer(on_connect, on_message, on_disconnect)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    source: Any
+    if args.queue_url:
+        source = SqsQueue(args.queue_url)
+    else:
+        source = FileQueue(args.spool)
+        recovered = source.recover()
+        if recovered:
+            log.info("Requeued %d events abandoned in processing/", recovered)
+
+    server = connection_server()
+    worker = Worker(
+        source,
+        [s.strip() for s in args.stages.split(",") if s.strip()],
+        args.concurrency,
+        args.processes,
+        is_open=server.is_open,
+    )
+    listener = await server.start(args.ws_host, args.ws_port)
+    log.info("WebSocket server on ws://%s:%d", args.ws_host, args.ws_port)
+    forward = asyncio.create_task(server.drain_outbox(worker.outbox))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await worker.run(stop)
+    finally:
+        listener.close()
+        forward.cancel()
+        await asyncio.gather(forward, return_exceptions=True)
+        log.info("Worker stopped %s, sent %d", worker.stats, server.sent)
+        await asyncio.to_thread(worker.close)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m worker", description="Run the VoiceNav pipeline as a service"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--queue-url", default=WORKER_QUEUE_URL, help="SQS queue")
+    source.add_argument("--spool", default=WORKER_SPOOL_DIR, help="spool directory")
+    parser.add_argument("--stages", default=WORKER_STAGES)
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES)
+    parser.add_argument("--ws-host", default=WORKER_WS_HOST)
+    parser.add_argument("--ws-port", type=int, default=WORKER_WS_PORT)
+    args = parser.parse_args(argv)
+    if not (args.queue_url or args.spool):
+        parser.error("one of --queue-url or --spool is required")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    logs.configure()
+    asyncio.run(serve(parse_args(argv)))
@@ -0,0 +1,159 @@
+"""
+The Lambda handlers as in-process pipeline stages.
+
+Every Lambda directory has its own ``app.py`` that imports its siblings as
+top-level modules, so a stage is loaded the way the Lambda runtime would:
+with its directory briefly on ``sys.path``, registered as
+``<package>_app``. The handlers and their cached clients are then reused
+for every event the process handles; nothing is forked from them.
+
+Worker processes (``--processes``) load the stages in ``init_process`` and
+receive only ``(stage name, event)`` pairs, so the pool never pickles
+modules or clients.
+
+Transcripts a streaming or local ASR backend hands over with a Lambda
+invoke (``INTENT_FUNCTION``) run through the intent stage of the same
+process; no function of that name has to exist.
+"""
+
+import importlib.util
+import io
+import json
+import logging
+import os
+import sys
+from types import ModuleType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from core import clients
+from worker.local_ws import LocalManagementApi
+
+log = logging.getLogger(__name__)
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# stage name → (Lambda directory, app attribute holding its key prefix)
+STAGES: Dict[str, Tuple[str, str]] = {
+    "transcribe": ("transcribe_processor", "AUDIO_PREFIX"),
+    "intent": ("bedrock_processor", "PREFIX"),
+}
+
+
+class Stage(NamedTuple):
+    name: str
+    prefix: str
+    module: ModuleType
+
+    def handle(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = self.module.lambda_handler(event, None)
+        return result
+
+
+def load_app(package: str) -> ModuleType:
+    """Import ``Src/<package>/app.py`` as ``<package>_app`` (once per process)."""
+    name = f"{package}_app"
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(SRC, package)
+    sys.path.insert(0, path)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(path, "app.py")
+        )
+        assert spec is not None and spec.loader is not None
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+        return module
+    finally:
+        sys.path.remove(path)
+
+
+def load_stages(names: Sequence[str]) -> List[Stage]:
+    """Load the named stages, in pipeline order."""
+    stages = []
+    for name in names:
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage {name!r} (choose from {list(STAGES)})")
+        package, prefix_attr = STAGES[name]
+        module = load_app(package)
+        stages.append(Stage(name, getattr(module, prefix_attr), module))
+    return stages
+
+
+def split_event(
+    stages: Sequence[Stage], event: Dict[str, Any]
+) -> Tuple[List[Tuple[Stage, Dict[str, Any]]], int]:
+    """
+    Group the S3 records of ``event`` by the stage whose prefix they match.
+
+    Returns:
+        ``(stage, sub-event)`` pairs and the number of records no stage wants
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    unrouted = 0
+    for rec in event.get("Records", []):
+        key = rec.get("s3", {}).get("object", {}).get("key", "")
+        stage = next((s for s in stages if key.startswith(s.prefix)), None)
+        if stage is None:
+            unrouted += 1
+            continue
+        grouped.setdefault(stage.name, []).append(rec)
+    pairs = [(s, {"Records": grouped[s.name]}) for s in stages if s.name in grouped]
+    return pairs, unrouted
+
+
+# ── Process-pool entry points ─────────────────────────────────────────
+_loaded: Dict[str, Stage] = {}
+
+
+class LocalInvoker:
+    """``lambda`` client stand-in that runs the intent stage in-process."""
+
+    def __init__(self, stage: str = "intent") -> None:
+        self.stage = stage
+
+    def invoke(
+        self, FunctionName: str, Payload: bytes, InvocationType: str = "", **_: Any
+    ) -> Dict[str, Any]:
+        result = run_stage(self.stage, json.loads(Payload))
+        return {
+            "StatusCode": 202 if InvocationType == "Event" else 200,
+            "Payload": io.BytesIO(json.dumps(result).encode()),
+        }
+
+
+def init_process(
+    names: Sequence[str],
+    outbox: Any,
+    is_open: Optional[Callable[[str], bool]] = None,
+) -> None:
+    """
+    Route WebSocket posts to ``outbox`` and load stages.
+
+    Used as the pool initializer, and directly by a single-process worker.
+
+    Args:
+        names: Stages this process runs
+        outbox: Queue the WebSocket server drains (a
+            ``multiprocessing.Manager().Queue()`` across processes)
+        is_open: Whether a connection is live, when this process can tell
+    """
+    clients.override("apigatewaymanagementapi", LocalManagementApi(outbox, is_open))
+    if "intent" in names:
+        clients.override("lambda", LocalInvoker())
+    for stage in load_stages(names):
+        _loaded[stage.name] = stage
+    log.info("Worker process %d ready: %s", os.getpid(), ", ".join(_loaded))
+
+
+def run_stage(name: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one sub-event through a stage loaded by ``init_process``."""
+    stage: Optional[Stage] = _loaded.get(name)
+    if stage is None:
+        raise RuntimeError(f"Stage {name!r} not loaded in process {os.getpid()}")
+    return stage.handle(event)
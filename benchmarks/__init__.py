@@ -0,0 +1 @@
+# VoiceNav-AI offline benchmarks
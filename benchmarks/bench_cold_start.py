@@ -0,0 +1,110 @@
+"""
+Import time and first-invocation client cost of the Lambda handlers.
+
+Each measurement runs in a fresh interpreter so module and botocore
+caches start cold. No requests leave the machine: the numbers cover
+module import and client construction, which is what lazy, cached
+clients move out of the import path and out of warm invocations.
+
+    python -m benchmarks.bench_cold_start --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "Src")
+
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "WS_ENDPOINT": "https://example.execute-api.us-east-1.amazonaws.com/bench",
+}
+
+# Each snippet prints a JSON dict of millisecond timings
+SNIPPETS = {
+    # What importing bedrock_processor used to cost: four eager clients
+    "bedrock_eager_clients": """
+import time, json
+t = time.perf_counter()
+import boto3
+boto3.client("s3", region_name="us-east-1")
+boto3.resource("dynamodb", region_name="us-east-1").Table("VoiceNavConnections")
+boto3.client("bedrock-runtime", region_name="us-east-1")
+boto3.client("apigatewaymanagementapi", region_name="us-east-1",
+             endpoint_url="https://example.com")
+print(json.dumps({"import_ms": (time.perf_counter() - t) * 1000}))
+""",
+    "bedrock_lazy": """
+import time, json
+t = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.s3(); app.ddb(); app.bed(); app.apigw()
+first = time.perf_counter()
+app.s3(); app.ddb(); app.bed(); app.apigw()
+warm = time.perf_counter()
+print(json.dumps({"import_ms": (imported - t) * 1000,
+                  "first_use_ms": (first - imported) * 1000,
+                  "warm_use_ms": (warm - first) * 1000}))
+""",
+    # store_conn used to build a new boto3 resource on every invocation
+    "store_conn_per_call_resource": """
+import time, json, boto3
+boto3.resource("dynamodb", region_name="us-east-1").Table("t")
+t = time.perf_counter()
+boto3.resource("dynamodb", region_name="us-east-1").Table("t")
+print(json.dumps({"warm_use_ms": (time.perf_counter() - t) * 1000}))
+""",
+    "store_conn_cached": """
+import time, json
+import app
+app.get_dynamodb_table()
+t = time.perf_counter()
+app.get_dynamodb_table()
+print(json.dumps({"warm_use_ms": (time.perf_counter() - t) * 1000}))
+""",
+}
+
+PACKAGE = {
+    "bedrock_lazy": "bedrock_processor",
+    "store_conn_cached": "store_conn",
+}
+
+
+def measure(name):
+    package = PACKAGE.get(name)
+    cwd = os.path.join(SRC, package) if package else ROOT
+    env = dict(os.environ, **ENV, PYTHONPATH=SRC)
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPETS[name]],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    report = {}
+    for name in SNIPPETS:
+        runs = [measure(name) for _ in range(args.repeat)]
+        report[name] = {
+            metric: round(statistics.median(r[metric] for r in runs), 2)
+            for metric in runs[0]
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
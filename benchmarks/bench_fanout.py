@@ -0,0 +1,72 @@
+"""
+Fan-out throughput against a local stub of the management API.
+
+Compares the old serial loop with ``fanout.FanOut`` for a range of
+connection counts and prints one JSON object per scenario.
+
+    python -m benchmarks.bench_fanout --connections 100 1000 --latency 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "Src", "bedrock_processor")
+)
+
+from benchmarks.fakes import StubManagementApi, StubTable  # noqa: E402
+from fanout import FanOut  # noqa: E402
+
+INTENT = {"action": "click", "selector": "#nav-book"}
+
+
+def serial(apigw, table, conn_ids):
+    for cid in conn_ids:
+        try:
+            apigw.post_to_connection(ConnectionId=cid, Data=json.dumps(INTENT).encode())
+        except apigw.exceptions.GoneException:
+            table.delete_item(Key={"connID": cid})
+
+
+def run(connections, latency, workers, gone_ratio):
+    conn_ids = [f"conn-{i}" for i in range(connections)]
+    gone = conn_ids[: int(connections * gone_ratio)]
+    report = {"connections": connections, "latency": latency, "workers": workers}
+
+    apigw = StubManagementApi(latency, gone)
+    table = StubTable([{"connID": c} for c in conn_ids])
+    started = time.perf_counter()
+    serial(apigw, table, conn_ids)
+    report["serial_seconds"] = round(time.perf_counter() - started, 4)
+    report["serial_deletes"] = table.calls.get("delete_item", 0)
+
+    apigw = StubManagementApi(latency, gone)
+    table = StubTable([{"connID": c} for c in conn_ids])
+    result = FanOut(apigw, table, max_workers=workers, deadline=600).send(
+        iter(conn_ids), INTENT
+    )
+    report["fanout_seconds"] = round(result.elapsed, 4)
+    report["fanout_per_second"] = round(result.per_second, 1)
+    report["delivered"] = result.delivered
+    report["gone"] = result.gone
+    report["failed"] = result.failed
+    report["speedup"] = round(report["serial_seconds"] / result.elapsed, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--gone-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+    for n in args.connections:
+        print(json.dumps(run(n, args.latency, args.workers, args.gone_ratio)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Size and speed of the audio pre-processing stage.
+
+Builds a synthetic 44.1 kHz stereo WAV (speech-band tone framed by
+silence, the shape of a push-to-talk clip) and reports how many bytes
+the stage saves and how long it takes per second of input audio.
+
+    python -m benchmarks.bench_preprocess --seconds 5 30 --silence 1.5
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "Src", "transcribe_processor")
+)
+
+import preprocess  # noqa: E402
+
+
+def synthetic_wav(seconds, silence, rate=44100, channels=2):
+    t = np.arange(int(seconds * rate)) / rate
+    voice = 0.4 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t)) / 2
+    quiet = np.zeros(int(silence * rate))
+    mono = np.concatenate([quiet, voice, quiet])
+    frames = np.repeat(mono[:, None], channels, axis=1)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((frames * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def run(seconds, silence, repeat):
+    data = synthetic_wav(seconds, silence)
+    timings = []
+    for _ in range(repeat):
+        result = preprocess.preprocess(data, "wav")
+        timings.append(result.stats["ms"])
+    stats = result.stats
+    return {
+        "speech_seconds": seconds,
+        "silence_seconds": silence * 2,
+        "format": result.media_format,
+        "bytes_in": stats["bytes_in"],
+        "bytes_out": stats["bytes_out"],
+        "bytes_saved_pct": round(100 * (1 - stats["bytes_out"] / stats["bytes_in"]), 1),
+        "seconds_out": stats["seconds_out"],
+        "ms": round(min(timings), 2),
+        "ms_per_audio_second": round(min(timings) / stats["seconds_in"], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 30])
+    parser.add_argument("--silence", type=float, default=1.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for seconds in args.seconds:
+        print(json.dumps(run(seconds, args.silence, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Peak memory and parse time for Transcribe output documents.
+
+Compares the old ``json.loads(body.read())`` with the streaming reader,
+transcript only and with per-word confidences, on synthetic outputs of
+growing length. Bodies are served in 64 KiB reads from memory, as an S3
+stream would be.
+
+    python -m benchmarks.bench_transcript_parse --words 1000 20000 100000
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(
+    os.path.join(os.path.dirname(__file__), "..", "Src", "bedrock_processor")
+)
+
+from transcript_stream import read_transcript  # noqa: E402
+
+
+def synthetic_output(words):
+    items = [
+        {
+            "start_time": f"{i * 0.3:.2f}",
+            "end_time": f"{i * 0.3 + 0.25:.2f}",
+            "alternatives": [{"confidence": "0.987", "content": f"word{i % 50}"}],
+            "type": "pronunciation",
+        }
+        for i in range(words)
+    ]
+    text = " ".join(f"word{i % 50}" for i in range(words))
+    doc = {
+        "jobName": "voicenav-job-bench",
+        "accountId": "000000000000",
+        "results": {"transcripts": [{"transcript": text}], "items": items},
+        "status": "COMPLETED",
+    }
+    return json.dumps(doc).encode()
+
+
+def full_load(body):
+    return json.loads(body.read())["results"]["transcripts"][0]["transcript"]
+
+
+def measure(fn, data, repeat):
+    timings, peak = [], 0
+    for _ in range(repeat):
+        body = io.BufferedReader(io.BytesIO(data), buffer_size=64 * 1024)
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn(body)
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return round(min(timings) * 1000, 2), round(peak / 1024, 1)
+
+
+def run(words, repeat):
+    data = synthetic_output(words)
+    report = {"words": words, "document_kib": round(len(data) / 1024, 1)}
+    scenarios = {
+        "json_loads": full_load,
+        "stream_transcript": lambda b: read_transcript(b),
+        "stream_confidences": lambda b: read_transcript(b, confidences=True),
+    }
+    for name, fn in scenarios.items():
+        ms, peak_kib = measure(fn, data, repeat)
+        report[f"{name}_ms"] = ms
+        report[f"{name}_peak_kib"] = peak_kib
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, nargs="+", default=[1000, 20000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for words in args.words:
+        print(json.dumps(run(words, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+In-process stand-ins for the AWS services the Lambdas talk to.
+
+Each fake takes a ``latency`` (seconds) that is slept on every call so
+benchmarks can model network round trips without leaving the machine,
+and counts its calls by operation in ``calls``. They implement only what
+the handlers use, with the same request and response shapes as boto3.
+"""
+
+import hashlib
+import io
+import json
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class _Stub:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class StubManagementApi(_Stub):
+    """API Gateway management API: records posts, raises for gone IDs."""
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def __init__(self, latency: float = 0.0, gone: Iterable[str] = ()) -> None:
+        super().__init__(latency)
+        self.gone = set(gone)
+        self.posts = 0
+
+    def post_to_connection(self, ConnectionId: str, Data: bytes) -> Dict[str, Any]:
+        self._call("post_to_connection")
+        if ConnectionId in self.gone:
+            raise self.exceptions.GoneException(ConnectionId)
+        with self._lock:
+            self.posts += 1
+        return {}
+
+    def get_connection(self, ConnectionId: str) -> Dict[str, Any]:
+        self._call("get_connection")
+        if ConnectionId in self.gone:
+            raise self.exceptions.GoneException(ConnectionId)
+        return {}
+
+
+class _BatchWriter:
+    def __init__(self, table: "StubTable") -> None:
+        self.table = table
+
+    def __enter__(self) -> "_BatchWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def delete_item(self, Key: Dict[str, Any]) -> None:
+        self.table.delete_item(Key=Key)
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self.table.put_item(Item=Item)
+
+
+class ConditionalCheckFailedException(Exception):
+    pass
+
+
+class _Meta:
+    class client:
+        class exceptions:
+            ConditionalCheckFailedException = ConditionalCheckFailedException
+
+
+_COMPARE = {
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+_FUNCTION = re.compile(r"^(attribute_exists|attribute_not_exists)\((\S+)\)$")
+_COMPARISON = re.compile(r"^(\S+)\s*(<>|<=|>=|=|<|>)\s*(\S+)$")
+
+
+class _Expression:
+    """The subset of DynamoDB expression strings the handlers write."""
+
+    def __init__(self, kwargs: Dict[str, Any]) -> None:
+        self.names = kwargs.get("ExpressionAttributeNames") or {}
+        self.values = kwargs.get("ExpressionAttributeValues") or {}
+
+    def name(self, token: str) -> str:
+        return str(self.names.get(token, token))
+
+    def operand(self, item: Dict[str, Any], token: str) -> Any:
+        if token.startswith(":"):
+            return self.values[token]
+        return item.get(self.name(token))
+
+    def condition(self, item: Optional[Dict[str, Any]], text: Any) -> bool:
+        if text is None:
+            return True
+        if not isinstance(text, str):
+            return _matches(item or {}, text)
+        for part in re.split(r"\s+AND\s+", text.strip(), flags=re.IGNORECASE):
+            fn = _FUNCTION.match(part)
+            if fn:
+                exists = item is not None and self.name(fn.group(2)) in item
+                if exists != (fn.group(1) == "attribute_exists"):
+                    return False
+                continue
+            cmp = _COMPARISON.match(part)
+            if cmp is None:
+                raise NotImplementedError(f"condition {part!r}")
+            left = self.operand(item or {}, cmp.group(1))
+            right = self.operand(item or {}, cmp.group(3))
+            if left is None or right is None:
+                return False
+            if not _COMPARE[cmp.group(2)](left, right):
+                return False
+        return True
+
+    def update(self, item: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Apply ``SET``/``ADD``/``REMOVE`` clauses; returns the new values."""
+        changed: Dict[str, Any] = {}
+        clauses = re.split(r"\b(SET|ADD|REMOVE)\b", text.strip())
+        for verb, body in zip(clauses[1::2], clauses[2::2]):
+            for action in filter(None, (a.strip() for a in body.split(","))):
+                if verb == "SET":
+                    target, _, value = (s.strip() for s in action.partition("="))
+                    changed[self.name(target)] = self.operand(item, value)
+                elif verb == "ADD":
+                    target, value = action.split()
+                    name = self.name(target)
+                    changed[name] = item.get(name, 0) + self.operand(item, value)
+                else:
+                    item.pop(self.name(action), None)
+        item.update(changed)
+        return changed
+
+
+def _matches(item: Dict[str, Any], cond: Any) -> bool:
+    """Evaluate a ``boto3.dynamodb.conditions`` object against an item."""
+    expr = cond.get_expression()
+    op, values = expr["operator"], expr["values"]
+    if op == "AND":
+        return all(_matches(item, v) for v in values)
+    if op == "OR":
+        return any(_matches(item, v) for v in values)
+    if op == "NOT":
+        return not _matches(item, values[0])
+    actual = item.get(values[0].name)
+    if op == "attribute_exists":
+        return actual is not None
+    if op == "attribute_not_exists":
+        return actual is None
+    if op == "begins_with":
+        return isinstance(actual, str) and actual.startswith(values[1])
+    if actual is None or op not in _COMPARE:
+        return False
+    return bool(_COMPARE[op](actual, values[1]))
+
+
+class StubTable(_Stub):
+    """
+    Dict-backed DynamoDB table keyed on a single hash attribute.
+
+    Args:
+        items: Initial items
+        hash_key: Partition key attribute
+        latency: Seconds slept per call
+        indexes: Global secondary index name → its partition key attribute
+        page_size: Items per ``scan`` page (DynamoDB pages by 1 MB)
+    """
+
+    meta = _Meta
+
+    def __init__(
+        self,
+        items: Optional[List[Dict[str, Any]]] = None,
+        hash_key: str = "connID",
+        latency: float = 0.0,
+        indexes: Optional[Dict[str, str]] = None,
+        page_size: int = 1000,
+    ) -> None:
+        super().__init__(latency)
+        self.hash_key = hash_key
+        self.indexes = dict(indexes or {})
+        self.page_size = page_size
+        self.items: Dict[Any, Dict[str, Any]] = {}
+        # attribute → value → hash keys, so a Query does not scan the table
+        self._index: Dict[str, Dict[Any, set]] = {a: {} for a in self.indexes.values()}
+        for item in items or []:
+            self._store(dict(item))
+
+    def _store(self, item: Dict[str, Any]) -> None:
+        self._unstore(item[self.hash_key])
+        self.items[item[self.hash_key]] = item
+        for attr, values in self._index.items():
+            if attr in item:
+                values.setdefault(item[attr], set()).add(item[self.hash_key])
+
+    def _unstore(self, key: Any) -> None:
+        old = self.items.pop(key, None)
+        if old is None:
+            return
+        for attr, values in self._index.items():
+            if attr in old:
+                values.get(old[attr], set()).discard(key)
+
+    def put_item(self, Item: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        self._call("put_item")
+        with self._lock:
+            current = self.items.get(Item[self.hash_key])
+            if not _Expression(kwargs).condition(
+                current, kwargs.get("ConditionExpression")
+            ):
+                raise ConditionalCheckFailedException("put_item")
+            self._store(dict(Item))
+        return {}
+
+    def get_item(self, Key: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        self._call("get_item")
+        item = self.items.get(Key[self.hash_key])
+        return {"Item": dict(item)} if item else {}
+
+    def delete_item(self, Key: Dict[str, Any], **kwargs: Any) -> Dict[str, Any]:
+        self._call("delete_item")
+        with self._lock:
+            self._unstore(Key[self.hash_key])
+        return {}
+
+    def update_item(
+        self, Key: Dict[str, Any], UpdateExpression: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("update_item")
+        expr = _Expression(kwargs)
+        with self._lock:
+            current = self.items.get(Key[self.hash_key])
+            if not expr.condition(current, kwargs.get("ConditionExpression")):
+                raise ConditionalCheckFailedException("update_item")
+            item = dict(current or Key)
+            changed = expr.update(item, UpdateExpression)
+            self._store(item)
+        if kwargs.get("ReturnValues") == "UPDATED_NEW":
+            return {"Attributes": changed}
+        return {}
+
+    def query(
+        self,
+        KeyConditionExpression: Any,
+        IndexName: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        self._call("query")
+        expr = _Expression(kwargs)
+        key_expr = KeyConditionExpression.get_expression()
+        attr, value = key_expr["values"][0].name, key_expr["values"][1]
+        if IndexName is not None:
+            if self.indexes[IndexName] != attr or key_expr["operator"] != "=":
+                raise NotImplementedError(f"query on {IndexName} by {attr}")
+            with self._lock:
+                keys = list(self._index[attr].get(value, ()))
+            candidates = [self.items[k] for k in keys if k in self.items]
+        else:
+            item = self.items.get(value)
+            candidates = [item] if item is not None else []
+        found = [
+            dict(i)
+            for i in candidates
+            if expr.condition(i, kwargs.get("FilterExpression"))
+        ]
+        return {"Items": found, "Count": len(found)}
+
+    def scan(self, **kwargs: Any) -> Dict[str, Any]:
+        self._call("scan")
+        expr = _Expression(kwargs)
+        total = kwargs.get("TotalSegments", 1)
+        segment = kwargs.get("Segment", 0)
+        keys = sorted(
+            k
+            for k in list(self.items)
+            if zlib.crc32(str(k).encode()) % total == segment
+        )
+        start = kwargs.get("ExclusiveStartKey")
+        if start is not None:
+            keys = [k for k in keys if str(k) > str(start[self.hash_key])]
+        page = keys[: self.page_size]
+        found = []
+        for key in page:
+            item = self.items.get(key)
+            if item is not None and expr.condition(
+                item, kwargs.get("FilterExpression")
+            ):
+                found.append(dict(item))
+        result: Dict[str, Any] = {"Items": found, "Count": len(found)}
+        if len(keys) > self.page_size:
+            result["LastEvaluatedKey"] = {self.hash_key: page[-1]}
+        return result
+
+    def batch_writer(self) -> _BatchWriter:
+        self._call("batch_writer")
+        return _BatchWriter(self)
+
+
+class _Body(io.BytesIO):
+    """``StreamingBody`` stand-in: ``read``, ``iter_chunks`` and ``close``."""
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterable[bytes]:
+        return iter(lambda: self.read(chunk_size), b"")
+
+
+class StubS3(_Stub):
+    """Buckets as dicts of key → bytes."""
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(latency)
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+
+    def put_object(
+        self, Bucket: str, Key: str, Body: Any, **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("put_object")
+        data = Body.encode() if isinstance(Body, str) else bytes(Body)
+        self.objects[(Bucket, Key)] = data
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        self._call("get_object")
+        try:
+            data = self.objects[(Bucket, Key)]
+        except KeyError:
+            raise self.exceptions.NoSuchKey(Key) from None
+        return {"Body": _Body(data), "ContentLength": len(data)}
+
+    def copy_object(
+        self, CopySource: Dict[str, str], Bucket: str, Key: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("copy_object")
+        data = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+        self.objects[(Bucket, Key)] = data
+        return {}
+
+    def head_bucket(self, Bucket: str) -> Dict[str, Any]:
+        self._call("head_bucket")
+        return {}
+
+
+class StubTranscribe(_Stub):
+    """Accepts jobs and remembers them; a reused job name conflicts."""
+
+    class exceptions:
+        class ConflictException(Exception):
+            pass
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(latency)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def start_transcription_job(
+        self, TranscriptionJobName: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        self._call("start_transcription_job")
+        with self._lock:
+            if TranscriptionJobName in self.jobs:
+                raise self.exceptions.ConflictException(TranscriptionJobName)
+            self.jobs[TranscriptionJobName] = kwargs
+        return {"TranscriptionJob": {"TranscriptionJobName": TranscriptionJobName}}
+
+
+class StubBedrock(_Stub):
+    """
+    ``bedrock-runtime`` answering every prompt with ``answer(prompt)``.
+
+    Args:
+        latency: Seconds slept per call (model time)
+        answer: Prompt → intent dict (default: a click on ``#nav-contact``)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        answer: Optional[Callable[[str], Dict[str, Any]]] = None,
+    ) -> None:
+        super().__init__(latency)
+        self.answer = answer or (
+            lambda prompt: {"action": "click", "selector": "#nav-contact"}
+        )
+
+    def invoke_model(self, modelId: str, body: str, **kwargs: Any) -> Dict[str, Any]:
+        self._call("invoke_model")
+        prompt = json.loads(body)["messages"][0]["content"]
+        doc = {
+            "content": [{"type": "text", "text": json.dumps(self.answer(prompt))}],
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 16},
+        }
+        return {"body": _Body(json.dumps(doc).encode())}
@@ -0,0 +1,513 @@
+"""
+Offline benchmark suite for the three Lambda handlers.
+
+Every scenario runs a real ``lambda_handler`` (``store_conn``,
+``transcribe_processor``, ``bedrock_processor``) against the stand-ins in
+``benchmarks.fakes``, each service with its own injected per-call latency,
+and times every invocation. Scenarios cover connection churn, 1/100/10k
+connection fan-out, large transcripts and burst batches. The result is one
+JSON document tagged with the git commit, so runs can be compared:
+
+    python -m benchmarks.run --out base.json
+    git checkout my-branch
+    python -m benchmarks.run --compare base.json --fail-over 20
+    python -m benchmarks.run --only 'intent/fanout-*' --latency apigw=0.02
+"""
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SRC = os.path.join(ROOT, "Src")
+sys.path.append(SRC)
+
+from benchmarks.fakes import (  # noqa: E402
+    StubBedrock,
+    StubManagementApi,
+    StubS3,
+    StubTable,
+    StubTranscribe,
+)
+from core import clients  # noqa: E402
+from worker.stages import load_app  # noqa: E402
+
+BUCKET = "voicenav-bucket"
+TABLE = "VoiceNavConnections"
+SERVICES = ("s3", "dynamodb", "transcribe", "bedrock", "apigw")
+# Read by the handlers (and the core modules they import) at import time
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "METRICS_ENABLED": "false",  # stdout carries the report
+    "AWS_BUCKET": BUCKET,
+    "OUTPUT_BUCKET": BUCKET,
+    "CONN_TABLE": TABLE,
+    "WS_ENDPOINT": "https://example.execute-api.us-east-1.amazonaws.com/bench",
+    "DELIVERY_MODE": "targeted",
+    "GATE_MIN_CONFIDENCE": "0.5",
+}
+CATALOG = {"#nav-book": "Booking", "#nav-contact": "Contact support"}
+
+
+class Fakes(NamedTuple):
+    s3: StubS3
+    table: StubTable
+    transcribe: StubTranscribe
+    bedrock: StubBedrock
+    apigw: StubManagementApi
+
+    def calls(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: dict(sorted(fake.calls.items()))
+            for name, fake in zip(SERVICES, self)
+            if fake.calls
+        }
+
+
+class Scenario(NamedTuple):
+    """
+    One benchmark.
+
+    ``setup`` seeds the fakes and returns ``make_event(i)``, which builds
+    the event of invocation ``i`` and the number of records it carries.
+    """
+
+    name: str
+    package: str
+    setup: Callable[[Fakes], Callable[[int], Tuple[Dict[str, Any], int]]]
+    env: Dict[str, str] = {}
+    max_repeat: int = 1000
+
+
+# ── Events ──────────────────────────────────────────────────────────
+def ws_event(event_type: str, cid: str, route: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "requestContext": {
+            "connectionId": cid,
+            "eventType": event_type,
+            "routeKey": route,
+        },
+        **extra,
+    }
+
+
+def s3_event(keys: List[str]) -> Dict[str, Any]:
+    now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+    return {
+        "Records": [
+            {
+                "eventTime": now,
+                "s3": {
+                    "bucket": {"name": BUCKET},
+                    "object": {"key": key, "eTag": f"{i:032x}", "size": 48000},
+                },
+            }
+            for i, key in enumerate(keys)
+        ]
+    }
+
+
+def transcript(words: int, text: Optional[str] = None) -> bytes:
+    """A Transcribe output document with per-word items."""
+    tokens = text.split() if text else [f"word{i % 50}" for i in range(words)]
+    items = [
+        {
+            "start_time": f"{i * 0.3:.2f}",
+            "end_time": f"{i * 0.3 + 0.25:.2f}",
+            "alternatives": [{"confidence": "0.987", "content": w}],
+            "type": "pronunciation",
+        }
+        for i, w in enumerate(tokens)
+    ]
+    doc = {
+        "jobName": "voicenav-job-bench",
+        "results": {"transcripts": [{"transcript": " ".join(tokens)}], "items": items},
+        "status": "COMPLETED",
+    }
+    return json.dumps(doc).encode()
+
+
+def connections(table: StubTable, n: int, sessions: int = 0) -> List[str]:
+    """Add ``n`` live connections, spread over ``sessions`` sessions if set."""
+    ttl = int(time.time()) + 3600
+    ids = []
+    for i in range(n):
+        item: Dict[str, Any] = {"connID": f"conn-{i:05d}", "ttl": ttl}
+        if sessions:
+            item["sessionID"] = f"sess-{i % sessions:05d}"
+        table.put_item(Item=item)
+        ids.append(item["connID"])
+    table.calls.clear()
+    return ids
+
+
+# ── store_conn ──────────────────────────────────────────────────────
+def store_connect(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+    def make(i: int) -> Tuple[Dict[str, Any], int]:
+        params = {"session": f"sess-{i:05d}"}
+        event = ws_event("CONNECT", f"c-{i}", "$connect", queryStringParameters=params)
+        return event, 1
+
+    return make
+
+
+def store_register(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+    connections(fakes.table, 1000, sessions=1000)
+    body = json.dumps({"action": "register", "selectors": CATALOG})
+    return lambda i: (
+        ws_event("MESSAGE", f"conn-{i % 1000:05d}", "register", body=body),
+        1,
+    )
+
+
+def store_heartbeat(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+    # Clients echo the ttl of their fresh rows: no write should be needed
+    connections(fakes.table, 1000)
+    now = int(time.time())
+    body = json.dumps({"action": "heartbeat", "ttl": now + 3600, "lastActivity": now})
+    return lambda i: (
+        ws_event("MESSAGE", f"conn-{i % 1000:05d}", "heartbeat", body=body),
+        1,
+    )
+
+
+def store_disconnect(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+    connections(fakes.table, 1000)
+    return lambda i: (ws_event("DISCONNECT", f"conn-{i:05d}", "$disconnect"), 1)
+
+
+# ── transcribe_processor ────────────────────────────────────────────
+def transcribe_burst(records: int) -> Callable[..., Any]:
+    def setup(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+        def make(i: int) -> Tuple[Dict[str, Any], int]:
+            keys = [
+                f"audio-store/sess-{r:05d}/{i:08x}-0000-4000-8000-{r:012x}-rec.webm"
+                for r in range(records)
+            ]
+            return s3_event(keys), records
+
+        return make
+
+    return setup
+
+
+# ── bedrock_processor ───────────────────────────────────────────────
+def put_transcript(fakes: Fakes, key: str, data: bytes) -> None:
+    fakes.s3.objects[(BUCKET, key)] = data  # seeded, not counted
+
+
+def intent_single(
+    text: Optional[str], words: int = 0, unique: bool = False
+) -> Callable[..., Any]:
+    """
+    One transcript per event for a session with one connection.
+
+    With ``unique`` every invocation says something new, so the intent
+    cache never answers and each one reaches the model.
+    """
+
+    def setup(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+        connections(fakes.table, 1, sessions=1)
+
+        def make(i: int) -> Tuple[Dict[str, Any], int]:
+            key = f"transcribe-output/sess-00000/job-{i}.json"
+            said = f"{text} {i}" if text and unique else text
+            put_transcript(fakes, key, transcript(words, said))
+            return s3_event([key]), 1
+
+        return make
+
+    return setup
+
+
+def intent_direct(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+    """Transcripts handed over inline by a streaming/local ASR backend."""
+    connections(fakes.table, 1, sessions=1)
+
+    def make(i: int) -> Tuple[Dict[str, Any], int]:
+        event = s3_event([f"transcribe-output/sess-00000/job-{i}.json"])
+        event["Records"][0]["transcript"] = {"text": "book", "confidences": [0.99]}
+        return event, 1
+
+    return make
+
+
+def intent_fanout(n: int) -> Callable[..., Any]:
+    """Broadcast delivery to ``n`` live connections."""
+
+    def setup(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+        connections(fakes.table, n)
+        put_transcript(fakes, "transcribe-output/job.json", transcript(0, "book"))
+
+        def make(i: int) -> Tuple[Dict[str, Any], int]:
+            # A new ETag each time, as a new recording would have
+            event = s3_event(["transcribe-output/job.json"])
+            event["Records"][0]["s3"]["object"]["eTag"] = f"{i:032x}"
+            return event, 1
+
+        return make
+
+    return setup
+
+
+def intent_burst(records: int) -> Callable[..., Any]:
+    """One event with ``records`` transcripts of different sessions."""
+
+    def setup(fakes: Fakes) -> Callable[[int], Tuple[Dict[str, Any], int]]:
+        connections(fakes.table, records, sessions=records)
+        keys = []
+        for r in range(records):
+            key = f"transcribe-output/sess-{r:05d}/job.json"
+            put_transcript(fakes, key, transcript(0, "contact support"))
+            keys.append(key)
+
+        def make(i: int) -> Tuple[Dict[str, Any], int]:
+            event = s3_event(keys)
+            for r, rec in enumerate(event["Records"]):
+                rec["s3"]["object"]["eTag"] = f"{i:016x}{r:016x}"
+            return event, records
+
+        return make
+
+    return setup
+
+
+SCENARIOS = [
+    Scenario("store_conn/connect", "store_conn", store_connect),
+    Scenario("store_conn/register", "store_conn", store_register),
+    Scenario("store_conn/heartbeat", "store_conn", store_heartbeat),
+    Scenario("store_conn/disconnect", "store_conn", store_disconnect),
+    Scenario("transcribe/burst-1", "transcribe_processor", transcribe_burst(1)),
+    Scenario("transcribe/burst-100", "transcribe_processor", transcribe_burst(100)),
+    Scenario(
+        "transcribe/local-asr",
+        "transcribe_processor",
+        transcribe_burst(1),
+        {"ASR_BACKEND": "local"},
+    ),
+    Scenario("intent/fast-path", "bedrock_processor", intent_single("book")),
+    Scenario("intent/direct", "bedrock_processor", intent_direct),
+    Scenario(
+        "intent/model",
+        "bedrock_processor",
+        intent_single("get me to a person", unique=True),
+    ),
+    Scenario(
+        "intent/large-transcript",
+        "bedrock_processor",
+        intent_single(None, words=20000),
+        max_repeat=20,
+    ),
+    Scenario("intent/burst-10", "bedrock_processor", intent_burst(10)),
+    Scenario("intent/burst-100", "bedrock_processor", intent_burst(100)),
+    *(
+        Scenario(
+            f"intent/fanout-{n}",
+            "bedrock_processor",
+            intent_fanout(n),
+            {"DELIVERY_MODE": "broadcast", "CONN_CACHE_TTL": "0"},
+            max_repeat=max(1, 100000 // n),
+        )
+        for n in (1, 100, 10000)
+    ),
+]
+
+
+# ── Runner ──────────────────────────────────────────────────────────
+def fresh_fakes(latency: Dict[str, float]) -> Fakes:
+    fakes = Fakes(
+        StubS3(latency.get("s3", 0.0)),
+        StubTable(
+            latency=latency.get("dynamodb", 0.0),
+            indexes={"sessionID-index": "sessionID"},
+        ),
+        StubTranscribe(latency.get("transcribe", 0.0)),
+        StubBedrock(latency.get("bedrock", 0.0)),
+        StubManagementApi(latency.get("apigw", 0.0)),
+    )
+    clients.reset()
+    clients.override("s3", fakes.s3)
+    clients.override(f"dynamodb:{TABLE}", fakes.table)
+    clients.override("transcribe", fakes.transcribe)
+    clients.override("bedrock-runtime", fakes.bedrock)
+    clients.override("apigatewaymanagementapi", fakes.apigw)
+    return fakes
+
+
+def load_handler(package: str, env: Dict[str, str]) -> Any:
+    """A freshly imported handler module configured by ``env``."""
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    sys.modules.pop(f"{package}_app", None)
+    try:
+        return load_app(package)
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def run(scenario: Scenario, repeat: int, latency: Dict[str, float]) -> Dict[str, Any]:
+    fakes = fresh_fakes(latency)
+    app = load_handler(scenario.package, {**ENV, **scenario.env})
+    make_event = scenario.setup(fakes)
+    timings: List[float] = []
+    records = 0
+    failed = 0
+    for i in range(min(repeat, scenario.max_repeat) + 1):  # +1: first, not timed
+        event, count = make_event(i)
+        started = time.perf_counter()
+        result = app.lambda_handler(event, None)
+        elapsed = 1000 * (time.perf_counter() - started)
+        failed += len(result.get("batchItemFailures") or [])
+        failed += result.get("statusCode", 200) >= 500
+        if i == 0:
+            first = elapsed
+            continue
+        timings.append(elapsed)
+        records += count
+    sys.modules.pop(f"{scenario.package}_app", None)
+    return {
+        "invocations": len(timings),
+        "records": records,
+        "failed": failed,
+        "first_ms": round(first, 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "per_record_ms": round(sum(timings) / max(records, 1), 3),
+        "calls": fakes.calls(),
+    }
+
+
+def commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    dirty = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=no"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    return out.stdout.strip() + ("-dirty" if dirty else "")
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], fail_over: float) -> bool:
+    """Print p50 changes against ``base`` (to stderr); False on a regression."""
+    ok = True
+    print(
+        f"{'scenario':<26}{'base p50':>11}{'p50':>11}{'change':>9}  "
+        f"({base['meta'].get('commit')} → {new['meta'].get('commit')})",
+        file=sys.stderr,
+    )
+    for name, row in new["scenarios"].items():
+        before = base["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<26}{'–':>11}{row['p50_ms']:>11.3f}", file=sys.stderr)
+            continue
+        change = 100 * (row["p50_ms"] / max(before["p50_ms"], 1e-9) - 1)
+        flag = ""
+        if fail_over and change > fail_over:
+            ok, flag = False, "  REGRESSION"
+        print(
+            f"{name:<26}{before['p50_ms']:>11.3f}{row['p50_ms']:>11.3f}"
+            f"{change:>+8.1f}%{flag}",
+            file=sys.stderr,
+        )
+    return ok
+
+
+def parse_latency(values: List[str]) -> Dict[str, float]:
+    latency = {}
+    for value in values:
+        service, _, seconds = value.partition("=")
+        if service not in SERVICES and service != "all":
+            raise SystemExit(f"unknown service {service!r} (choose from {SERVICES})")
+        for name in SERVICES if service == "all" else (service,):
+            latency[name] = float(seconds)
+    return latency
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=50, help="timed invocations")
+    parser.add_argument(
+        "--latency",
+        nargs="*",
+        default=[],
+        metavar="SERVICE=SECONDS",
+        help=f"per-call latency of {', '.join(SERVICES)} or all (default 0)",
+    )
+    parser.add_argument("--only", nargs="*", default=[], help="name patterns")
+    parser.add_argument("--out", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON result to compare with")
+    parser.add_argument(
+        "--fail-over", type=float, default=0.0, help="exit 1 if a p50 grows by >N%%"
+    )
+    parser.add_argument("--verbose", action="store_true", help="keep handler logs")
+    args = parser.parse_args(argv)
+    latency = parse_latency(args.latency)
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    selected = [
+        s
+        for s in SCENARIOS
+        if not args.only or any(fnmatch.fnmatchcase(s.name, o) for o in args.only)
+    ]
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "latency": {s: latency.get(s, 0.0) for s in SERVICES},
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "scenarios": {},
+    }
+    for scenario in selected:
+        report["scenarios"][scenario.name] = run(scenario, args.repeat, latency)
+        print(f"{scenario.name} done", file=sys.stderr)
+    clients.reset()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            if not compare(json.load(f), report, args.fail_over):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
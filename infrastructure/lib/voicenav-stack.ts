@@ -49,6 +49,11 @@ export class VoiceNavStack extends cdk.Stack {
       removalPolicy: cdk.RemovalPolicy.DESTROY, // For development
     });
 
+    connectionsTable.addGlobalSecondaryIndex({
+      indexName: 'sessionID-index',
+      partitionKey: { name: 'sessionID', type: dynamodb.AttributeType.STRING },
+    });
+
     // Lambda function for WebSocket connection management
     const storeConnFunction = new lambda.Function(this, 'StoreConnFunction', {
       runtime: lambda.Runtime.PYTHON_3_9,
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Per-stage latency percentiles from VoiceNav metrics log lines.
+
+Reads the Embedded Metric Format lines the Lambdas print (raw, or with the
+timestamp/stream prefix of ``aws logs tail`` and CloudWatch exports) from
+files or stdin, and prints count, p50, p95 and p99 of every metric per
+stage. Lines of the same recording are joined on ``correlationId`` to add
+``transcribe_job_ms`` (job start to transcript written), the time spent
+inside Amazon Transcribe, which no handler can measure itself.
+
+    aws logs tail /aws/lambda/VoiceNav-TranscribeProcessor --since 1h > t.log
+    aws logs tail /aws/lambda/VoiceNav-BedrockProcessor --since 1h > b.log
+    python scripts/latency_report.py t.log b.log
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+PERCENTILES = (50, 95, 99)
+
+
+def parse_lines(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield the EMF documents found in ``lines``; anything else is skipped."""
+    for line in lines:
+        start = line.find("{")
+        if start < 0 or '"_aws"' not in line:
+            continue
+        try:
+            doc = json.loads(line[start:])
+        except ValueError:
+            continue
+        if isinstance(doc, dict) and "_aws" in doc and "Stage" in doc:
+            yield doc
+
+
+def metric_names(doc: Dict[str, Any]) -> List[str]:
+    names: List[str] = []
+    for block in doc["_aws"].get("CloudWatchMetrics", []):
+        names.extend(m["Name"] for m in block.get("Metrics", []))
+    return names
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def collect(docs: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, List[float]]]:
+    """Stage → metric → samples, plus the cross-stage ``transcribe_job_ms``."""
+    samples: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    job_started: Dict[str, int] = {}
+    transcript_at: Dict[str, int] = {}
+    for doc in docs:
+        stage = str(doc["Stage"])
+        for name in metric_names(doc):
+            if isinstance(doc.get(name), (int, float)):
+                samples[stage][name].append(float(doc[name]))
+        cid = doc.get("correlationId")
+        if not cid:
+            continue
+        if stage == "transcribe" and doc.get("jobStartedAt"):
+            job_started[cid] = int(doc["jobStartedAt"])
+        elif stage == "intent" and doc.get("transcriptAt"):
+            transcript_at[cid] = int(doc["transcriptAt"])
+    for cid, started in job_started.items():
+        if cid in transcript_at:
+            samples["transcribe"]["transcribe_job_ms"].append(
+                float(max(transcript_at[cid] - started, 0))
+            )
+    return samples
+
+
+def summarize(
+    samples: Dict[str, Dict[str, List[float]]],
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Stage → metric → ``{"count", "p50", "p95", "p99"}``."""
+    report: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for stage in sorted(samples):
+        report[stage] = {}
+        for name in sorted(samples[stage]):
+            values = sorted(samples[stage][name])
+            row: Dict[str, float] = {"count": len(values)}
+            for p in PERCENTILES:
+                row[f"p{p}"] = round(percentile(values, p), 1)
+            report[stage][name] = row
+    return report
+
+
+def print_table(
+    report: Dict[str, Dict[str, Dict[str, float]]], out: TextIO = sys.stdout
+) -> None:
+    header = f"{'stage':<12}{'metric':<26}{'count':>7}" + "".join(
+        f"{'p' + str(p):>10}" for p in PERCENTILES
+    )
+    print(header, file=out)
+    print("-" * len(header), file=out)
+    for stage, metrics in report.items():
+        for name, row in metrics.items():
+            cells = "".join(f"{row[f'p{p}']:>10.1f}" for p in PERCENTILES)
+            print(f"{stage:<12}{name:<26}{int(row['count']):>7}{cells}", file=out)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", help="log files (default: stdin)")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args(argv)
+
+    docs: List[Dict[str, Any]] = []
+    if args.files:
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                docs.extend(parse_lines(f))
+    else:
+        docs.extend(parse_lines(sys.stdin))
+    if not docs:
+        print("No metrics lines found", file=sys.stderr)
+        return 1
+
+    report = summarize(collect(docs))
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Shared fixtures for the Lambda handler tests."""
+
+import importlib
+import importlib.util
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "Src")
+
+# Shared ``core`` package, bundled next to app.py in every Lambda zip
+sys.path.append(SRC)
+
+from core import clients  # noqa: E402
+
+BEDROCK_ENV = {
+    "REGION": "us-east-1",
+    "AWS_BUCKET": "voicenav-bucket",
+    "OUTPUT_PREFIX": "transcribe-output/",
+    "MODEL_ID": "anthropic.claude-3-sonnet-20240229-v1:0",
+    "CONN_TABLE": "VoiceNavConnections",
+    "WS_ENDPOINT": "https://example.execute-api.us-east-1.amazonaws.com/test",
+}
+
+
+def load_lambda(package, name="app"):
+    """
+    Import a module from ``Src/<package>/``.
+
+    Every Lambda has an ``app.py``, so the package directory is only on
+    ``sys.path`` while the module executes and ``app`` is registered as
+    ``<package>_app``; sibling modules keep their own (unique) names.
+    """
+    path = os.path.join(SRC, package)
+    sys.path.insert(0, path)
+    try:
+        if name != "app":
+            return importlib.import_module(name)
+        spec = importlib.util.spec_from_file_location(
+            f"{package}_app", os.path.join(path, "app.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.remove(path)
+
+
+class FakeManagementApi:
+    """In-memory stand-in for the API Gateway management API client."""
+
+    class exceptions:
+        class GoneException(Exception):
+            pass
+
+    def __init__(self, gone=()):
+        self.gone = set(gone)
+        self.posted = []
+
+    def post_to_connection(self, ConnectionId, Data):
+        if ConnectionId in self.gone:
+            raise self.exceptions.GoneException(ConnectionId)
+        self.posted.append((ConnectionId, Data))
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """Each test gets its own cached clients and overrides."""
+    clients.reset()
+    yield
+    clients.reset()
+
+
+@pytest.fixture
+def conn_table(monkeypatch):
+    """Mocked VoiceNavConnections table with the sessionID index."""
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        yield dynamodb.create_table(
+            TableName="VoiceNavConnections",
+            KeySchema=[{"AttributeName": "connID", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "connID", "AttributeType": "S"},
+                {"AttributeName": "sessionID", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "sessionID-index",
+                    "KeySchema": [{"AttributeName": "sessionID", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+
+@pytest.fixture
+def epoch_table(conn_table):
+    """Mocked CONN_EPOCH_TABLE next to the connections table."""
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName="VoiceNavConnEpoch",
+        KeySchema=[{"AttributeName": "epochKey", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "epochKey", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+@pytest.fixture
+def bedrock_app(monkeypatch, conn_table):
+    """bedrock_processor.app wired to the mocked table and a fake API."""
+    for name, value in BEDROCK_ENV.items():
+        monkeypatch.setenv(name, value)
+    clients.override("apigatewaymanagementapi", FakeManagementApi())
+    return load_lambda("bedrock_processor")
+
+
+@pytest.fixture
+def transcribe_app(monkeypatch):
+    """transcribe_processor.app against mocked S3 and Transcribe."""
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("OUTPUT_BUCKET", "voicenav-bucket")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(
+            Bucket="voicenav-bucket"
+        )
+        yield load_lambda("transcribe_processor")
+
+
+def s3_event(*keys, bucket="voicenav-bucket"):
+    """S3 ObjectCreated notification for the given (unencoded) keys."""
+    return {
+        "Records": [
+            {"s3": {"bucket": {"name": bucket}, "object": {"key": key}}} for key in keys
+        ]
+    }
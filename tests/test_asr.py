@@ -0,0 +1,143 @@
+import io
+import json
+import wave
+from types import SimpleNamespace
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+from core import clients
+
+asr = load_lambda("transcribe_processor", "asr")
+
+BUCKET = "voicenav-bucket"
+KEY = "audio-store/sess-a/7c9e6679-7425-40de-944b-e07fc1f90ae7-rec.webm"
+
+
+class FakeLambda:
+    def __init__(self):
+        self.invoked = []
+
+    def invoke(self, FunctionName, InvocationType, Payload):
+        self.invoked.append((FunctionName, InvocationType, json.loads(Payload)))
+        return {"StatusCode": 202}
+
+
+@pytest.fixture
+def local_asr(transcribe_app, monkeypatch):
+    monkeypatch.setattr(transcribe_app, "ASR_BACKEND", "local")
+    monkeypatch.setattr(transcribe_app, "ASR_LOCAL_TEXT", "contact support")
+    return transcribe_app
+
+
+def _output_keys():
+    listing = boto3.client("s3", region_name="us-east-1").list_objects_v2(
+        Bucket=BUCKET, Prefix="transcribe-output/"
+    )
+    return [o["Key"] for o in listing.get("Contents", [])]
+
+
+def test_transcript_goes_straight_to_the_intent_stage(
+    local_asr, bedrock_app, conn_table, monkeypatch
+):
+    invoker = FakeLambda()
+    clients.override("lambda", invoker)
+    monkeypatch.setattr(local_asr, "INTENT_FUNCTION", "VoiceNav-BedrockProcessor")
+    conn_table.put_item(Item={"connID": "conn-a", "sessionID": "sess-a", "ttl": 2**31})
+
+    result = json.loads(local_asr.lambda_handler(s3_event(KEY), None)["body"])
+
+    [record] = result["results"]
+    assert record["status"] == "TRANSCRIBED" and record["handoff"] == "invoke"
+    [(function, mode, event)] = invoker.invoked
+    assert (function, mode) == ("VoiceNav-BedrockProcessor", "Event")
+    assert event["Records"][0]["transcript"] == {
+        "text": "contact support",
+        "confidences": [1.0, 1.0],
+    }
+    assert _output_keys() == []
+
+    delivered = bedrock_app.lambda_handler(event, None)
+
+    assert delivered["results"][0]["status"] == "delivered"
+    [(conn, data)] = clients.client("apigatewaymanagementapi").posted
+    assert conn == "conn-a" and json.loads(data)["selector"] == "#nav-contact"
+
+
+def test_without_intent_function_transcript_is_written_like_a_job(local_asr):
+    result = json.loads(local_asr.lambda_handler(s3_event(KEY), None)["body"])
+
+    [record] = result["results"]
+    assert record["status"] == "TRANSCRIBED" and record["handoff"] == "s3"
+    [key] = _output_keys()
+    assert record["outputLocation"] == f"s3://{BUCKET}/{key}"
+    doc = json.loads(
+        boto3.client("s3", region_name="us-east-1")
+        .get_object(Bucket=BUCKET, Key=key)["Body"]
+        .read()
+    )
+    assert doc["results"]["transcripts"][0]["transcript"] == "contact support"
+    assert [i["alternatives"][0]["content"] for i in doc["results"]["items"]] == [
+        "contact",
+        "support",
+    ]
+
+
+def _wav(seconds, rate=16000, channels=1):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * channels * int(rate * seconds))
+    return out.getvalue()
+
+
+def test_recordings_are_split_into_streaming_frames():
+    encoding, rate, chunks = asr.frames(_wav(0.25), "wav", 8000)
+
+    assert (encoding, rate) == ("pcm", 16000)
+    assert [len(c) for c in chunks] == [3200, 3200, 1600]
+    assert asr.frames(b"\0" * 8000, "pcm", 8000)[1] == 8000
+    with pytest.raises(asr.Unsupported):
+        asr.frames(_wav(0.1, channels=2), "wav", 16000)
+    with pytest.raises(asr.Unsupported):
+        asr.frames(b"\x1aE\xdf\xa3", "webm", 16000)
+
+
+def test_streamed_zero_confidence_is_kept():
+    items = [
+        SimpleNamespace(item_type="pronunciation", confidence=0.0),
+        SimpleNamespace(item_type="punctuation", confidence=None),
+        SimpleNamespace(item_type="pronunciation", confidence=None),
+        SimpleNamespace(item_type="pronunciation", confidence=0.42),
+    ]
+
+    assert asr.word_confidences(SimpleNamespace(items=items)) == [0.0, 1.0, 0.42]
+    assert asr.word_confidences(SimpleNamespace(items=None)) == []
+
+
+def test_streaming_falls_back_to_a_batch_job_for_webm():
+    class Batch:
+        calls = []
+
+        def transcribe(self, audio):
+            self.calls.append(audio.job_name)
+
+    backend = asr.StreamingBackend(None, "us-east-1", Batch())
+    audio = asr.Audio(f"s3://{BUCKET}/{KEY}", "webm", "job-1", BUCKET, "out.json")
+
+    assert backend.transcribe(audio) is None
+    assert Batch.calls == ["job-1"]
+
+
+def test_local_backend_is_deterministic():
+    backend = asr.LocalBackend("go home", {"-help.wav": "contact support"})
+    audio = asr.Audio("s3://b/audio-store/s/x-help.wav", "wav", "j", "b", "o")
+
+    assert backend.transcribe(audio) == asr.Transcript("contact support", [1.0, 1.0])
+    assert backend.transcribe(audio._replace(media_uri="s3://b/y.wav")).text == (
+        "go home"
+    )
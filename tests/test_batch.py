@@ -0,0 +1,81 @@
+import json
+
+from conftest import s3_event
+
+from core.batch import process_records
+
+
+def _handle(record):
+    key = record["object"]["key"]
+    if "bad" in key:
+        raise ValueError(f"cannot handle {key}")
+    return {"key": key}
+
+
+def test_every_record_is_processed():
+    result = process_records(s3_event("a", "b", "c"), _handle, max_workers=3)
+
+    assert result["statusCode"] == 200
+    assert [r["key"] for r in result["results"]] == ["a", "b", "c"]
+    assert result["batchItemFailures"] == []
+
+
+def test_bad_record_is_isolated():
+    result = process_records(s3_event("a", "bad", "c"), _handle)
+
+    assert result["statusCode"] == 207
+    assert [r["ok"] for r in result["results"]] == [True, False, True]
+    assert result["batchItemFailures"] == [{"itemIdentifier": "bad"}]
+
+
+def test_sqs_wrapped_events_report_message_ids():
+    event = {
+        "Records": [
+            {"messageId": "m-1", "body": json.dumps(s3_event("a", "b"))},
+            {"messageId": "m-2", "body": json.dumps(s3_event("bad"))},
+            {"messageId": "m-3", "body": json.dumps({"Event": "s3:TestEvent"})},
+        ]
+    }
+
+    result = process_records(event, _handle)
+
+    assert len(result["results"]) == 3
+    assert result["batchItemFailures"] == [{"itemIdentifier": "m-2"}]
+
+
+def test_transcribe_handler_starts_one_job_per_record(transcribe_app):
+    event = s3_event(
+        "audio-store/sess-1/one-rec.webm",
+        "audio-store/sess-2/two-rec.webm",
+    )
+
+    response = transcribe_app.lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    results = json.loads(response["body"])["results"]
+    assert [r["outputLocation"].split("/")[4] for r in results] == [
+        "sess-1",
+        "sess-2",
+    ]
+    jobs = transcribe_app.transcribe_client().list_transcription_jobs()
+    assert len(jobs["TranscriptionJobSummaries"]) == 2
+
+
+def test_bedrock_handler_isolates_bad_records(bedrock_app, monkeypatch):
+    seen = []
+
+    def fake_process(rec):
+        seen.append(rec["object"]["key"])
+        if rec["object"]["key"].endswith("bad.json"):
+            raise KeyError("results")
+        return {"status": "delivered"}
+
+    monkeypatch.setattr(bedrock_app, "process_record", fake_process)
+    event = s3_event("transcribe-output/a.json", "transcribe-output/bad.json")
+
+    response = bedrock_app.lambda_handler(event, None)
+
+    assert sorted(seen) == ["transcribe-output/a.json", "transcribe-output/bad.json"]
+    assert response["batchItemFailures"] == [
+        {"itemIdentifier": "transcribe-output/bad.json"}
+    ]
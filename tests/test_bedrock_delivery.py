@@ -0,0 +1,120 @@
+import json
+import time
+
+import boto3
+import pytest
+
+from core import keys
+from core.epoch import read_epoch
+
+
+def _connect(table, conn_id, session_id=None, ttl_offset=3600):
+    item = {"connID": conn_id, "ttl": int(time.time()) + ttl_offset}
+    if session_id:
+        item["sessionID"] = session_id
+    table.put_item(Item=item)
+
+
+@pytest.mark.parametrize(
+    "key, expected",
+    [
+        ("audio-store/sess-1/abc-rec.webm", "sess-1"),
+        ("transcribe-output/sess-1/voicenav-job-1.json", None),
+        ("audio-store/abc-rec.webm", None),
+        ("audio-store/bad session/abc-rec.webm", None),
+    ],
+)
+def test_session_from_audio_key(key, expected):
+    assert keys.session_from_key(key, "audio-store/") == expected
+
+
+def test_output_key_keeps_session():
+    key = keys.output_key("transcribe-output/", "job-1", "sess-1")
+    assert key == "transcribe-output/sess-1/job-1.json"
+    assert keys.session_from_key(key, "transcribe-output/") == "sess-1"
+    assert keys.output_key("transcribe-output/", "job-1") == (
+        "transcribe-output/job-1.json"
+    )
+
+
+def test_targeted_delivery_only_reaches_session(bedrock_app, conn_table):
+    _connect(conn_table, "conn-a", "sess-a")
+    _connect(conn_table, "conn-b", "sess-b")
+    _connect(conn_table, "conn-old", "sess-a", ttl_offset=-10)
+
+    bedrock_app.deliver({"action": "click", "selector": "#nav-book"}, "sess-a")
+
+    assert [cid for cid, _ in bedrock_app.apigw().posted] == ["conn-a"]
+
+
+def test_targeted_delivery_without_session_sends_nothing(bedrock_app, conn_table):
+    _connect(conn_table, "conn-a", "sess-a")
+
+    bedrock_app.deliver({"action": "click", "selector": "#nav-book"}, None)
+
+    assert bedrock_app.apigw().posted == []
+
+
+def test_broadcast_mode_is_opt_in(bedrock_app, conn_table, monkeypatch):
+    _connect(conn_table, "conn-a", "sess-a")
+    _connect(conn_table, "conn-b", "sess-b")
+    monkeypatch.setattr(bedrock_app, "DELIVERY_MODE", "broadcast")
+
+    bedrock_app.deliver({"action": "click", "selector": "#nav-book"}, "sess-a")
+
+    assert sorted(cid for cid, _ in bedrock_app.apigw().posted) == ["conn-a", "conn-b"]
+    assert bedrock_app.conn_cache().misses == 1
+
+
+def test_gone_connection_is_removed(bedrock_app, conn_table, epoch_table, monkeypatch):
+    _connect(conn_table, "conn-a", "sess-a")
+    bedrock_app.apigw().gone.add("conn-a")
+    monkeypatch.setattr(bedrock_app, "CONN_EPOCH_TABLE", epoch_table.name)
+
+    bedrock_app.deliver({"action": "click", "selector": "#nav-book"}, "sess-a")
+
+    assert "Item" not in conn_table.get_item(Key={"connID": "conn-a"})
+    # Targeted delivery never reads the connection cache, so no epoch write
+    assert read_epoch(epoch_table) == 0
+
+
+def test_gone_connection_bumps_epoch_when_broadcast_caching(
+    bedrock_app, conn_table, epoch_table, monkeypatch
+):
+    _connect(conn_table, "conn-a", "sess-a")
+    _connect(conn_table, "conn-b", "sess-b")
+    bedrock_app.apigw().gone.add("conn-a")
+    monkeypatch.setattr(bedrock_app, "DELIVERY_MODE", "broadcast")
+    monkeypatch.setattr(bedrock_app, "CONN_EPOCH_TABLE", epoch_table.name)
+
+    bedrock_app.deliver({"action": "click", "selector": "#nav-book"}, "sess-a")
+
+    assert [cid for cid, _ in bedrock_app.apigw().posted] == ["conn-b"]
+    assert read_epoch(epoch_table) == 1
+    assert list(bedrock_app.conn_cache().connections()) == ["conn-b"]
+
+
+def test_handler_routes_by_output_key(bedrock_app, conn_table, monkeypatch):
+    _connect(conn_table, "conn-a", "sess-a")
+    _connect(conn_table, "conn-b", "sess-b")
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="voicenav-bucket")
+    key = "transcribe-output/sess-a/voicenav-job-1.json"
+    transcript = {"results": {"transcripts": [{"transcript": "book"}]}}
+    s3.put_object(Bucket="voicenav-bucket", Key=key, Body=json.dumps(transcript))
+    monkeypatch.setattr(
+        bedrock_app,
+        "ask_bedrock",
+        lambda cmd, prompt=None, model_id=None: {
+            "action": "click",
+            "selector": "#nav-book",
+        },
+    )
+    event = {
+        "Records": [
+            {"s3": {"bucket": {"name": "voicenav-bucket"}, "object": {"key": key}}}
+        ]
+    }
+
+    assert bedrock_app.lambda_handler(event, None)["statusCode"] == 200
+    assert [cid for cid, _ in bedrock_app.apigw().posted] == ["conn-a"]
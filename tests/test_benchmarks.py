@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+
+from conftest import SRC
+
+sys.path.append(os.path.dirname(SRC))
+
+from benchmarks import run  # noqa: E402
+from benchmarks.fakes import StubTable  # noqa: E402
+from boto3.dynamodb.conditions import Attr, Key  # noqa: E402
+
+
+def test_stub_table_supports_handler_expressions():
+    table = StubTable(
+        [{"connID": "a", "sessionID": "s", "ttl": 10}, {"connID": "b", "ttl": 1}],
+        indexes={"sessionID-index": "sessionID"},
+        page_size=1,
+    )
+    rsp = table.update_item(
+        Key={"connID": "__epoch__"},
+        UpdateExpression="ADD epoch :one",
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="UPDATED_NEW",
+    )
+    assert rsp == {"Attributes": {"epoch": 1}}
+
+    found = table.query(
+        IndexName="sessionID-index",
+        KeyConditionExpression=Key("sessionID").eq("s"),
+        FilterExpression=Attr("ttl").gt(5),
+    )["Items"]
+    assert [i["connID"] for i in found] == ["a"]
+
+    scan = {
+        "ExpressionAttributeNames": {"#t": "ttl"},
+        "FilterExpression": "#t > :now",
+        "ExpressionAttributeValues": {":now": 5},
+    }
+    first = table.scan(**scan)
+    rest = table.scan(ExclusiveStartKey=first["LastEvaluatedKey"], **scan)
+    assert [i["connID"] for i in first["Items"] + rest["Items"]] == ["a"]
+
+
+def test_suite_runs_handlers_against_fakes(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+
+    assert (
+        run.main(
+            ["--repeat", "2", "--only", "store_conn/*", "*/burst-1", "intent/fast-*"]
+            + ["--latency", "dynamodb=0.001", "--out", str(out), "--verbose"]
+        )
+        == 0
+    )
+
+    report = json.loads(out.read_text())
+    assert report["meta"]["latency"]["dynamodb"] == 0.001
+    assert set(report["scenarios"]) == {
+        "store_conn/connect",
+        "store_conn/register",
+        "store_conn/heartbeat",
+        "store_conn/disconnect",
+        "transcribe/burst-1",
+        "intent/fast-path",
+    }
+    for row in report["scenarios"].values():
+        assert row["failed"] == 0 and row["invocations"] == 2
+    assert report["scenarios"]["store_conn/heartbeat"]["calls"] == {}
+    assert report["scenarios"]["intent/fast-path"]["calls"]["apigw"] == {
+        "post_to_connection": 3
+    }
+    assert run.compare(report, report, fail_over=5)
+    assert "intent/fast-path" in capsys.readouterr().err
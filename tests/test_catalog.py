@@ -0,0 +1,137 @@
+import json
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+from core import catalog
+
+KEY = "transcribe-output/sess-a/voicenav-job-1.json"
+PAGE = {
+    "#pay": ["Pay invoice button", "pay", "checkout"],
+    "#faq": "Frequently asked questions",
+}
+
+
+def test_normalize_and_version():
+    selectors = catalog.normalize_catalog({"#faq": "  FAQ   page ", "#a": ["A", "b"]})
+
+    assert selectors == {"#faq": ["FAQ page"], "#a": ["A", "b"]}
+    reordered = catalog.normalize_catalog({"#a": ["A", "b"], "#faq": "FAQ page"})
+    assert catalog.catalog_version(reordered) == catalog.catalog_version(selectors)
+
+
+@pytest.mark.parametrize(
+    "raw", [None, {}, {"#a": ""}, {"#a": []}, {"#a": [1]}, {"": "x"}, ["#a"]]
+)
+def test_invalid_catalogs_rejected(raw):
+    with pytest.raises(ValueError):
+        catalog.normalize_catalog(raw)
+
+
+def _ws_event(event_type, body=None, route=None):
+    ctx = {"connectionId": "conn-a", "eventType": event_type}
+    if route:
+        ctx["routeKey"] = route
+    event = {"requestContext": ctx, "queryStringParameters": {"session": "sess-a"}}
+    if body is not None:
+        event["body"] = json.dumps(body)
+    return event
+
+
+@pytest.fixture
+def store_conn(conn_table):
+    return load_lambda("store_conn")
+
+
+def test_register_stores_catalog_on_connection(store_conn, conn_table):
+    store_conn.lambda_handler(_ws_event("CONNECT"), None)
+
+    resp = store_conn.lambda_handler(
+        _ws_event("MESSAGE", {"action": "register", "selectors": PAGE}, "register"),
+        None,
+    )
+
+    assert resp["statusCode"] == 200
+    item = conn_table.get_item(Key={"connID": "conn-a"})["Item"]
+    stored = catalog.from_item(item)
+    assert stored.version == json.loads(resp["body"])["catalogVersion"]
+    assert stored.selectors["#faq"] == ["Frequently asked questions"]
+    assert item["sessionID"] == "sess-a"
+
+
+def test_register_rejects_bad_catalog_and_unknown_connection(store_conn, conn_table):
+    bad = store_conn.lambda_handler(
+        _ws_event("MESSAGE", {"action": "register", "selectors": []}, "register"),
+        None,
+    )
+    gone = store_conn.lambda_handler(
+        _ws_event("MESSAGE", {"action": "register", "selectors": PAGE}, "register"),
+        None,
+    )
+
+    assert bad["statusCode"] == 400
+    assert gone["statusCode"] == 410
+    assert "Item" not in conn_table.get_item(Key={"connID": "conn-a"})
+
+
+@pytest.fixture
+def registered_app(bedrock_app, conn_table, store_conn, monkeypatch):
+    store_conn.lambda_handler(_ws_event("CONNECT"), None)
+    store_conn.lambda_handler(
+        _ws_event("MESSAGE", {"action": "register", "selectors": PAGE}, "register"),
+        None,
+    )
+    monkeypatch.setattr(bedrock_app, "GATE_MIN_CONFIDENCE", 0.0)
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="voicenav-bucket")
+    return bedrock_app
+
+
+def _handle(app, text):
+    transcript = {"results": {"transcripts": [{"transcript": text}]}}
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket="voicenav-bucket", Key=KEY, Body=json.dumps(transcript)
+    )
+    return app.lambda_handler(s3_event(KEY), None)["results"][0]["status"]
+
+
+def test_prompt_lists_only_registered_selectors(registered_app, monkeypatch):
+    prompts = []
+
+    def fake_ask(cmd, prompt=None, model_id=None):
+        prompts.append(prompt)
+        return {"action": "click", "selector": "#faq"}
+
+    monkeypatch.setattr(registered_app, "ask_bedrock", fake_ask)
+
+    assert _handle(registered_app, "where are the common questions") == "delivered"
+    assert _handle(registered_app, "show the usual questions") == "delivered"
+
+    assert "#faq" in prompts[0] and "#pay" in prompts[0]
+    assert "#nav-book" not in prompts[0]
+    [(conn_id, data)] = registered_app.apigw().posted[:1]
+    assert json.loads(data) == {"action": "click", "selector": "#faq"}
+    # Second transcript on the same page reused the built prompt
+    assert registered_app.prompt_book.stats["builds"] == 2  # default + page
+
+
+def test_registered_phrases_feed_fast_path(registered_app, monkeypatch):
+    monkeypatch.setattr(registered_app, "ask_bedrock", pytest.fail, raising=True)
+
+    assert _handle(registered_app, "checkout please") == "delivered"
+
+
+def test_selector_outside_catalog_is_rejected(registered_app, monkeypatch):
+    monkeypatch.setattr(
+        registered_app,
+        "ask_bedrock",
+        lambda cmd, prompt=None, model_id=None: {
+            "action": "click",
+            "selector": "#nav-book",
+        },
+    )
+
+    assert _handle(registered_app, "book something for me") == "bad_intent"
+    assert registered_app.apigw().posted == []
+    assert registered_app.intent_cache().stats["size"] == 0
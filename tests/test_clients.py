@@ -0,0 +1,45 @@
+from core import clients
+
+
+def test_clients_are_created_once(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    first = clients.client("s3")
+
+    assert clients.client("s3") is first
+    assert clients.client("s3", read_timeout=30) is not first
+    assert clients.table("T") is clients.table("T")
+
+
+def test_config_is_tuned_and_overridable(monkeypatch):
+    monkeypatch.setenv("AWS_MAX_POOL_CONNECTIONS", "64")
+
+    config = clients.default_config(read_timeout=60)
+
+    assert config.max_pool_connections == 64
+    assert config.read_timeout == 60
+    assert config.tcp_keepalive is True
+    assert config.retries["mode"] == "adaptive"
+
+
+def test_override_replaces_client():
+    fake = object()
+    clients.override("bedrock-runtime", fake)
+    clients.override("dynamodb:T", fake)
+
+    assert clients.client("bedrock-runtime", read_timeout=60) is fake
+    assert clients.table("T") is fake
+
+
+def test_prime_ignores_failures():
+    called = []
+
+    def ok():
+        called.append("ok")
+
+    def denied():
+        raise PermissionError("AccessDenied")
+
+    clients.prime([ok, denied])
+
+    assert called == ["ok"]
@@ -0,0 +1,167 @@
+import threading
+import time
+
+import pytest
+
+from conftest import load_lambda
+
+iter_live_connections = load_lambda(
+    "bedrock_processor", "connections"
+).iter_live_connections
+
+
+class PagedTable:
+    """Scan stub: ``page_size`` items per page, items split by segment."""
+
+    def __init__(self, items, page_size=3, fail_segment=None):
+        self.items = items
+        self.page_size = page_size
+        self.fail_segment = fail_segment
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+        seg = kwargs.get("Segment", 0)
+        if seg == self.fail_segment:
+            raise RuntimeError("throttled")
+        total = kwargs.get("TotalSegments", 1)
+        now = kwargs["ExpressionAttributeValues"][":now"]
+        mine = [i for n, i in enumerate(self.items) if n % total == seg]
+        start = kwargs.get("ExclusiveStartKey", {}).get("pos", 0)
+        page = mine[start : start + self.page_size]
+        rsp = {"Items": [{"connID": i["connID"]} for i in page if i["ttl"] > now]}
+        if start + self.page_size < len(mine):
+            rsp["LastEvaluatedKey"] = {"pos": start + self.page_size}
+        return rsp
+
+
+def _items(n, expired=()):
+    return [
+        {"connID": f"conn-{i}", "ttl": 0 if i in expired else 2000} for i in range(n)
+    ]
+
+
+def test_follows_last_evaluated_key():
+    table = PagedTable(_items(10, expired={4}))
+
+    ids = list(iter_live_connections(table, segments=1, now=1000))
+
+    assert sorted(ids) == sorted(f"conn-{i}" for i in range(10) if i != 4)
+    assert len(table.calls) == 4
+
+
+def test_parallel_segments_cover_table():
+    table = PagedTable(_items(50), page_size=4)
+
+    ids = list(iter_live_connections(table, segments=4, now=1000))
+
+    assert sorted(ids) == sorted(f"conn-{i}" for i in range(50))
+    assert {c["Segment"] for c in table.calls} == {0, 1, 2, 3}
+    assert all(c["TotalSegments"] == 4 for c in table.calls)
+
+
+def test_segment_error_is_raised():
+    table = PagedTable(_items(20), fail_segment=1)
+
+    with pytest.raises(RuntimeError, match="throttled"):
+        list(iter_live_connections(table, segments=2, now=1000))
+
+
+def test_consumer_can_stop_early():
+    table = PagedTable(_items(1000), page_size=10)
+
+    stream = iter_live_connections(table, segments=2, now=1000, buffer=5)
+    first = [next(stream) for _ in range(3)]
+    stream.close()
+
+    assert len(first) == 3
+    assert len(table.calls) < 100
+
+
+connections = load_lambda("bedrock_processor", "connections")
+
+
+def _live(table, *conn_ids):
+    for cid in conn_ids:
+        table.put_item(Item={"connID": cid, "ttl": 4102444800})
+
+
+def test_cache_hits_until_epoch_changes(conn_table, epoch_table):
+    from core.epoch import bump_epoch
+
+    _live(conn_table, "conn-a", "conn-b")
+    cache = connections.ConnectionCache(conn_table, ttl=60, epoch_table=epoch_table)
+
+    assert sorted(cache.connections()) == ["conn-a", "conn-b"]
+    _live(conn_table, "conn-c")
+    assert sorted(cache.connections()) == ["conn-a", "conn-b"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    bump_epoch(epoch_table)
+    assert sorted(cache.connections()) == ["conn-a", "conn-b", "conn-c"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_connect_after_load_reaches_warm_cache(conn_table, epoch_table, monkeypatch):
+    monkeypatch.setenv("CONN_EPOCH_TABLE", epoch_table.name)
+    store_conn = load_lambda("store_conn")
+    _live(conn_table, "conn-a")
+    cache = connections.ConnectionCache(conn_table, ttl=60, epoch_table=epoch_table)
+    assert list(cache.connections()) == ["conn-a"]
+
+    event = {"requestContext": {"connectionId": "conn-b", "eventType": "CONNECT"}}
+    assert store_conn.lambda_handler(event, None)["statusCode"] == 200
+
+    assert sorted(cache.connections()) == ["conn-a", "conn-b"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_store_conn_without_epoch_table_writes_no_marker(conn_table, monkeypatch):
+    monkeypatch.delenv("CONN_EPOCH_TABLE", raising=False)
+    store_conn = load_lambda("store_conn")
+    for event_type in ("CONNECT", "DISCONNECT"):
+        event = {"requestContext": {"connectionId": "conn-a", "eventType": event_type}}
+        assert store_conn.lambda_handler(event, None)["statusCode"] == 200
+
+    assert conn_table.scan()["Items"] == []
+
+
+def test_cache_invalidate_drops_gone_connections(conn_table, epoch_table):
+    from core.epoch import read_epoch
+
+    _live(conn_table, "conn-a", "conn-b")
+    cache = connections.ConnectionCache(conn_table, ttl=60, epoch_table=epoch_table)
+    list(cache.connections())
+
+    cache.invalidate(["conn-a"])
+
+    assert list(cache.connections()) == ["conn-b"]
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 1}
+    assert read_epoch(epoch_table) == 1
+
+
+def test_cache_without_epoch_table_expires_by_ttl(conn_table):
+    _live(conn_table, "conn-a", "conn-b")
+    cache = connections.ConnectionCache(conn_table, ttl=60)
+    list(cache.connections())
+
+    cache.invalidate(["conn-a"])
+    assert list(cache.connections()) == ["conn-b"]
+    assert cache.stats == {"hits": 1, "misses": 1, "size": 1}
+
+    cache.ttl = 0.01
+    _live(conn_table, "conn-c")
+    time.sleep(0.02)
+    assert sorted(cache.connections()) == ["conn-a", "conn-b", "conn-c"]
+
+
+def test_cache_skips_oversized_and_partial_loads(conn_table):
+    _live(conn_table, "conn-a", "conn-b", "conn-c")
+    cache = connections.ConnectionCache(conn_table, ttl=60, max_size=2)
+
+    assert len(list(cache.connections())) == 3
+    next(cache.connections())
+    assert cache.misses == 2
+    assert cache.stats["size"] == 0
@@ -0,0 +1,71 @@
+import json
+import time
+
+from conftest import FakeManagementApi, load_lambda
+
+FanOut = load_lambda("bedrock_processor", "fanout").FanOut
+
+INTENT = {"action": "click", "selector": "#nav-home"}
+
+
+class FlakyManagementApi(FakeManagementApi):
+    def __init__(self, failing=(), delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.failing = set(failing)
+        self.delay = delay
+
+    def post_to_connection(self, ConnectionId, Data):
+        if self.delay:
+            time.sleep(self.delay)
+        if ConnectionId in self.failing:
+            raise RuntimeError("boom")
+        super().post_to_connection(ConnectionId, Data)
+
+
+def test_fanout_counts_and_single_payload(conn_table):
+    apigw = FakeManagementApi()
+    conn_ids = [f"conn-{i}" for i in range(50)]
+
+    result = FanOut(apigw, conn_table, max_workers=4).send(iter(conn_ids), INTENT)
+
+    assert (result.delivered, result.gone, result.failed) == (50, 0, 0)
+    assert sorted(cid for cid, _ in apigw.posted) == sorted(conn_ids)
+    payloads = {id(data) for _, data in apigw.posted}
+    assert len(payloads) == 1
+    assert json.loads(apigw.posted[0][1]) == INTENT
+
+
+def test_fanout_batches_stale_cleanup(conn_table):
+    for i in range(30):
+        conn_table.put_item(Item={"connID": f"conn-{i}", "ttl": 1})
+    gone = {f"conn-{i}" for i in range(27)}
+    apigw = FlakyManagementApi(failing={"conn-29"}, gone=gone)
+
+    result = FanOut(apigw, conn_table, max_workers=8).send(
+        [f"conn-{i}" for i in range(30)], INTENT
+    )
+
+    assert (result.delivered, result.gone, result.failed) == (2, 27, 1)
+    assert result.errors == {"RuntimeError": 1}
+    remaining = {i["connID"] for i in conn_table.scan()["Items"]}
+    assert remaining == {"conn-27", "conn-28", "conn-29"}
+
+
+def test_fanout_respects_deadline(conn_table):
+    apigw = FlakyManagementApi(delay=0.05)
+
+    read = []
+
+    def conn_ids():
+        for i in range(40):
+            read.append(i)
+            yield f"conn-{i}"
+
+    result = FanOut(apigw, conn_table, max_workers=2, deadline=0.08).send(
+        conn_ids(), INTENT
+    )
+
+    assert result.truncated
+    # Reading stopped at the deadline; only queued posts count as expired
+    assert len(read) < 40
+    assert result.delivered + result.expired == len(read) - 1
@@ -0,0 +1,102 @@
+import json
+import time
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+gating = load_lambda("bedrock_processor", "gating")
+
+KEY = "transcribe-output/sess-a/voicenav-job-1.json"
+
+
+@pytest.mark.parametrize(
+    "text, confidences, reason",
+    [
+        ("", None, "empty"),
+        ("  ...  ", None, "empty"),
+        ("Um.", [0.99], "filler"),
+        ("uh, hmm", [0.9, 0.9], "filler"),
+        ("um home", [0.2, 0.3], "low_confidence"),
+        ("book", [0.95], None),
+        ("book", None, None),  # confidences not read: no confidence check
+    ],
+)
+def test_gate_reasons(text, confidences, reason):
+    gate = gating.TranscriptGate(min_confidence=0.5)
+    assert gate.check(text, confidences) == reason
+
+
+def test_min_words_and_stats():
+    gate = gating.TranscriptGate(min_words=2)
+
+    assert gate.check("um book") == "too_short"
+    assert gate.check("book appointment") is None
+    assert gate.check("") == "empty"
+    assert gate.stats == {"passed": 1, "too_short": 1, "empty": 1}
+
+
+def _transcript(text, confidence):
+    items = [
+        {
+            "alternatives": [{"confidence": str(confidence), "content": word}],
+            "type": "pronunciation",
+        }
+        for word in text.split()
+    ]
+    return {"results": {"transcripts": [{"transcript": text}], "items": items}}
+
+
+@pytest.fixture
+def gated_app(bedrock_app, conn_table, monkeypatch):
+    conn_table.put_item(
+        Item={"connID": "conn-a", "sessionID": "sess-a", "ttl": int(time.time()) + 60}
+    )
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="voicenav-bucket")
+    calls = []
+    monkeypatch.setattr(
+        bedrock_app,
+        "ask_bedrock",
+        lambda cmd, prompt=None, model_id=None: calls.append(cmd),
+    )
+    bedrock_app.model_calls = calls
+    return bedrock_app
+
+
+def _handle(app, doc):
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket="voicenav-bucket", Key=KEY, Body=json.dumps(doc)
+    )
+    return app.lambda_handler(s3_event(KEY), None)["results"][0]["status"]
+
+
+@pytest.mark.parametrize("text, confidence", [("", 0), ("um", 0.99), ("maybe", 0.1)])
+def test_unusable_transcript_skips_model_and_asks_to_retry(gated_app, text, confidence):
+    status = _handle(gated_app, _transcript(text, confidence))
+
+    assert status == "gated"
+    assert gated_app.model_calls == []
+    [(conn_id, data)] = gated_app.apigw().posted
+    assert conn_id == "conn-a"
+    assert json.loads(data)["action"] == "retry"
+    assert sum(gated_app.gate.skipped.values()) == 1
+
+
+def test_retry_prompt_is_never_broadcast(gated_app, conn_table, monkeypatch):
+    conn_table.put_item(
+        Item={"connID": "conn-b", "sessionID": "sess-b", "ttl": int(time.time()) + 60}
+    )
+    monkeypatch.setattr(gated_app, "DELIVERY_MODE", "broadcast")
+
+    assert _handle(gated_app, _transcript("um", 0.99)) == "gated"
+
+    assert [cid for cid, _ in gated_app.apigw().posted] == ["conn-a"]
+
+
+def test_confident_transcript_passes_gate(gated_app):
+    status = _handle(gated_app, _transcript("book appointment", 0.97))
+
+    # Fast path resolves it without the model
+    assert status == "delivered"
+    assert gated_app.gate.passed == 1
@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+
+from conftest import load_lambda
+
+
+def _heartbeat(app, body=None, cid="conn-a"):
+    event = {
+        "requestContext": {
+            "connectionId": cid,
+            "eventType": "MESSAGE",
+            "routeKey": "heartbeat",
+        }
+    }
+    if body is not None:
+        event["body"] = json.dumps(body)
+    return app.lambda_handler(event, None)
+
+
+@pytest.fixture
+def store_conn(conn_table):
+    return load_lambda("store_conn")
+
+
+class CountingTable:
+    """Passes calls through to the mocked table, counting ``update_item``."""
+
+    def __init__(self, table):
+        self.table = table
+        self.meta = table.meta
+        self.updates = 0
+
+    def update_item(self, **kwargs):
+        self.updates += 1
+        return self.table.update_item(**kwargs)
+
+
+def test_heartbeat_extends_ttl_once_close_to_expiry(store_conn, conn_table):
+    now = int(time.time())
+    conn_table.put_item(Item={"connID": "conn-a", "ttl": now + 60})
+
+    resp = _heartbeat(store_conn, {"action": "heartbeat", "lastActivity": now - 5})
+
+    assert resp["statusCode"] == 200
+    body = json.loads(resp["body"])
+    assert body["refreshed"] and body["ttl"] >= now + store_conn.CONN_TTL
+    item = conn_table.get_item(Key={"connID": "conn-a"})["Item"]
+    assert item["ttl"] == body["ttl"] and item["lastActivity"] == now - 5
+
+
+def test_heartbeats_far_from_expiry_write_nothing(store_conn, conn_table, monkeypatch):
+    counting = CountingTable(conn_table)
+    monkeypatch.setattr(store_conn, "get_dynamodb_table", lambda: counting)
+    conn_table.put_item(Item={"connID": "conn-a", "ttl": int(time.time()) + 60})
+
+    ttl = json.loads(_heartbeat(store_conn)["body"])["ttl"]
+    for _ in range(5):
+        resp = _heartbeat(store_conn, {"ttl": ttl})
+        assert json.loads(resp["body"]) == {"ttl": ttl, "refreshed": False}
+
+    assert counting.updates == 1
+    # The echoed ttl coalesces on containers that never wrote this row
+    store_conn._expiry.clear()
+    assert not json.loads(_heartbeat(store_conn, {"ttl": ttl})["body"])["refreshed"]
+    # A page change is written straight away
+    _heartbeat(store_conn, {"ttl": ttl, "page": "/book"})
+    assert counting.updates == 2
+    assert conn_table.get_item(Key={"connID": "conn-a"})["Item"]["page"] == "/book"
+
+
+def test_heartbeat_does_not_resurrect_a_gone_connection(store_conn, conn_table):
+    assert _heartbeat(store_conn, {})["statusCode"] == 410
+    assert "Item" not in conn_table.get_item(Key={"connID": "conn-a"})
+    assert _heartbeat(store_conn, {"page": 5})["statusCode"] == 400
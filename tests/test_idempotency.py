@@ -0,0 +1,103 @@
+import json
+import time
+
+import boto3
+import pytest
+
+from conftest import s3_event
+
+from core import clients, idempotency
+
+
+@pytest.fixture
+def idem_table(conn_table, monkeypatch):
+    monkeypatch.setenv("IDEMPOTENCY_TABLE", "VoiceNavIdempotency")
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName="VoiceNavIdempotency",
+        KeySchema=[{"AttributeName": "idemKey", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "idemKey", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def _event(key, etag="abc123"):
+    event = s3_event(key)
+    event["Records"][0]["s3"]["object"]["eTag"] = etag
+    return event
+
+
+def test_claim_is_exclusive_until_released(idem_table):
+    store = idempotency.IdempotencyStore(idem_table)
+
+    assert store.claim("k")
+    assert not store.claim("k")
+    store.release("k")
+    assert store.claim("k")
+    store.complete("k", "done")
+    assert not store.claim("k")
+    assert idem_table.get_item(Key={"idemKey": "k"})["Item"]["status"] == "COMPLETED"
+
+
+def test_expired_lease_can_be_reclaimed(idem_table):
+    store = idempotency.IdempotencyStore(idem_table, lease=-1)
+
+    assert store.claim("k")
+    assert store.claim("k")
+
+
+def test_disabled_store_always_claims():
+    store = idempotency.IdempotencyStore(None)
+
+    assert store.claim("k") and store.claim("k")
+
+
+def test_job_names_are_deterministic_per_content():
+    rec = _event("audio-store/s/a.webm")["Records"][0]["s3"]
+    key = idempotency.record_key("transcribe", rec)
+    rec["object"]["eTag"] = "other"
+    changed = idempotency.record_key("transcribe", rec)
+
+    assert idempotency.job_name(key) == idempotency.job_name(key)
+    assert idempotency.job_name(key) != idempotency.job_name(changed)
+
+
+def test_duplicate_upload_starts_one_job(idem_table, transcribe_app):
+    event = _event("audio-store/sess-1/one-rec.webm")
+
+    first = json.loads(transcribe_app.lambda_handler(event, None)["body"])
+    again = json.loads(transcribe_app.lambda_handler(event, None)["body"])
+
+    assert first["results"][0]["status"] == "STARTED"
+    assert again["results"][0]["status"] == "DUPLICATE"
+    assert again["results"][0]["jobId"] == first["results"][0]["jobId"]
+    jobs = transcribe_app.transcribe_client().list_transcription_jobs()
+    assert len(jobs["TranscriptionJobSummaries"]) == 1
+
+
+def test_existing_job_is_found_without_idempotency_table(transcribe_app):
+    event = _event("audio-store/sess-1/one-rec.webm")
+
+    transcribe_app.lambda_handler(event, None)
+    again = json.loads(transcribe_app.lambda_handler(event, None)["body"])
+
+    assert again["results"][0]["status"] == "EXISTS"
+
+
+def test_duplicate_transcript_delivers_once(idem_table, bedrock_app, conn_table):
+    conn_table.put_item(
+        Item={"connID": "c", "sessionID": "s", "ttl": int(time.time()) + 60}
+    )
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="voicenav-bucket")
+    key = "transcribe-output/s/job.json"
+    body = {"results": {"transcripts": [{"transcript": "go home"}]}}
+    s3.put_object(Bucket="voicenav-bucket", Key=key, Body=json.dumps(body))
+    event = _event(key)
+
+    first = bedrock_app.lambda_handler(event, None)
+    again = bedrock_app.lambda_handler(event, None)
+
+    assert first["results"][0]["status"] == "delivered"
+    assert again["results"][0]["status"] == "duplicate"
+    assert len(clients.client("apigatewaymanagementapi").posted) == 1
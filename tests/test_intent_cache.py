@@ -0,0 +1,91 @@
+import boto3
+
+from conftest import load_lambda
+
+intent_cache = load_lambda("bedrock_processor", "intent_cache")
+
+BOOK = {"action": "click", "selector": "#nav-book"}
+
+
+def _table():
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    return dynamodb.create_table(
+        TableName="VoiceNavIntentCache",
+        KeySchema=[{"AttributeName": "cacheKey", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "cacheKey", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def test_normalized_transcripts_share_an_entry():
+    cache = intent_cache.IntentCache("model\0prompt")
+    cache.put("Go to booking.", BOOK)
+
+    assert cache.get("  go TO booking ") == BOOK
+    assert cache.get("go to contact") is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_scope_change_invalidates():
+    old = intent_cache.IntentCache("model\0prompt v1")
+    new = intent_cache.IntentCache("model\0prompt v2")
+
+    assert old.key("book") != new.key("book")
+
+
+def test_lru_evicts_oldest():
+    cache = intent_cache.IntentCache("scope", max_size=2)
+    cache.put("a", BOOK)
+    cache.put("b", BOOK)
+    cache.get("a")
+    cache.put("c", BOOK)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == BOOK
+    assert cache.stats["evictions"] == 1
+
+
+def test_shared_tier_serves_other_containers(conn_table):
+    table = _table()
+    intent_cache.IntentCache("scope", table).put("book", BOOK)
+    cold = intent_cache.IntentCache("scope", table)
+
+    assert cold.get("Book!") == BOOK
+    assert cold.get("book") == BOOK
+    assert (cold.shared_hits, cold.hits) == (1, 1)
+
+
+def test_handler_skips_bedrock_on_repeat(bedrock_app, monkeypatch):
+    calls = []
+
+    def fake_ask(cmd, prompt=None, model_id=None):
+        calls.append(cmd)
+        return dict(BOOK)
+
+    monkeypatch.setattr(bedrock_app, "ask_bedrock", fake_ask)
+
+    assert bedrock_app.resolve_intent("I'd like to reschedule") == BOOK
+    assert bedrock_app.resolve_intent("i'd like to reschedule!") == BOOK
+    assert calls == ["I'd like to reschedule"]
+
+
+def test_prompt_or_tier_change_misses(bedrock_app, monkeypatch):
+    calls = []
+
+    def fake_ask(cmd, prompt=None, model_id=None):
+        calls.append(cmd)
+        return dict(BOOK)
+
+    monkeypatch.setattr(bedrock_app, "ask_bedrock", fake_ask)
+    ctx = bedrock_app.prompt_book.default
+    reworded = ctx._replace(prompt_prefix=ctx.prompt_prefix.replace("ONLY", "just"))
+
+    bedrock_app.resolve_intent("I'd like to reschedule", ctx)
+    bedrock_app.resolve_intent("I'd like to reschedule", reworded)
+    assert len(calls) == 2
+
+    bedrock_app.intent_cache.cache_clear()
+    monkeypatch.setattr(bedrock_app.router, "tiers", ["small", "large"])
+    bedrock_app.resolve_intent("I'd like to reschedule", ctx)
+    assert len(calls) == 3
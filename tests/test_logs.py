@@ -0,0 +1,86 @@
+import json
+import logging
+import sys
+import threading
+
+from conftest import SRC
+
+sys.path.append(SRC)
+
+from core import logs, metrics  # noqa: E402
+
+CORRELATION = "7c9e6679726540de944be07fc1f90ae7"
+
+
+def _lines(capsys):
+    assert logs.flush()
+    out = capsys.readouterr().out.splitlines()
+    return [json.loads(line) for line in out if line.startswith('{"ts"')]
+
+
+def test_lines_are_json_with_the_correlation_id(capsys):
+    logs.configure(sample_rate=1)
+    log = logging.getLogger("test_logs")
+    with metrics.Timings("intent", CORRELATION).active():
+        log.info("Intent = %s", {"action": "click"}, extra={"tier": "haiku"})
+    log.warning("outside")
+
+    first, second = _lines(capsys)
+
+    assert first["msg"] == "Intent = {'action': 'click'}"
+    assert first["level"] == "INFO" and first["logger"] == "test_logs"
+    assert first["correlationId"] == CORRELATION and first["tier"] == "haiku"
+    assert second["msg"] == "outside" and "correlationId" not in second
+
+
+def test_detail_sampling_keeps_warnings(capsys):
+    detail = logs.detail("test_logs")
+    logs.configure(sample_rate=0)
+    try:
+        with metrics.Timings("intent", CORRELATION).active():
+            detail.info("dropped")
+            detail.warning("kept")
+            logging.getLogger("test_logs").info("not detail")
+    finally:
+        logs.configure(sample_rate=1)
+
+    assert [line["msg"] for line in _lines(capsys)] == ["kept", "not detail"]
+
+
+def test_sampling_is_decided_per_recording():
+    kept = [logs.sampled(f"{i:032x}", 0.25) for i in range(2000)]
+
+    assert kept == [logs.sampled(f"{i:032x}", 0.25) for i in range(2000)]
+    assert 400 < sum(kept) < 600
+    assert logs.sampled(None, 1) and not logs.sampled(CORRELATION, 0)
+
+
+def test_messages_are_formatted_off_the_request_thread(capsys, monkeypatch):
+    logs.configure(sample_rate=1)
+    root = logging.getLogger()
+    # pytest's own capture handlers format on the calling thread
+    queued = [h for h in root.handlers if isinstance(h, logs._QueueHandler)]
+    monkeypatch.setattr(root, "handlers", queued)
+    formatted_in = []
+
+    class Probe:
+        def __str__(self):
+            formatted_in.append(threading.current_thread())
+            return "probe"
+
+    logging.getLogger("test_logs").info("%s", Probe())
+
+    [line] = _lines(capsys)
+    assert line["msg"] == "probe"
+    assert formatted_in and threading.current_thread() not in formatted_in
+
+
+def test_exceptions_are_rendered(capsys):
+    logs.configure(sample_rate=1)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("test_logs").exception("failed")
+
+    [line] = _lines(capsys)
+    assert line["msg"] == "failed" and "ValueError: boom" in line["exc"]
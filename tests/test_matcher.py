@@ -0,0 +1,50 @@
+import pytest
+
+from conftest import load_lambda
+
+matcher = load_lambda("bedrock_processor", "matcher")
+
+
+@pytest.mark.parametrize(
+    "text, selector",
+    [
+        ("Go to booking.", "#nav-book"),
+        ("take me home", "#nav-home"),
+        ("Open the home page", "#nav-home"),
+        ("contact support please", "#nav-contact"),
+        ("Contact suport", "#nav-contact"),
+    ],
+)
+def test_confident_matches(text, selector):
+    found = matcher.FastMatcher().match(text)
+
+    assert found is not None
+    assert found.selector == selector
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "um", "what's the weather", "cancel my booking", "book or contact"],
+)
+def test_uncertain_commands_fall_through(text):
+    assert matcher.FastMatcher().match(text) is None
+
+
+def test_custom_catalog_and_stats():
+    fast = matcher.FastMatcher({"#faq": ["faq", "questions"]}, threshold=0.9)
+
+    assert fast.match("show me the questions").selector == "#faq"
+    assert fast.match("go home") is None
+    assert fast.stats["hits"] == 1
+    assert fast.stats["hit_rate"] == 0.5
+
+
+def test_handler_fast_path_skips_bedrock(bedrock_app, monkeypatch):
+    def fail(cmd, prompt=None, model_id=None):
+        raise AssertionError("Bedrock should not be called")
+
+    monkeypatch.setattr(bedrock_app, "ask_bedrock", fail)
+
+    intent = bedrock_app.resolve_intent("Go to contact support")
+
+    assert intent == {"action": "click", "selector": "#nav-contact"}
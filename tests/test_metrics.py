@@ -0,0 +1,146 @@
+import io
+import json
+import os
+import sys
+
+import boto3
+
+from conftest import SRC, s3_event
+
+sys.path.append(SRC)
+sys.path.append(os.path.join(os.path.dirname(SRC), "scripts"))
+
+from core import keys, metrics  # noqa: E402
+from core.batch import s3_records  # noqa: E402
+import latency_report  # noqa: E402
+
+SESSION = "0f8fad5b-d9cb-469f-a165-70867728950e"
+RECORDING = "7c9e6679-7425-40de-944b-e07fc1f90ae7"
+CORRELATION = RECORDING.replace("-", "")
+
+
+def _emitted(capsys):
+    return list(latency_report.parse_lines(capsys.readouterr().out.splitlines()))
+
+
+def test_correlation_id_is_the_recording_uuid():
+    key = f"audio-store/{SESSION}/{RECORDING}-rec.webm"
+
+    assert keys.correlation_id(key, "audio-store/") == CORRELATION
+    segmented = f"audio-store/{SESSION}/{RECORDING}/"
+    assert keys.correlation_id(segmented, "audio-store/") == CORRELATION
+    fallback = keys.correlation_id("audio-store/sess-1/one.webm", "audio-store/")
+    assert len(fallback) == 32 and fallback != CORRELATION
+
+
+def test_trace_round_trips_through_the_output_key():
+    job = keys.job_prefix(CORRELATION) + "ab" * 16
+    key = keys.output_key("transcribe-output/", job, "sess-1", 1714564800123)
+
+    assert key == f"transcribe-output/sess-1/{job}.t1714564800123.json"
+    assert keys.trace_from_key(key) == (CORRELATION, 1714564800123)
+    legacy = "transcribe-output/sess-1/voicenav-job-1.json"
+    assert keys.trace_from_key(legacy) == (None, None)
+
+
+def test_s3_records_keep_the_event_time():
+    event = s3_event("audio-store/a.webm")
+    event["Records"][0]["eventTime"] = "2024-05-01T12:00:00.123Z"
+
+    [(_, record)] = s3_records(event)
+
+    assert metrics.epoch_ms(record["eventTime"]) == 1714564800123
+    assert "eventTime" not in event["Records"][0]["s3"]
+
+
+def test_timings_render_emf():
+    timings = metrics.Timings("intent", CORRELATION)
+    with timings.active():
+        with metrics.span("resolve_ms"):
+            metrics.tag(resolvedBy="cache")
+        assert metrics.current() is timings
+    metrics.tag(ignored=True)  # no active record
+    out = io.StringIO()
+
+    timings.emit(out)
+
+    doc = json.loads(out.getvalue())
+    [block] = doc["_aws"]["CloudWatchMetrics"]
+    assert block["Dimensions"] == [["Stage"]]
+    assert block["Metrics"] == [{"Name": "resolve_ms", "Unit": "Milliseconds"}]
+    assert doc["Stage"] == "intent" and doc["correlationId"] == CORRELATION
+    assert doc["resolvedBy"] == "cache" and doc["resolve_ms"] >= 0
+    assert "ignored" not in doc
+
+
+def test_transcribe_stage_carries_the_trace(transcribe_app, capsys):
+    event = s3_event(f"audio-store/{SESSION}/{RECORDING}-rec.webm")
+    event["Records"][0]["eventTime"] = "2024-05-01T12:00:00.123Z"
+
+    body = json.loads(transcribe_app.lambda_handler(event, None)["body"])
+
+    [result] = body["results"]
+    assert result["jobId"].startswith(f"voicenav-{CORRELATION}-")
+    assert result["outputLocation"].endswith(".t1714564800123.json")
+    [doc] = _emitted(capsys)
+    assert doc["Stage"] == "transcribe" and doc["correlationId"] == CORRELATION
+    assert doc["jobName"] == result["jobId"] and doc["jobStartedAt"]
+    assert {"notify_ms", "start_job_ms"} <= set(latency_report.metric_names(doc))
+
+
+def test_intent_stage_measures_upload_to_intent(bedrock_app, conn_table, capsys):
+    uploaded = metrics.now_ms() - 5000
+    key = keys.output_key(
+        "transcribe-output/",
+        keys.job_prefix(CORRELATION) + "ab" * 16,
+        "sess-a",
+        uploaded,
+    )
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="voicenav-bucket")
+    transcript = {"results": {"transcripts": [{"transcript": "book"}]}}
+    s3.put_object(Bucket="voicenav-bucket", Key=key, Body=json.dumps(transcript))
+    event = s3_event(key)
+    event["Records"][0]["eventTime"] = "2024-05-01T12:00:00.123Z"
+    capsys.readouterr()
+
+    bedrock_app.lambda_handler(event, None)
+
+    [doc] = _emitted(capsys)
+    assert doc["Stage"] == "intent" and doc["correlationId"] == CORRELATION
+    assert doc["upload_to_intent_ms"] >= 5000
+    assert doc["transcriptAt"] == 1714564800123
+    assert doc["resolvedBy"] == "fast_path"
+    assert {"transcript_read_ms", "resolve_ms", "total_ms"} <= set(
+        latency_report.metric_names(doc)
+    )
+
+
+def test_latency_report_percentiles_and_join():
+    lines = []
+    for i in range(1, 101):
+        cid = f"{i:032x}"
+        start = metrics.Timings("transcribe", cid)
+        start.add("start_job_ms", i)
+        start.tag(jobStartedAt=1000 * i)
+        intent = metrics.Timings("intent", cid)
+        intent.add("total_ms", 2 * i)
+        intent.tag(transcriptAt=1000 * i + 700)
+        for timings in (start, intent):
+            out = io.StringIO()
+            timings.emit(out)
+            lines.append("2024-05-01T12:00:00 stream " + out.getvalue())
+    lines.append("INFO some unrelated log line {}")
+
+    report = latency_report.summarize(
+        latency_report.collect(latency_report.parse_lines(lines))
+    )
+
+    assert report["transcribe"]["start_job_ms"] == {
+        "count": 100,
+        "p50": 50.0,
+        "p95": 95.0,
+        "p99": 99.0,
+    }
+    assert report["intent"]["total_ms"]["p95"] == 190.0
+    assert report["transcribe"]["transcribe_job_ms"]["p50"] == 700.0
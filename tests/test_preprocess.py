@@ -0,0 +1,102 @@
+import io
+import wave
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+np = pytest.importorskip("numpy")
+
+BUCKET = "voicenav-bucket"
+
+
+def _wav(seconds_silent=1.0, seconds_tone=1.0, rate=44100, channels=2):
+    """Silence, a 440 Hz tone, silence; 16-bit PCM WAV bytes."""
+    silent = np.zeros(int(seconds_silent * rate))
+    t = np.arange(int(seconds_tone * rate)) / rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    mono = np.concatenate([silent, tone, silent])
+    frames = np.repeat(mono[:, None], channels, axis=1)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((frames * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+@pytest.fixture
+def preprocess():
+    return load_lambda("transcribe_processor", "preprocess")
+
+
+def test_media_format_by_extension(preprocess):
+    assert preprocess.media_format("audio-store/s/a.WAV") == "wav"
+    assert preprocess.media_format("audio-store/s/a.flac") == "flac"
+    assert preprocess.media_format("audio-store/s/a.webm") is None
+
+
+def test_trims_downmixes_and_resamples(preprocess):
+    result = preprocess.preprocess(_wav(), "wav")
+
+    stats = result.stats
+    assert stats["seconds_in"] == pytest.approx(3.0, abs=0.01)
+    # Tone plus the 250 ms pad on each side
+    assert 1.0 <= stats["seconds_out"] <= 1.6
+    assert stats["bytes_out"] < stats["bytes_in"] / 5
+    samples, rate = preprocess.decode(result.data, result.media_format)
+    assert rate == preprocess.TARGET_RATE
+    assert samples.shape[1] == 1
+
+
+def test_pcm_input(preprocess):
+    pcm = (0.3 * np.sin(np.arange(16000) / 5) * 32767).astype("<i2").tobytes()
+
+    result = preprocess.preprocess(pcm, "pcm", pcm_rate=16000)
+
+    assert result.stats["seconds_in"] == pytest.approx(1.0)
+
+
+def test_all_silent_clip_is_rejected(preprocess):
+    with pytest.raises(ValueError):
+        preprocess.preprocess(_wav(seconds_silent=1.0, seconds_tone=0), "wav")
+
+
+def test_handler_submits_processed_audio(transcribe_app, monkeypatch):
+    monkeypatch.setattr(transcribe_app, "PREPROCESS_AUDIO", True)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.put_object(Bucket=BUCKET, Key="audio-store/s1/rec.wav", Body=_wav())
+
+    resp = transcribe_app.lambda_handler(s3_event("audio-store/s1/rec.wav"), None)
+
+    assert resp["statusCode"] == 200
+    assert "processed-audio/s1/rec.wav." in resp["body"]
+    listed = s3.list_objects_v2(Bucket=BUCKET, Prefix="processed-audio/")
+    assert listed["KeyCount"] == 1
+
+
+def test_handler_falls_back_on_undecodable_audio(transcribe_app, monkeypatch):
+    monkeypatch.setattr(transcribe_app, "PREPROCESS_AUDIO", True)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.put_object(Bucket=BUCKET, Key="audio-store/s1/bad.wav", Body=b"not audio")
+
+    resp = transcribe_app.lambda_handler(s3_event("audio-store/s1/bad.wav"), None)
+
+    assert resp["statusCode"] == 200
+    assert "s3://voicenav-bucket/audio-store/s1/bad.wav" in resp["body"]
+
+
+def test_handler_submits_original_for_silent_audio(transcribe_app, monkeypatch):
+    monkeypatch.setattr(transcribe_app, "PREPROCESS_AUDIO", True)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    silent = _wav(seconds_silent=0.5, seconds_tone=0)
+    s3.put_object(Bucket=BUCKET, Key="audio-store/s1/muted.wav", Body=silent)
+
+    resp = transcribe_app.lambda_handler(s3_event("audio-store/s1/muted.wav"), None)
+
+    assert resp["statusCode"] == 200
+    assert "s3://voicenav-bucket/audio-store/s1/muted.wav" in resp["body"]
+    listed = s3.list_objects_v2(Bucket=BUCKET, Prefix="processed-audio/")
+    assert listed["KeyCount"] == 0
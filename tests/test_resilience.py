@@ -0,0 +1,314 @@
+import io
+import json
+import time
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+
+from conftest import FakeManagementApi, load_lambda, s3_event
+
+from core import clients
+from core.resilience import (
+    CircuitBreaker,
+    Guard,
+    RetryBudget,
+    TokenBucket,
+    Unavailable,
+    backoff,
+    is_throttle,
+)
+
+fanout = load_lambda("bedrock_processor", "fanout")
+
+BOOK = {"action": "click", "selector": "#nav-book"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def throttling(code="ThrottlingException", status=429):
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": "Rate exceeded"},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        },
+        "InvokeModel",
+    )
+
+
+def make_guard(clock, rate=0.0, retries=10, failures=5, attempts=3):
+    return Guard(
+        "test",
+        TokenBucket(rate, 1, clock=clock, sleep=clock.sleep),
+        CircuitBreaker(failures, 30, clock=clock),
+        RetryBudget(retries),
+        attempts,
+        sleep=clock.sleep,
+        rng=lambda: 1.0,
+    )
+
+
+class Flaky:
+    """Callable that raises the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_throttle_detection():
+    assert is_throttle(throttling())
+    assert is_throttle(throttling("SlowDown", 503))
+    assert not is_throttle(throttling("ValidationException", 400))
+    assert not is_throttle(RuntimeError("boom"))
+
+
+def test_backoff_is_capped_full_jitter():
+    assert backoff(1, rng=lambda: 1.0) == pytest.approx(0.05)
+    assert backoff(3, rng=lambda: 1.0) == pytest.approx(0.2)
+    assert backoff(20, rng=lambda: 1.0) == 2.0
+    assert backoff(3, rng=lambda: 0.0) == 0.0
+
+
+def test_token_bucket_paces_calls():
+    clock = FakeClock()
+    bucket = TokenBucket(10, 2, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire(timeout=0.05)
+    assert bucket.acquire(timeout=1.0)
+    assert clock.slept == [pytest.approx(0.1)]
+
+
+def test_disabled_bucket_never_waits():
+    clock = FakeClock()
+    bucket = TokenBucket(0, clock=clock, sleep=clock.sleep)
+
+    assert all(bucket.acquire() for _ in range(1000))
+    assert clock.slept == []
+
+
+def test_breaker_opens_then_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(2, 30, clock=clock)
+
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 30
+    assert breaker.allow()  # the single trial call
+    assert not breaker.allow()
+    breaker.failure()
+    assert breaker.state == "open"
+
+    clock.now = 60
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_guard_retries_throttling_with_backoff():
+    clock = FakeClock()
+    guard = make_guard(clock)
+    fn = Flaky(throttling(), throttling())
+
+    assert guard.call(fn) == "ok"
+    assert fn.calls == 3
+    assert clock.slept == [pytest.approx(0.05), pytest.approx(0.1)]
+    stats = guard.stats
+    assert (stats["retries"], stats["throttled"], stats["state"]) == (2, 2, "closed")
+    assert stats["added_p99_ms"] == pytest.approx(150)
+
+
+def test_guard_gives_up_after_max_attempts():
+    clock = FakeClock()
+    guard = make_guard(clock, attempts=2)
+
+    with pytest.raises(Unavailable, match="throttled"):
+        guard.call(Flaky(throttling(), throttling(), throttling()))
+
+
+def test_guard_does_not_retry_client_errors():
+    guard = make_guard(FakeClock())
+    fn = Flaky(throttling("ValidationException", 400))
+
+    with pytest.raises(ClientError):
+        guard.call(fn)
+    assert fn.calls == 1
+    assert guard.counts["retries"] == 0
+
+
+def test_retry_budget_is_shared_across_calls():
+    clock = FakeClock()
+    guard = make_guard(clock, retries=2)
+
+    assert guard.call(Flaky(throttling(), throttling())) == "ok"
+    with pytest.raises(Unavailable, match="budget"):
+        guard.call(Flaky(throttling()))
+    assert guard.counts["budget_exhausted"] == 1
+
+    guard.budget.reset()
+    assert guard.call(Flaky(throttling())) == "ok"
+
+
+def test_open_circuit_fails_fast():
+    clock = FakeClock()
+    guard = make_guard(clock, failures=2, attempts=1)
+    for _ in range(2):
+        with pytest.raises(Unavailable):
+            guard.call(Flaky(throttling()))
+
+    fn = Flaky()
+    with pytest.raises(Unavailable, match="circuit open"):
+        guard.call(fn)
+    assert fn.calls == 0
+    assert guard.stats["short_circuited"] == 1
+
+    clock.now += 30
+    assert guard.call(fn) == "ok"
+    assert guard.stats["state"] == "closed"
+
+
+def test_rate_limited_guard_raises_when_no_token():
+    clock = FakeClock()
+    guard = make_guard(clock, rate=1)
+    guard.acquire_timeout = 0.5
+
+    assert guard.call(Flaky()) == "ok"
+    with pytest.raises(Unavailable, match="rate limit"):
+        guard.call(Flaky())
+    assert guard.counts["rate_limited"] == 1
+
+
+def test_rate_limited_half_open_trial_is_given_back():
+    clock = FakeClock()
+    guard = make_guard(clock, rate=1, failures=1, attempts=1)
+    guard.acquire_timeout = 0
+    with pytest.raises(Unavailable, match="throttled"):
+        guard.call(Flaky(throttling()))
+
+    clock.now += 30
+    assert guard.bucket.acquire()  # another caller takes the only token
+    with pytest.raises(Unavailable, match="rate limit"):
+        guard.call(Flaky())
+    assert guard.stats["state"] == "half_open"
+
+    clock.now += 1
+    assert guard.call(Flaky()) == "ok"
+    assert guard.stats["state"] == "closed"
+
+
+class ThrottledBedrock:
+    """invoke_model stand-in that throttles ``throttle`` calls, then answers."""
+
+    def __init__(self, throttle, answer=BOOK):
+        self.throttle = throttle
+        self.answer = answer
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.throttle:
+            raise throttling()
+        payload = {"content": [{"type": "text", "text": json.dumps(self.answer)}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+@pytest.fixture
+def guarded_app(bedrock_app, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(bedrock_app, "bedrock_guard", make_guard(clock, failures=3))
+    return bedrock_app
+
+
+def test_resolve_intent_retries_throttled_bedrock(guarded_app):
+    fake = ThrottledBedrock(throttle=2)
+    clients.override("bedrock-runtime", fake)
+
+    assert guarded_app.resolve_intent("reschedule my visit please") == BOOK
+    assert fake.calls == 3
+
+
+def test_throttled_bedrock_degrades_to_local_match(guarded_app):
+    clients.override("bedrock-runtime", ThrottledBedrock(throttle=99))
+
+    # Below the fast-path threshold, above the degraded one
+    intent = guarded_app.resolve_intent("could you show me booking stuff")
+
+    assert intent == BOOK
+    assert guarded_app.bedrock_guard.stats["state"] == "open"
+
+
+@pytest.mark.parametrize("mode", ["targeted", "broadcast"])
+def test_degraded_without_match_asks_user_to_retry(
+    guarded_app, conn_table, monkeypatch, mode
+):
+    for conn_id, session_id in [("c1", "s1"), ("c2", "s2")]:
+        conn_table.put_item(
+            Item={
+                "connID": conn_id,
+                "sessionID": session_id,
+                "ttl": int(time.time()) + 3600,
+            }
+        )
+    monkeypatch.setattr(guarded_app, "DELIVERY_MODE", mode)
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="voicenav-bucket")
+    doc = {"results": {"transcripts": [{"transcript": "what is the weather"}]}}
+    s3.put_object(
+        Bucket="voicenav-bucket",
+        Key="transcribe-output/s1/job.json",
+        Body=json.dumps(doc).encode(),
+    )
+    clients.override("bedrock-runtime", ThrottledBedrock(throttle=99))
+
+    out = guarded_app.lambda_handler(s3_event("transcribe-output/s1/job.json"), None)
+
+    assert out["results"][0]["status"] == "degraded"
+    assert out["batchItemFailures"] == []
+    [(conn_id, data)] = guarded_app.apigw().posted
+    assert conn_id == "c1"
+    assert json.loads(data)["reason"] == "degraded"
+
+
+class ThrottledManagementApi(FakeManagementApi):
+    def __init__(self, throttle, **kwargs):
+        super().__init__(**kwargs)
+        self.throttle = throttle
+
+    def post_to_connection(self, ConnectionId, Data):
+        if self.throttle:
+            self.throttle -= 1
+            raise throttling("LimitExceededException")
+        super().post_to_connection(ConnectionId, Data)
+
+
+def test_fanout_retries_throttled_posts(conn_table):
+    clock = FakeClock()
+    apigw = ThrottledManagementApi(throttle=2, gone={"stale"})
+
+    result = fanout.FanOut(
+        apigw, conn_table, max_workers=1, guard=make_guard(clock)
+    ).send(["a", "stale", "b"], BOOK)
+
+    assert (result.delivered, result.gone, result.failed) == (2, 1, 0)
+    assert len(clock.slept) == 2
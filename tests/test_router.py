@@ -0,0 +1,117 @@
+import io
+import json
+
+import pytest
+
+from conftest import load_lambda
+
+from core import clients
+
+router = load_lambda("bedrock_processor", "router")
+
+BOOK = {"action": "click", "selector": "#nav-book"}
+TIERS = ["small", "large"]
+
+
+def _valid(intent):
+    return intent.get("selector", "").startswith("#nav-")
+
+
+@pytest.mark.parametrize(
+    "cmd, score, selectors, plan",
+    [
+        ("book it", 0.0, 3, TIERS),
+        (
+            "could you please take me over to the page where I can book",
+            0.0,
+            3,
+            ["large"],
+        ),
+        ("could you please take me over to the page where I can book", 0.6, 3, TIERS),
+        ("book it", 0.0, 50, ["large"]),
+    ],
+)
+def test_plan_uses_cheap_features(cmd, score, selectors, plan):
+    assert router.ModelRouter(TIERS).plan(cmd, score, selectors) == plan
+
+
+def test_single_tier_never_escalates():
+    r = router.ModelRouter(["only"])
+
+    assert r.plan("a long and winding command " * 5, 0.0, 500) == ["only"]
+
+
+def test_escalates_on_invalid_answers_only():
+    r = router.ModelRouter(TIERS)
+    answers = {"small": {"action": "click", "selector": "#made-up"}, "large": BOOK}
+    calls = []
+
+    def ask(model):
+        calls.append(model)
+        return answers[model]
+
+    assert r.route("book", 0.0, 3, ask, _valid) == BOOK
+    assert calls == TIERS
+    assert r.stats["escalations"] == 1
+    assert r.stats["tiers"]["small"]["invalid"] == 1
+
+    calls.clear()
+    answers["small"] = BOOK
+    assert r.route("book", 0.0, 3, ask, _valid) == BOOK
+    assert calls == ["small"]
+
+
+def test_not_json_escalates_then_raises_from_last_tier():
+    r = router.ModelRouter(TIERS)
+
+    def ask(model):
+        raise ValueError(f"{model}: no JSON")
+
+    with pytest.raises(ValueError, match="large"):
+        r.route("book", 0.0, 3, ask, _valid)
+    assert r.stats["tiers"]["small"]["not_json"] == 1
+    assert r.stats["tiers"]["large"]["not_json"] == 1
+
+
+class FakeBedrock:
+    """invoke_model stand-in answering per model, with usage."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.models = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.models.append(modelId)
+        text = self.answers[modelId]
+        payload = {
+            "content": [{"type": "text", "text": text}],
+            "usage": {"input_tokens": 100, "output_tokens": 12},
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+def test_handler_routes_and_records_usage(bedrock_app, monkeypatch):
+    monkeypatch.setattr(bedrock_app, "router", router.ModelRouter(TIERS))
+    fake = FakeBedrock({"small": "Sure! book page", "large": json.dumps(BOOK)})
+    clients.override("bedrock-runtime", fake)
+
+    intent = bedrock_app.resolve_intent("I need to reschedule my visit")
+
+    assert intent == BOOK
+    assert fake.models == TIERS
+    tiers = bedrock_app.router.stats["tiers"]
+    assert tiers["small"]["not_json"] == 1
+    assert tiers["large"]["input_tokens"] == 100
+    assert tiers["large"]["output_tokens"] == 12
+
+
+def test_non_object_answer_escalates(bedrock_app, monkeypatch):
+    monkeypatch.setattr(bedrock_app, "router", router.ModelRouter(TIERS))
+    fake = FakeBedrock({"small": json.dumps([BOOK]), "large": json.dumps(BOOK)})
+    clients.override("bedrock-runtime", fake)
+
+    intent = bedrock_app.resolve_intent("I need to reschedule my visit")
+
+    assert intent == BOOK
+    assert fake.models == TIERS
+    assert bedrock_app.router.stats["tiers"]["small"]["not_json"] == 1
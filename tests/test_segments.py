@@ -0,0 +1,111 @@
+import json
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+BUCKET = "voicenav-bucket"
+REC = "audio-store/s1/rec-1/"
+
+
+@pytest.fixture
+def segments():
+    return load_lambda("transcribe_processor", "segments")
+
+
+def _put(key, body):
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket=BUCKET, Key=key, Body=body
+    )
+
+
+def _manifest(parts, fmt="webm"):
+    _put(REC + "manifest.json", json.dumps({"parts": parts, "format": fmt}))
+    return REC + "manifest.json"
+
+
+def _part(i, body):
+    _put(f"{REC}part-{i:05d}.webm", body)
+    return f"{REC}part-{i:05d}.webm"
+
+
+def _handle(app, key):
+    body = app.lambda_handler(s3_event(key), None)["body"]
+    return json.loads(body)["results"][0]
+
+
+def _stitched():
+    return (
+        boto3.client("s3", region_name="us-east-1")
+        .get_object(Bucket=BUCKET, Key="stitched-audio/s1/rec-1.webm")["Body"]
+        .read()
+    )
+
+
+def test_recording_prefix(segments):
+    assert segments.recording_prefix(REC + "part-00003.webm") == REC
+    assert segments.recording_prefix(REC + "manifest.json") == REC
+    assert segments.recording_prefix("audio-store/s1/abc-rec.webm") is None
+
+
+def test_out_of_order_segments_are_stitched_in_index_order(transcribe_app):
+    results = [
+        _handle(transcribe_app, _part(2, b"C" * 10)),
+        _handle(transcribe_app, _manifest(3)),
+        _handle(transcribe_app, _part(0, b"A" * 10)),
+        _handle(transcribe_app, _part(1, b"B" * 10)),
+    ]
+
+    assert [r["status"] for r in results] == [
+        "WAITING",
+        "WAITING",
+        "WAITING",
+        "STARTED",
+    ]
+    assert results[1]["missing"] == [0, 1]
+    assert _stitched() == b"A" * 10 + b"B" * 10 + b"C" * 10
+    assert results[3]["mediaUri"].endswith("stitched-audio/s1/rec-1.webm")
+    # Session comes from the recording prefix, not the stitched key
+    assert "/transcribe-output/s1/" in results[3]["outputLocation"]
+
+
+def test_missing_segment_waits_without_stitching(transcribe_app):
+    _part(0, b"A")
+    _part(2, b"C")
+
+    result = _handle(transcribe_app, _manifest(3))
+
+    assert result["status"] == "WAITING"
+    assert result["missing"] == [1]
+    listed = boto3.client("s3", region_name="us-east-1").list_objects_v2(
+        Bucket=BUCKET, Prefix="stitched-audio/"
+    )
+    assert listed["KeyCount"] == 0
+
+
+def test_large_recording_uses_multipart(transcribe_app):
+    size = 3 << 20
+    for i in range(3):
+        _part(i, bytes([65 + i]) * size)
+
+    result = _handle(transcribe_app, _manifest(3))
+
+    assert result["status"] == "STARTED"
+    data = _stitched()
+    assert len(data) == 3 * size
+    assert data[size - 1 : size + 1] == b"AB"
+    assert data[-1:] == b"C"
+    head = boto3.client("s3", region_name="us-east-1").head_object(
+        Bucket=BUCKET, Key="stitched-audio/s1/rec-1.webm"
+    )
+    assert head["ETag"].strip('"').endswith("-2")
+
+
+def test_bad_manifest_fails_record(transcribe_app):
+    _put(REC + "manifest.json", json.dumps({"parts": 0}))
+
+    resp = transcribe_app.lambda_handler(s3_event(REC + "manifest.json"), None)
+
+    assert resp["statusCode"] == 500
+    assert len(resp["batchItemFailures"]) == 1
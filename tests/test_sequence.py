@@ -0,0 +1,130 @@
+import io
+import json
+import time
+
+import boto3
+import pytest
+
+from conftest import load_lambda, s3_event
+
+from core import clients
+
+sequence = load_lambda("bedrock_processor", "sequence")
+prompts = load_lambda("bedrock_processor", "prompts")
+
+HOME = {"action": "click", "selector": "#nav-home"}
+BOOK = {"action": "click", "selector": "#nav-book"}
+CONTACT = {"action": "click", "selector": "#nav-contact"}
+
+
+@pytest.mark.parametrize(
+    "text, clauses",
+    [
+        ("open booking then go to contact", ["open booking", "go to contact"]),
+        (
+            "go home, and then open booking; after that contact support",
+            ["go home", "open booking", "contact support"],
+        ),
+        ("search for salt and pepper", ["search for salt and pepper"]),
+        ("then", ["then"]),
+    ],
+)
+def test_split_commands(text, clauses):
+    assert sequence.split_commands(text) == clauses
+
+
+def test_split_commands_gives_up_on_long_chains():
+    text = " then ".join(["home"] * 6)
+
+    assert sequence.split_commands(text, max_parts=5) == [text]
+
+
+def test_from_answer_builds_ordered_batch():
+    answer = {"intents": [BOOK, CONTACT, HOME, "junk"]}
+
+    batch = sequence.from_answer(answer, max_intents=2)
+
+    assert batch == {
+        "action": "batch",
+        "count": 2,
+        "intents": [{**BOOK, "seq": 0}, {**CONTACT, "seq": 1}],
+    }
+    assert sequence.from_answer({"intents": [BOOK]}) == BOOK
+    assert sequence.from_answer(BOOK) == BOOK
+    for answer in ([BOOK], "book", 3):
+        with pytest.raises(ValueError):
+            sequence.from_answer(answer)
+
+
+def test_catalog_validates_every_step():
+    ctx = prompts.PromptBook().default
+    good = sequence.as_batch([BOOK, CONTACT])
+    bad = sequence.as_batch([BOOK, {"action": "click", "selector": "#nope"}, HOME])
+
+    assert ctx.valid(good)
+    assert not ctx.valid(bad)
+    assert not ctx.valid({"action": "batch", "intents": []})
+    assert not ctx.valid(sequence.as_batch([good, BOOK]))
+    assert sequence.valid_prefix(bad, ctx.valid) == BOOK
+    assert sequence.valid_prefix(BOOK, ctx.valid) is None
+
+
+def test_chain_of_fast_matches_skips_bedrock(bedrock_app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Bedrock called")
+
+    monkeypatch.setattr(bedrock_app, "ask_bedrock", fail)
+
+    intent = bedrock_app.resolve_intent("open booking then contact support")
+
+    assert [s["selector"] for s in intent["intents"]] == ["#nav-book", "#nav-contact"]
+
+
+class ChainingBedrock:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        payload = {"content": [{"type": "text", "text": json.dumps(self.answer)}]}
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+
+def _transcript(conn_table, text):
+    conn_table.put_item(
+        Item={"connID": "c1", "sessionID": "s1", "ttl": int(time.time()) + 3600}
+    )
+    s3 = boto3.client("s3", region_name="us-east-1")
+    s3.create_bucket(Bucket="voicenav-bucket")
+    doc = {"results": {"transcripts": [{"transcript": text}]}}
+    key = "transcribe-output/s1/job.json"
+    s3.put_object(Bucket="voicenav-bucket", Key=key, Body=json.dumps(doc).encode())
+    return s3_event(key)
+
+
+def test_one_model_call_delivers_one_batch(bedrock_app, conn_table):
+    fake = ChainingBedrock({"intents": [BOOK, CONTACT]})
+    clients.override("bedrock-runtime", fake)
+    event = _transcript(conn_table, "book a visit and after that I need support")
+
+    out = bedrock_app.lambda_handler(event, None)
+
+    assert out["results"][0]["status"] == "delivered"
+    assert fake.calls == 1
+    [(_, data)] = bedrock_app.apigw().posted
+    message = json.loads(data)
+    assert message["action"] == "batch" and message["count"] == 2
+    assert [s["seq"] for s in message["intents"]] == [0, 1]
+
+
+def test_invalid_step_truncates_batch(bedrock_app, conn_table):
+    answer = {"intents": [BOOK, {"action": "click", "selector": "#nope"}, HOME]}
+    clients.override("bedrock-runtime", ChainingBedrock(answer))
+    event = _transcript(conn_table, "book a visit and after that do magic")
+
+    out = bedrock_app.lambda_handler(event, None)
+
+    assert out["results"][0]["status"] == "partial"
+    [(_, data)] = bedrock_app.apigw().posted
+    assert json.loads(data) == BOOK
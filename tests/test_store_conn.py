@@ -104,3 +104,26 @@ def test_invalid_event():
     response = lambda_handler(event, None)
 
     assert response["statusCode"] == 500
+
+
+@mock_aws
+def test_connect_event_stores_session():
+    """Test the session query parameter is stored for targeted delivery"""
+    dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+    table = dynamodb.create_table(
+        TableName="VoiceNavConnections",
+        KeySchema=[{"AttributeName": "connID", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "connID", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    os.environ["CONN_TABLE"] = "VoiceNavConnections"
+
+    event = {
+        "requestContext": {"connectionId": "conn-789", "eventType": "CONNECT"},
+        "queryStringParameters": {"session": "sess-789"},
+    }
+
+    assert lambda_handler(event, None)["statusCode"] == 200
+    assert table.get_item(Key={"connID": "conn-789"})["Item"]["sessionID"] == (
+        "sess-789"
+    )
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from conftest import load_lambda
+
+from core import clients
+
+streaming = load_lambda("bedrock_processor", "streaming")
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+BOOK = {"action": "click", "selector": "#nav-book"}
+
+
+def _recorded(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return [{"chunk": {"bytes": json.dumps(e).encode()}} for e in json.load(f)]
+
+
+class RecordedStream:
+    """Replays recorded events and notes how far it was read."""
+
+    def __init__(self, events):
+        self.events = events
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for event in self.events:
+            self.read += 1
+            yield event
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1000])
+def test_parser_handles_any_fragmenting(size):
+    text = 'ok {"action": "type", "selector": "#q", "value": "a } \\" {"} bye'
+    parser = streaming.IncrementalJSONParser()
+    result = None
+    for i in range(0, len(text), size):
+        result = result or parser.feed(text[i : i + size])
+
+    assert result == {"action": "type", "selector": "#q", "value": 'a } " {'}
+
+
+def test_parser_skips_unparseable_braces():
+    parser = streaming.IncrementalJSONParser()
+
+    assert parser.feed("{not json} then ") is None
+    assert parser.feed('{"action": "click", "selector": "#x"}') == {
+        "action": "click",
+        "selector": "#x",
+    }
+
+
+def test_recorded_stream_stops_at_first_object():
+    stream = RecordedStream(_recorded("bedrock_stream_chatty.json"))
+
+    intent = streaming.first_json_object(streaming.iter_text_deltas(stream))
+
+    assert intent == BOOK
+    assert stream.read < len(stream.events) - 3
+
+
+def test_incomplete_stream_raises():
+    events = _recorded("bedrock_stream_chatty.json")[:6]
+
+    with pytest.raises(ValueError, match="No JSON object"):
+        streaming.first_json_object(streaming.iter_text_deltas(events))
+
+
+def test_ask_bedrock_streaming(bedrock_app, monkeypatch):
+    stream = RecordedStream(_recorded("bedrock_stream_chatty.json"))
+
+    class FakeBedrock:
+        def invoke_model_with_response_stream(self, **kwargs):
+            assert kwargs["modelId"] == bedrock_app.MODEL_ID
+            return {"body": stream}
+
+    clients.override("bedrock-runtime", FakeBedrock())
+    monkeypatch.setattr(bedrock_app, "BEDROCK_STREAMING", True)
+
+    assert bedrock_app.ask_bedrock("book something") == BOOK
+    assert stream.closed
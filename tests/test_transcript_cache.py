@@ -0,0 +1,116 @@
+import json
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from conftest import load_lambda, s3_event
+
+BUCKET = "voicenav-bucket"
+
+
+@pytest.fixture
+def cached_app(monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_CACHE_TABLE", "VoiceNavTranscriptCache")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        boto3.resource("dynamodb", region_name="us-east-1").create_table(
+            TableName="VoiceNavTranscriptCache",
+            KeySchema=[{"AttributeName": "contentHash", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "contentHash", "AttributeType": "S"}
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield load_lambda("transcribe_processor")
+
+
+def _upload(key, body=b"same audio bytes"):
+    s3 = boto3.client("s3", region_name="us-east-1")
+    etag = s3.put_object(Bucket=BUCKET, Key=key, Body=body)["ETag"]
+    event = s3_event(key)
+    event["Records"][0]["s3"]["object"]["eTag"] = etag.strip('"')
+    return event
+
+
+def _result(app, event):
+    return json.loads(app.lambda_handler(event, None)["body"])["results"][0]
+
+
+def _finish_job(result):
+    key = result["outputLocation"].split(f"{BUCKET}/", 1)[1]
+    transcript = {"results": {"transcripts": [{"transcript": "go home"}]}}
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket=BUCKET, Key=key, Body=json.dumps(transcript)
+    )
+    return key
+
+
+def test_repeated_audio_reuses_transcript(cached_app):
+    first = _result(cached_app, _upload("audio-store/s1/a-rec.webm"))
+    _finish_job(first)
+
+    second = _result(cached_app, _upload("audio-store/s2/b-rec.webm"))
+
+    assert first["status"] == "STARTED"
+    assert second["status"] == "CACHED"
+    key = second["outputLocation"].split(f"{BUCKET}/", 1)[1]
+    assert key.startswith("transcribe-output/s2/")
+    body = boto3.client("s3", region_name="us-east-1").get_object(
+        Bucket=BUCKET, Key=key
+    )["Body"]
+    assert json.loads(body.read())["results"]["transcripts"][0]["transcript"] == (
+        "go home"
+    )
+    jobs = cached_app.transcribe_client().list_transcription_jobs()
+    assert len(jobs["TranscriptionJobSummaries"]) == 1
+    assert cached_app.transcript_cache().hits == 1
+
+
+def test_unfinished_transcript_falls_back_to_new_job(cached_app):
+    _result(cached_app, _upload("audio-store/s1/a-rec.webm"))
+
+    second = _result(cached_app, _upload("audio-store/s2/b-rec.webm"))
+
+    assert second["status"] == "STARTED"
+    assert cached_app.transcript_cache().misses == 2
+
+
+def test_duplicate_during_first_job_keeps_its_entry(cached_app):
+    first = _result(cached_app, _upload("audio-store/s1/a-rec.webm"))
+    # Arrives while the first job is still running: misses, runs its own job
+    second = _result(cached_app, _upload("audio-store/s2/b-rec.webm"))
+    _finish_job(first)
+
+    third = _result(cached_app, _upload("audio-store/s3/c-rec.webm"))
+
+    assert (second["status"], third["status"]) == ("STARTED", "CACHED")
+    jobs = cached_app.transcribe_client().list_transcription_jobs()
+    assert len(jobs["TranscriptionJobSummaries"]) == 2
+
+
+def test_transcript_missing_after_job_timeout_drops_entry(cached_app, monkeypatch):
+    first = _result(cached_app, _upload("audio-store/s1/a-rec.webm"))
+    monkeypatch.setattr(cached_app.transcript_cache(), "job_timeout", 0)
+
+    # The first job never produced a transcript; the second takes over
+    second = _result(cached_app, _upload("audio-store/s2/b-rec.webm"))
+    _finish_job(second)
+    _finish_job(first)  # too late: the entry points at the second job now
+    third = _result(cached_app, _upload("audio-store/s3/c-rec.webm"))
+
+    assert third["status"] == "CACHED"
+    table = boto3.resource("dynamodb", region_name="us-east-1").Table(
+        "VoiceNavTranscriptCache"
+    )
+    [item] = table.scan()["Items"]
+    assert item["transcriptKey"] in second["outputLocation"]
+
+
+def test_different_audio_is_not_shared(cached_app):
+    _finish_job(_result(cached_app, _upload("audio-store/s1/a-rec.webm")))
+
+    other = _result(cached_app, _upload("audio-store/s2/b-rec.webm", b"other"))
+
+    assert other["status"] == "STARTED"
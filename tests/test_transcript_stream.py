@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+
+from conftest import load_lambda
+
+transcript_stream = load_lambda("bedrock_processor", "transcript_stream")
+
+TEXT = 'Book an "appointment" [tomorrow] {please} – café'
+
+
+def _output(words=50, text=TEXT):
+    items = []
+    for i in range(words):
+        items.append(
+            {
+                "start_time": f"{i * 0.3:.2f}",
+                "end_time": f"{i * 0.3 + 0.25:.2f}",
+                "alternatives": [{"confidence": "0.9", "content": f"w{i} ]}}"}],
+                "type": "pronunciation",
+            }
+        )
+    items.append(
+        {"alternatives": [{"confidence": "0.0", "content": "."}], "type": "punctuation"}
+    )
+    return {
+        "jobName": "voicenav-job-1",
+        "accountId": "123",
+        "results": {
+            "transcripts": [{"transcript": text}],
+            "speaker_labels": {"segments": [{"speaker_label": "spk_0 [{"}]},
+            "items": items,
+        },
+        "status": "COMPLETED",
+    }
+
+
+class Body:
+    """File-like body that hands out fixed-size reads."""
+
+    def __init__(self, data, size):
+        self.data = io.BytesIO(data)
+        self.size = size
+
+    def read(self, n):
+        return self.data.read(self.size)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 17, 4096])
+def test_transcript_and_confidences_across_chunk_boundaries(size):
+    data = json.dumps(_output(), ensure_ascii=False, indent=1).encode()
+
+    result = transcript_stream.read_transcript(Body(data, size), confidences=True)
+
+    assert result.transcript == TEXT
+    assert result.confidences == [0.9] * 50
+    assert result.bytes_read == len(data)
+
+
+def test_transcript_only_stops_before_items():
+    data = json.dumps(_output(words=5000)).encode()
+
+    result = transcript_stream.read_transcript(io.BytesIO(data))
+
+    assert result.transcript == TEXT
+    assert result.confidences is None
+    assert result.bytes_read < len(data) / 10
+
+
+def test_items_before_transcripts_still_found():
+    doc = _output(words=3)
+    doc["results"] = {
+        "items": doc["results"]["items"],
+        "transcripts": doc["results"]["transcripts"],
+    }
+
+    result = transcript_stream.read_transcript(
+        io.BytesIO(json.dumps(doc).encode()), confidences=True
+    )
+
+    assert result.transcript == TEXT
+    assert result.confidences == [0.9] * 3
+
+
+def test_iter_values_wildcard_and_scalars():
+    values = transcript_stream.iter_values(
+        [b'{"a": {"skip": [1, {"x": "]"}]}, "b": [1, 2.5e3, true, null, "s"]}'],
+        [("b", "*")],
+    )
+
+    assert [v for _, v in values] == [1, 2500.0, True, None, "s"]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b'{"results": {"transcripts": []}}', b'{"results": {"transcripts": [{"tra'],
+)
+def test_missing_or_truncated_transcript_raises(data):
+    with pytest.raises(ValueError):
+        transcript_stream.read_transcript(io.BytesIO(data))
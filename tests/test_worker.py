@@ -0,0 +1,263 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+import sys
+import time
+
+import boto3
+import pytest
+
+from conftest import BEDROCK_ENV, SRC, s3_event
+
+sys.path.append(SRC)
+
+from worker import stages  # noqa: E402
+from worker.local_ws import OP_CLOSE, OP_TEXT, encode_frame, read_frame  # noqa: E402
+from worker.queues import FileQueue, MemoryQueue, SqsQueue  # noqa: E402
+from worker.service import Worker, connection_server  # noqa: E402
+
+TRANSCRIPT_KEY = "transcribe-output/sess-a/job-1.json"
+
+
+@pytest.fixture
+def pipeline(monkeypatch, conn_table):
+    """Env for the stages; each test loads fresh app modules."""
+    for name, value in BEDROCK_ENV.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setenv("GATE_MIN_CONFIDENCE", "0")
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket="voicenav-bucket")
+    yield conn_table
+    for package in ("bedrock_processor", "transcribe_processor", "store_conn"):
+        sys.modules.pop(f"{package}_app", None)
+    stages._loaded.clear()
+
+
+def _put_transcript(text, key=TRANSCRIPT_KEY):
+    doc = {"results": {"transcripts": [{"transcript": text}]}}
+    boto3.client("s3", region_name="us-east-1").put_object(
+        Bucket="voicenav-bucket", Key=key, Body=json.dumps(doc).encode()
+    )
+
+
+def _connect(table, conn_id, session_id):
+    table.put_item(
+        Item={"connID": conn_id, "sessionID": session_id, "ttl": int(time.time()) + 60}
+    )
+
+
+def test_split_event_routes_by_prefix():
+    pipeline = [
+        stages.Stage("transcribe", "audio-store/", None),
+        stages.Stage("intent", "transcribe-output/", None),
+    ]
+    event = s3_event("transcribe-output/a.json", "audio-store/b.webm", "other/c")
+
+    parts, unrouted = stages.split_event(pipeline, event)
+
+    assert [(s.name, len(e["Records"])) for s, e in parts] == [
+        ("transcribe", 1),
+        ("intent", 1),
+    ]
+    assert unrouted == 1
+
+
+def test_file_queue_claims_retries_and_dead_letters(tmp_path):
+    spool = FileQueue(str(tmp_path), max_attempts=2, poll=0.01)
+    spool.put(s3_event("audio-store/a.webm"))
+
+    async def scenario():
+        [first] = await spool.receive(wait=0)
+        assert await spool.receive(wait=0) == []  # claimed
+        await spool.nack(first)
+        [second] = await spool.receive(wait=0)
+        assert second.attempt == 2 and second.event == first.event
+        await spool.nack(second)
+
+    asyncio.run(scenario())
+    assert len(spool) == 0
+    assert len(os.listdir(tmp_path / "failed")) == 1
+
+
+def test_file_queue_recovers_abandoned_claims(tmp_path):
+    spool = FileQueue(str(tmp_path))
+    spool.put(s3_event("audio-store/a.webm"))
+    asyncio.run(spool.receive(wait=0))  # claimed, never settled
+
+    assert FileQueue(str(tmp_path)).recover() == 1
+    assert len(spool) == 1
+
+
+def test_sqs_queue_acks_and_releases(pipeline):
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    url = sqs.create_queue(QueueName="voicenav-events")["QueueUrl"]
+    for key in ("audio-store/a.webm", "audio-store/b.webm"):
+        sqs.send_message(QueueUrl=url, MessageBody=json.dumps(s3_event(key)))
+    source = SqsQueue(url, sqs)
+
+    async def scenario():
+        batch = await source.receive(10, wait=0)
+        assert len(batch) == 2
+        await source.ack(batch[0])
+        await source.nack(batch[1])
+        [again] = await source.receive(10, wait=0)
+        assert again.event == batch[1].event and again.attempt == 2
+
+    asyncio.run(scenario())
+
+
+def test_worker_runs_handler_and_pushes_to_session(pipeline):
+    _connect(pipeline, "conn-a", "sess-a")
+    _connect(pipeline, "conn-b", "sess-b")
+    _put_transcript("book")
+    source = MemoryQueue()
+    source.put(s3_event(TRANSCRIPT_KEY, "unrelated/key"))
+    worker = Worker(source, ["intent"], concurrency=4)
+
+    async def scenario():
+        stop = asyncio.Event()
+        run = asyncio.create_task(worker.run(stop, wait=0.05))
+        while worker.counts["acked"] < 1:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await run
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        worker.close()
+
+    cid, data = worker.outbox.get_nowait()
+    assert cid == "conn-a"
+    assert json.loads(data) == {"action": "click", "selector": "#nav-book"}
+    assert worker.stats["records"] == 1 and worker.stats["unrouted"] == 1
+
+
+def test_local_asr_hands_transcripts_over_in_process(pipeline, monkeypatch):
+    monkeypatch.setenv("ASR_BACKEND", "local")
+    monkeypatch.setenv("ASR_LOCAL_TEXT", "book")
+    monkeypatch.setenv("INTENT_FUNCTION", "in-process")
+    _connect(pipeline, "conn-a", "sess-a")
+    source = MemoryQueue()
+    source.put(s3_event("audio-store/sess-a/rec-1.webm"))
+    worker = Worker(source, ["transcribe", "intent"], concurrency=2)
+
+    async def scenario():
+        stop = asyncio.Event()
+        run = asyncio.create_task(worker.run(stop, wait=0.05))
+        while worker.counts["acked"] < 1:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await run
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        worker.close()
+
+    cid, data = worker.outbox.get_nowait()
+    assert cid == "conn-a"
+    assert json.loads(data) == {"action": "click", "selector": "#nav-book"}
+    listing = boto3.client("s3", region_name="us-east-1").list_objects_v2(
+        Bucket="voicenav-bucket", Prefix="transcribe-output/"
+    )
+    assert "Contents" not in listing
+
+
+def test_failed_records_are_released(pipeline):
+    source = MemoryQueue(max_attempts=2)
+    source.put(s3_event("transcribe-output/sess-a/missing.json"))
+    worker = Worker(source, ["intent"])
+
+    async def scenario():
+        [message] = await source.receive(wait=0)
+        assert not await worker.handle(message)
+        [retry] = await source.receive(wait=0)
+        assert not await worker.handle(retry)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        worker.close()
+    assert len(source.dead) == 1
+    assert worker.counts["nacked"] == 2
+
+
+def test_process_pool_worker_posts_through_parent(pipeline):
+    _connect(pipeline, "conn-a", "sess-a")
+    _put_transcript("contact support")
+    source = MemoryQueue()
+    source.put(s3_event(TRANSCRIPT_KEY))
+    worker = Worker(source, ["intent"], processes=1)
+
+    async def scenario():
+        [message] = await source.receive(wait=0)
+        assert await worker.handle(message)
+
+    try:
+        asyncio.run(scenario())
+        cid, data = worker.outbox.get(timeout=5)
+    finally:
+        worker.close()
+    assert cid == "conn-a"
+    assert json.loads(data)["selector"] == "#nav-contact"
+
+
+async def _client(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        (
+            f"GET {path} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode()
+    )
+    status = (await reader.readuntil(b"\r\n\r\n")).split(b"\r\n")[0]
+    return reader, writer, status
+
+
+def _masked(payload, opcode=OP_TEXT):
+    mask = os.urandom(4)
+    body = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return struct.pack("!BB", 0x80 | opcode, 0x80 | len(payload)) + mask + body
+
+
+def test_local_websocket_runs_store_conn(pipeline):
+    server = connection_server()
+
+    async def scenario():
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer, status = await _client(port, "/?session=sess-ws")
+        assert status == b"HTTP/1.1 101 Switching Protocols"
+
+        catalog = {"action": "register", "selectors": {"#nav-book": "Booking"}}
+        writer.write(_masked(json.dumps(catalog).encode()))
+        await writer.drain()
+        [item] = [i for i in pipeline.scan()["Items"] if "sessionID" in i]
+        for _ in range(100):
+            item = pipeline.get_item(Key={"connID": item["connID"]})["Item"]
+            if "catalogVersion" in item:
+                break
+            await asyncio.sleep(0.01)
+        assert item["sessionID"] == "sess-ws" and "catalogVersion" in item
+
+        assert await server.send(item["connID"], b'{"action":"click"}')
+        assert await read_frame(reader) == (True, OP_TEXT, b'{"action":"click"}')
+
+        writer.write(_masked(b"\x03\xe8", OP_CLOSE))
+        assert (await read_frame(reader))[1] == OP_CLOSE
+        writer.close()
+        key = {"connID": item["connID"]}
+        for _ in range(100):
+            if "Item" not in pipeline.get_item(Key=key):
+                break
+            await asyncio.sleep(0.01)
+        listener.close()
+        return key
+
+    key = asyncio.run(scenario())
+    assert "Item" not in pipeline.get_item(Key=key)
+    assert encode_frame(b"x" * 200)[1] == 126